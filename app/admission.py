@@ -0,0 +1,268 @@
+
+# Admission control for the Flask and ASGI APIs
+#
+# Each route has a cap on requests running at once and a short bounded queue
+# in front of it (ADMISSION_LIMITS). A request that finds the queue full, or
+# waits longer than ADMISSION_QUEUE_TIMEOUT for a slot, is rejected at once
+# with 503 and a Retry-After, so under overload the API keeps answering a
+# bounded number of requests at normal latency instead of letting all of them
+# pile up and time out together. Per-client quotas (CLIENT_RPM,
+# CLIENT_MAX_CONCURRENT) answer 429 to a single client sending too much.
+# Limits apply per process (per serve.py worker).
+
+import asyncio
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+# Add parent directory to path for imports
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app.config import ADMISSION_LIMITS, ADMISSION_QUEUE_TIMEOUT, CLIENT_RPM, CLIENT_MAX_CONCURRENT
+from app.scheduler import TokenBucket
+from app.telemetry import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED
+
+# Clients whose quota state is kept (least recently seen are forgotten first)
+_MAX_CLIENTS = 10000
+# Weight of the newest request in the service time average
+_EWMA_WEIGHT = 0.2
+# Longest single sleep of a queued async request before it re-checks its turn
+_ASYNC_POLL = 0.05
+
+
+class Rejected(Exception):
+    """Request shed before it ran: status 503 (route overloaded) or 429 (client quota)."""
+
+    def __init__(self, message, status, retry_after, reason):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class RouteLimiter:
+    """At most max_in_flight requests run on a route; up to max_queue more wait for a slot, first come first served."""
+
+    def __init__(self, route, max_in_flight, max_queue, queue_timeout=ADMISSION_QUEUE_TIMEOUT):
+        self.route = route
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._queue = deque()  # tickets of waiting requests, oldest first
+        self._cond = threading.Condition()
+        self._service_time = None
+        self.counters = {"admitted": 0, "queued": 0, "queue_full": 0, "queue_timeout": 0}
+
+    def retry_after(self):
+        """Whole seconds until a slot is likely free for a new request."""
+        if not self._service_time:
+            return 1
+        return max(1, math.ceil(self._service_time * (len(self._queue) + 1) / self.max_in_flight))
+
+    def _reject(self, reason):
+        self.counters[reason] += 1
+        ADMISSION_REJECTED.labels(self.route, reason).inc()
+        return Rejected(f"Server busy ({self.route}), retry later", 503, self.retry_after(), reason)
+
+    def _join(self):
+        """Take a slot now (None) or a ticket at the back of the queue. Caller holds the lock."""
+        # Newcomers do not overtake requests already queued
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self._admit()
+            return None
+        if len(self._queue) >= self.max_queue:
+            raise self._reject("queue_full")
+        ticket = object()
+        self._queue.append(ticket)
+        self.counters["queued"] += 1
+        ADMISSION_QUEUE_DEPTH.labels(self.route).inc()
+        return ticket
+
+    def _turn(self, ticket):
+        return self._queue[0] is ticket and self.in_flight < self.max_in_flight
+
+    def _leave(self, ticket, admitted):
+        """Take ticket out of the queue, with a slot if admitted. Caller holds the lock."""
+        self._queue.remove(ticket)
+        ADMISSION_QUEUE_DEPTH.labels(self.route).dec()
+        if admitted:
+            self._admit()
+        # The next ticket may be at the head now
+        self._cond.notify_all()
+
+    def _admit(self):
+        self.in_flight += 1
+        self.counters["admitted"] += 1
+        ADMISSION_IN_FLIGHT.labels(self.route).inc()
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; raises Rejected when shedding."""
+        with self._cond:
+            ticket = self._join()
+            if ticket is not None:
+                try:
+                    admitted = self._cond.wait_for(lambda: self._turn(ticket), self.queue_timeout)
+                except BaseException:
+                    self._leave(ticket, False)
+                    raise
+                self._leave(ticket, admitted)
+                if not admitted:
+                    raise self._reject("queue_timeout")
+        return time.monotonic()
+
+    async def acquire_async(self):
+        """acquire() without blocking the event loop."""
+        with self._cond:
+            ticket = self._join()
+        if ticket is None:
+            return time.monotonic()
+        expires_at = time.monotonic() + self.queue_timeout
+        try:
+            while True:
+                with self._cond:
+                    if self._turn(ticket):
+                        self._leave(ticket, True)
+                        return time.monotonic()
+                    if time.monotonic() >= expires_at:
+                        self._leave(ticket, False)
+                        raise self._reject("queue_timeout")
+                await asyncio.sleep(min(_ASYNC_POLL, max(0.0, expires_at - time.monotonic())))
+        except asyncio.CancelledError:
+            with self._cond:
+                if ticket in self._queue:
+                    self._leave(ticket, False)
+            raise
+
+    def release(self, started):
+        elapsed = time.monotonic() - started
+        with self._cond:
+            self.in_flight -= 1
+            self._service_time = elapsed if self._service_time is None else (
+                _EWMA_WEIGHT * elapsed + (1 - _EWMA_WEIGHT) * self._service_time
+            )
+            self._cond.notify_all()
+        ADMISSION_IN_FLIGHT.labels(self.route).dec()
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self.counters,
+                in_flight=self.in_flight,
+                waiting=len(self._queue),
+                max_in_flight=self.max_in_flight,
+                max_queue=self.max_queue,
+                avg_service_ms=round((self._service_time or 0.0) * 1000, 2),
+            )
+
+
+class ClientQuotas:
+    """Per-client requests per minute (token bucket) and requests at once; 0 disables either."""
+
+    def __init__(self, rpm=CLIENT_RPM, max_concurrent=CLIENT_MAX_CONCURRENT):
+        self.rpm = rpm
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._clients = OrderedDict()  # client -> [bucket or None, requests running]
+        self.counters = {"rate": 0, "concurrency": 0}
+
+    def _reject(self, reason, retry_after):
+        self.counters[reason] += 1
+        ADMISSION_REJECTED.labels("client", reason).inc()
+        return Rejected(f"Client quota exceeded ({reason}), retry later", 429, retry_after, reason)
+
+    def acquire(self, client):
+        if not self.rpm and not self.max_concurrent:
+            return
+        with self._lock:
+            state = self._clients.get(client)
+            if state is None:
+                state = self._clients[client] = [TokenBucket(self.rpm) if self.rpm else None, 0]
+                self._forget_idle()
+            self._clients.move_to_end(client)
+            bucket, running = state
+            if self.max_concurrent and running >= self.max_concurrent:
+                raise self._reject("concurrency", 1)
+            if bucket is not None:
+                wait = bucket.wait_time(1, time.monotonic())
+                if wait > 0:
+                    raise self._reject("rate", max(1, math.ceil(wait)))
+                bucket.take(1)
+            state[1] += 1
+
+    def release(self, client):
+        if not self.rpm and not self.max_concurrent:
+            return
+        with self._lock:
+            state = self._clients.get(client)
+            if state is not None:
+                state[1] -= 1
+
+    def _forget_idle(self):
+        # Oldest clients with nothing running; their bucket refills to full anyway
+        for client in list(self._clients)[:max(0, len(self._clients) - _MAX_CLIENTS)]:
+            if self._clients[client][1] == 0:
+                del self._clients[client]
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, clients=len(self._clients), rpm=self.rpm, max_concurrent=self.max_concurrent)
+
+
+class Slot:
+    """An admitted request; release() once its response has been sent (safe to call twice)."""
+
+    def __init__(self, limiter, client, started):
+        self._limiter = limiter
+        self._client = client
+        self._started = started
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._limiter.release(self._started)
+        _quotas.release(self._client)
+
+
+_limiters = {route: RouteLimiter(route, *limits) for route, limits in ADMISSION_LIMITS.items()}
+_quotas = ClientQuotas()
+
+
+def admit(route, client):
+    """Admit a request on route from client, or raise Rejected (503 overloaded / 429 over quota)."""
+    limiter = _limiters[route]
+    _quotas.acquire(client)
+    try:
+        started = limiter.acquire()
+    except BaseException:
+        _quotas.release(client)
+        raise
+    return Slot(limiter, client, started)
+
+
+async def admit_async(route, client):
+    """admit() for asyncio handlers (asgi_api.py)."""
+    limiter = _limiters[route]
+    _quotas.acquire(client)
+    try:
+        started = await limiter.acquire_async()
+    except BaseException:
+        _quotas.release(client)
+        raise
+    return Slot(limiter, client, started)
+
+
+def stats():
+    return {
+        "routes": {route: limiter.stats() for route, limiter in _limiters.items()},
+        "clients": _quotas.stats(),
+    }
@@ -1,69 +1,644 @@
-from azure.identity import ClientSecretCredential
-from azure.ai.projects import AIProjectClient
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from azure.ai.agents.models import (
+    AgentStreamEvent,
+    AgentThreadCreationOptions,
+    ListSortOrder,
+    MessageDeltaChunk,
+    ThreadMessage,
+    ThreadMessageOptions,
+    ThreadRun
+)
+from app.clients import get_project_client, get_thread_manager, get_async_project_client
 from app.config import (
-    TENANT_ID,
-    CLIENT_ID,
-    CLIENT_SECRET,
-    PROJECT_ENDPOINT,
-    MODEL_NAME
+    MODEL_NAME,
+    RUN_WAIT_STRATEGY,
+    RUN_POLL_INITIAL,
+    RUN_POLL_MAX,
+    RUN_POLL_FACTOR,
+    LLM_THROTTLE_RETRIES,
+    LLM_RUN_TIMEOUT,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_QUANTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_BUDGET,
+    LLM_HEDGE_MAX_CONCURRENT
 )
+from app import deadlines
+from app.agent_ids import agent_key, get_agent_id, save_agent_id
+from app.deadlines import Deadline
+from app.scheduler import RateLimited, get_scheduler, retry_after_from
+from app.telemetry import AZURE_PHASE, AZURE_POLLS, AZURE_RUNS, AZURE_IN_FLIGHT, AZURE_HEDGES, span, timed
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+import asyncio
+import logging
+import threading
 import time
 
+logger = logging.getLogger("travel_risk.agent")
+
+DEFAULT_INSTRUCTIONS = "You are a helpful AI assistant for legal compliance and travel planning."
+
+# Returned by run() when the run did not complete (never cached)
+RUN_FAILED = "Error: Run failed"
+
+# Run statuses after which polling stops. requires_action waits for tool
+# outputs these agents never submit, so such runs are cancelled instead of
+# being left to expire.
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "expired", "incomplete", "requires_action")
+
+# Run durations kept per caller to estimate when to hedge
+LATENCY_WINDOW = 200
+# Hedges saved up by quiet periods for a later burst of slow runs
+HEDGE_BURST = 10
+
+# Thread deletions scheduled by run_async (kept referenced until they finish)
+_cleanup_tasks = set()
+
+_hedge_executor = None
+_hedge_lock = threading.Lock()
+
+
+def _get_hedge_executor():
+    global _hedge_executor
+    with _hedge_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_MAX_CONCURRENT, thread_name_prefix="hedge")
+        return _hedge_executor
+
+
+class _HedgeBudget:
+    """
+    Every primary run earns LLM_HEDGE_BUDGET of a hedge (up to HEDGE_BURST saved),
+    and at most LLM_HEDGE_MAX_CONCURRENT hedges run at once, so hedges stay a
+    small fraction of traffic and never queue in the hedge pool.
+    """
+
+    def __init__(self, ratio=LLM_HEDGE_BUDGET, max_running=LLM_HEDGE_MAX_CONCURRENT):
+        self.ratio = ratio
+        self.max_running = max_running
+        self.tokens = 0.0
+        self.running = 0
+        self._lock = threading.Lock()
+
+    def primary(self):
+        with self._lock:
+            # Rounded so ten primaries at 0.1 add up to a whole hedge, not 0.999...
+            self.tokens = min(HEDGE_BURST, round(self.tokens + self.ratio, 9))
+
+    def try_start(self):
+        """Take a hedge if the budget and a free slot allow it."""
+        with self._lock:
+            if self.tokens < 1 or self.running >= self.max_running:
+                return False
+            self.tokens -= 1
+            self.running += 1
+            return True
+
+    def finished(self):
+        with self._lock:
+            self.running -= 1
+
+
+_hedges = _HedgeBudget()
+
+
+def _may_hedge():
+    """Start a hedge only when the scheduler has no backlog and the hedge budget allows."""
+    if get_scheduler().busy() or not _hedges.try_start():
+        AZURE_HEDGES.labels("skipped").inc()
+        return False
+    AZURE_HEDGES.labels("launched").inc()
+    return True
+
+
+def _record_status(status):
+    """Count a finished run by its final status."""
+    AZURE_RUNS.labels(getattr(status, "value", status) or "unknown").inc()
+
+
+def _check_rate_limit(run):
+    """Raise RateLimited if the run failed because the deployment was over its quota."""
+    error = getattr(run, "last_error", None)
+    if run.status == "failed" and error is not None and getattr(error, "code", None) == "rate_limit_exceeded":
+        message = getattr(error, "message", None) or "Rate limit exceeded"
+        raise RateLimited(retry_after_from(message), message)
+
+
+@contextmanager
+def _throttling():
+    """Turn Azure's HTTP 429 into RateLimited for the scheduler's retry loop."""
+    try:
+        yield
+    except HttpResponseError as e:
+        if e.status_code == 429:
+            raise RateLimited(retry_after_from(e), str(e)) from e
+        raise
+
+
+class _Latencies:
+    """Recent successful run durations per caller."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def add(self, caller, seconds):
+        with self._lock:
+            self._samples[caller].append(seconds)
+
+    def quantile(self, caller, q=LLM_HEDGE_QUANTILE):
+        """Observed q-quantile, or None until LLM_HEDGE_MIN_SAMPLES runs were seen."""
+        with self._lock:
+            samples = sorted(self._samples.get(caller, ()))
+        if len(samples) < max(1, LLM_HEDGE_MIN_SAMPLES):
+            return None
+        return samples[int(q * (len(samples) - 1))]
+
 
 class AzureAIAgent:
-    def __init__(self, agent_name="LegalComplianceAgent"):
-        """Initialize Azure AI Foundry Agent"""
-        self.credential = ClientSecretCredential(
-            tenant_id=TENANT_ID,
-            client_id=CLIENT_ID,
-            client_secret=CLIENT_SECRET
-        )
-        
-        self.project = AIProjectClient(
-            credential=self.credential,
-            endpoint=PROJECT_ENDPOINT
-        )
-        
-        # Create agent
-        self.agent = self.project.agents.create_agent(
-            model=MODEL_NAME,
-            name=agent_name,
-            instructions="You are a helpful AI assistant for legal compliance and travel planning."
-        )
-        
-        print(f"✓ Agent created with ID: {self.agent.id}")
-
-    def run(self, prompt: str) -> str:
-        """Send a message to the agent and get response"""
-        # Create a new thread
-        thread = self.project.agents.threads.create()
-        
-        # Send user message
-        self.project.agents.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=prompt
-        )
-        
-        # Run the agent
-        run = self.project.agents.runs.create_and_process(
-            thread_id=thread.id,
-            agent_id=self.agent.id
-        )
-        
-        # Poll for completion
-        while True:
-            response = self.project.agents.runs.get(thread_id=thread.id, run_id=run.id)
-            status = response.status
-            
-            if status in ("completed", "failed"):
-                break
-            time.sleep(1)
-        
-        if status == "completed":
-            messages = list(self.project.agents.messages.list(thread_id=thread.id))
-            for msg in messages:
-                if msg.role == "assistant":
-                    return msg.content[0].text.value
-        
-        return "Error: Run failed"
+    def __init__(self, agent_name="LegalComplianceAgent", instructions=DEFAULT_INSTRUCTIONS):
+        """Initialize Azure AI Foundry Agent.
+
+        Nothing is sent to Azure here: the server-side agent is looked up (or
+        created) on first use. Use app.clients.get_agent() instead of
+        constructing this directly so the agent is shared process-wide.
+        """
+        self.agent_name = agent_name
+        self.instructions = instructions
+        # Shared credential, connection pool and project client
+        self.project = get_project_client()
+        self.threads = get_thread_manager()
+        self.latencies = _Latencies()
+        self._agent = None
+        self._agent_lock = threading.Lock()
+
+    @property
+    def agent(self):
+        """The Foundry agent, reusing a persisted ID before creating a new one."""
+        if self._agent is None:
+            with self._agent_lock:
+                if self._agent is None:
+                    key = agent_key(self.agent_name, self.instructions)
+                    agent_id = get_agent_id(key)
+                    if agent_id:
+                        self._agent = SimpleNamespace(id=agent_id)
+                        print(f"✓ Reusing agent {self.agent_name} with ID: {agent_id}")
+                    else:
+                        self._agent = self.project.agents.create_agent(
+                            model=MODEL_NAME,
+                            name=self.agent_name,
+                            instructions=self.instructions
+                        )
+                        save_agent_id(key, self._agent.id)
+                        print(f"✓ Agent created with ID: {self._agent.id}")
+        return self._agent
+
+    def forget_agent(self):
+        """Drop a persisted agent that no longer exists server-side; the next call recreates it."""
+        with self._agent_lock:
+            self._agent = None
+            save_agent_id(agent_key(self.agent_name, self.instructions), None)
+
+    def run(self, prompt: str, caller=None) -> str:
+        """Send a message to the agent and get response
+
+        caller is the name of the requesting agent: it picks the priority
+        class the run is scheduled with (see LLM_PRIORITIES). Throttled runs
+        are retried after the pause Azure asks for, up to LLM_THROTTLE_RETRIES.
+
+        The run ends at the current deadline (app.deadlines, at most
+        LLM_RUN_TIMEOUT): it is cancelled server-side and DeadlineExceeded is
+        raised. With LLM_HEDGE_ENABLED a duplicate run is started once the
+        first has taken longer than the caller's observed p95.
+        """
+        caller = caller or self.agent_name
+        deadline = Deadline(LLM_RUN_TIMEOUT or None, parent=deadlines.current())
+        hedge_after = self.latencies.quantile(caller) if LLM_HEDGE_ENABLED else None
+        if hedge_after is not None:
+            return self._run_hedged(prompt, caller, deadline, hedge_after)
+        return self._run_throttled(prompt, caller, deadline)
+
+    def _run_throttled(self, prompt, caller, deadline):
+        scheduler = get_scheduler()
+        for _ in range(LLM_THROTTLE_RETRIES + 1):
+            scheduler.acquire(caller, prompt, deadline)
+            started = time.monotonic()
+            try:
+                with _throttling():
+                    reply = self._run_scheduled(prompt, deadline)
+            except RateLimited as e:
+                _record_status("rate_limited")
+                scheduler.throttled(e.retry_after)
+                continue
+            if reply != RUN_FAILED:
+                self.latencies.add(caller, time.monotonic() - started)
+            return reply
+        return RUN_FAILED
+
+    def _run_hedged(self, prompt, caller, deadline, hedge_after):
+        """
+        Run on this thread; if no reply came within hedge_after, start one
+        duplicate on the hedge pool (see _may_hedge). The first good reply
+        wins and the other run is cancelled.
+        """
+        primary, hedge = Deadline(parent=deadline), Deadline(parent=deadline)
+        lock = threading.Lock()
+        state = {"finished": False, "hedge": None}
+
+        def hedge_done(future):
+            _hedges.finished()
+            if not future.cancelled() and future.exception() is None and future.result() != RUN_FAILED:
+                # The hedge answered first: stop the primary's wait
+                primary.cancel()
+
+        def launch():
+            with lock:
+                if state["finished"] or not _may_hedge():
+                    return
+                future = deadlines.submit(_get_hedge_executor(), self._run_throttled, prompt, caller, hedge)
+                future.add_done_callback(hedge_done)
+                state["hedge"] = future
+
+        _hedges.primary()
+        timer = threading.Timer(hedge_after, launch)
+        timer.daemon = True
+        timer.start()
+        error = None
+        try:
+            reply = self._run_throttled(prompt, caller, primary)
+        except Exception as e:
+            reply, error = RUN_FAILED, e
+        finally:
+            timer.cancel()
+            with lock:
+                state["finished"] = True
+                future = state["hedge"]
+
+        hedge_error = None
+        if future is not None:
+            if reply != RUN_FAILED:
+                hedge.cancel()
+                return reply
+            try:
+                hedged = future.result()
+            except Exception as e:
+                hedged, hedge_error = RUN_FAILED, e
+            if hedged != RUN_FAILED:
+                AZURE_HEDGES.labels("won").inc()
+                return hedged
+        # No reply from either: raise only if no run got as far as a failed status
+        if error is not None and (future is None or hedge_error is not None):
+            raise error
+        return reply
+
+    def _run_scheduled(self, prompt: str, deadline) -> str:
+        AZURE_IN_FLIGHT.inc()
+        try:
+            with span("azure.run", agent=self.agent_name, strategy=RUN_WAIT_STRATEGY):
+                try:
+                    return self._run(prompt, deadline)
+                except ResourceNotFoundError:
+                    # The persisted agent was deleted on the project: recreate it once
+                    self.forget_agent()
+                    return self._run(prompt, deadline)
+        finally:
+            AZURE_IN_FLIGHT.dec()
+
+    def _run(self, prompt: str, deadline) -> str:
+        # Take a pre-created empty thread; it is deleted in the background afterwards
+        with timed(AZURE_PHASE, "thread_acquire"):
+            thread_id = self.threads.acquire()
+        try:
+            # The user message is posted as part of creating the run (one round trip)
+            messages = [ThreadMessageOptions(role="user", content=prompt)]
+
+            # Run the agent and wait for it using the configured strategy
+            if RUN_WAIT_STRATEGY == "stream":
+                status, reply = self._wait_stream(thread_id, messages, deadline)
+            elif RUN_WAIT_STRATEGY == "process":
+                # create_and_process already polls until the run is terminal
+                # (the SDK's loop cannot be interrupted, so the deadline is only checked before it)
+                deadline.check()
+                with timed(AZURE_PHASE, "run_wait"):
+                    run = self.project.agents.runs.create_and_process(
+                        thread_id=thread_id,
+                        agent_id=self.agent.id,
+                        additional_messages=messages
+                    )
+                _check_rate_limit(run)
+                status, reply = run.status, self._reply_or_cancel(thread_id, run)
+            else:
+                status, reply = self._wait_backoff(thread_id, messages, deadline)
+        finally:
+            self.threads.release(thread_id)
+
+        _record_status(status)
+        if status == "completed" and reply is not None:
+            return reply
+
+        return RUN_FAILED
+
+    def run_stream(self, prompt: str, caller=None):
+        """Send a message and yield the reply text as it is generated.
+
+        Raises RuntimeError(RUN_FAILED) after the last chunk if the run did
+        not complete. Closing the generator early closes the Azure stream
+        and cancels the run. A throttled run is retried like in run() as long
+        as nothing has been yielded yet.
+        """
+        caller = caller or self.agent_name
+        deadline = Deadline(LLM_RUN_TIMEOUT or None, parent=deadlines.current())
+        scheduler = get_scheduler()
+        for attempt in range(LLM_THROTTLE_RETRIES + 1):
+            scheduler.acquire(caller, prompt, deadline)
+            started = False
+            stream = self._stream(prompt, deadline)
+            try:
+                with _throttling():
+                    for chunk in stream:
+                        started = True
+                        yield chunk
+                return
+            except RateLimited as e:
+                _record_status("rate_limited")
+                scheduler.throttled(e.retry_after)
+                if started or attempt == LLM_THROTTLE_RETRIES:
+                    raise RuntimeError(RUN_FAILED) from e
+            finally:
+                # Closing the Azure stream promptly cancels the run when our reader went away
+                stream.close()
+
+    def _stream(self, prompt: str, deadline):
+        with timed(AZURE_PHASE, "thread_acquire"):
+            thread_id = self.threads.acquire()
+        status, run_id = None, None
+        try:
+            with self.project.agents.runs.stream(
+                thread_id=thread_id,
+                agent_id=self.agent.id,
+                additional_messages=[ThreadMessageOptions(role="user", content=prompt)]
+            ) as stream:
+                for event_type, event_data, _ in stream:
+                    if isinstance(event_data, MessageDeltaChunk):
+                        if event_data.text:
+                            yield event_data.text
+                    elif isinstance(event_data, ThreadRun):
+                        status, run_id = event_data.status, event_data.id
+                        _check_rate_limit(event_data)
+                    if deadline.expired():
+                        break
+            if status == "requires_action":
+                self._cancel_run(thread_id, run_id)
+            elif status not in TERMINAL_STATUSES and deadline.expired():
+                self._cancel_run(thread_id, run_id)
+                status = "deadline_exceeded"
+                deadline.check()
+        except RateLimited:
+            # Counted by run_stream, which retries it
+            status = "rate_limited"
+            raise
+        except GeneratorExit:
+            # The reader went away (e.g. the HTTP client disconnected)
+            if status not in TERMINAL_STATUSES:
+                self._cancel_run(thread_id, run_id)
+                status = "abandoned"
+            raise
+        finally:
+            self.threads.release(thread_id)
+            if status != "rate_limited":
+                _record_status(status)
+
+        if status != "completed":
+            raise RuntimeError(RUN_FAILED)
+
+    async def run_async(self, prompt: str, caller=None) -> str:
+        """Async variant of run() on the asyncio Azure clients.
+
+        Thread, message and run are created in a single call; the thread is
+        deleted in a background task once the reply has been read. Cancelling
+        the awaiting task cancels the run server-side.
+        """
+        caller = caller or self.agent_name
+        deadline = Deadline(LLM_RUN_TIMEOUT or None, parent=deadlines.current())
+        hedge_after = self.latencies.quantile(caller) if LLM_HEDGE_ENABLED else None
+        if hedge_after is not None:
+            return await self._run_hedged_async(prompt, caller, deadline, hedge_after)
+        return await self._run_throttled_async(prompt, caller, deadline)
+
+    async def _run_throttled_async(self, prompt, caller, deadline):
+        scheduler = get_scheduler()
+        for _ in range(LLM_THROTTLE_RETRIES + 1):
+            await scheduler.acquire_async(caller, prompt, deadline)
+            started = time.monotonic()
+            try:
+                with _throttling():
+                    reply = await self._run_async_scheduled(prompt, deadline)
+            except RateLimited as e:
+                _record_status("rate_limited")
+                scheduler.throttled(e.retry_after)
+                continue
+            if reply != RUN_FAILED:
+                self.latencies.add(caller, time.monotonic() - started)
+            return reply
+        return RUN_FAILED
+
+    async def _run_hedged_async(self, prompt, caller, deadline, hedge_after):
+        """Async variant of _run_hedged; the losing task is cancelled, which cancels its run."""
+        _hedges.primary()
+        primary = asyncio.ensure_future(self._run_throttled_async(prompt, caller, deadline))
+        tasks = [primary]
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done and _may_hedge():
+            hedge = asyncio.ensure_future(self._run_throttled_async(prompt, caller, deadline))
+            hedge.add_done_callback(lambda _: _hedges.finished())
+            tasks.append(hedge)
+
+        pending, error = set(tasks), None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task.result() != RUN_FAILED:
+                        if task is not primary:
+                            AZURE_HEDGES.labels("won").inc()
+                        return task.result()
+            if error is not None and all(task.exception() is not None for task in tasks):
+                raise error
+            return RUN_FAILED
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _run_async_scheduled(self, prompt: str, deadline) -> str:
+        AZURE_IN_FLIGHT.inc()
+        try:
+            with span("azure.run_async", agent=self.agent_name):
+                try:
+                    return await self._run_async(prompt, deadline)
+                except ResourceNotFoundError:
+                    self.forget_agent()
+                    return await self._run_async(prompt, deadline)
+        finally:
+            AZURE_IN_FLIGHT.dec()
+
+    async def _run_async(self, prompt: str, deadline) -> str:
+        # First use may look up or create the agent (blocking), so do it off the loop
+        if self._agent is None:
+            await asyncio.to_thread(lambda: self.agent)
+        project = get_async_project_client()
+        with timed(AZURE_PHASE, "run_create"):
+            run = await project.agents.create_thread_and_run(
+                agent_id=self.agent.id,
+                thread=AgentThreadCreationOptions(
+                    messages=[ThreadMessageOptions(role="user", content=prompt)]
+                )
+            )
+        try:
+            delay = RUN_POLL_INITIAL
+            polls = 0
+            with timed(AZURE_PHASE, "run_wait"):
+                while run.status not in TERMINAL_STATUSES:
+                    remaining = deadline.remaining()
+                    await asyncio.sleep(delay if remaining is None else min(delay, remaining))
+                    if deadline.expired():
+                        _record_status("deadline_exceeded")
+                        await self._cancel_run_async(project, run.thread_id, run.id)
+                        deadline.check()
+                    delay = min(delay * RUN_POLL_FACTOR, RUN_POLL_MAX)
+                    run = await project.agents.runs.get(thread_id=run.thread_id, run_id=run.id)
+                    polls += 1
+            AZURE_POLLS.observe(polls)
+            _check_rate_limit(run)
+            _record_status(run.status)
+
+            reply = None
+            if run.status == "completed":
+                with timed(AZURE_PHASE, "message_fetch"):
+                    messages = project.agents.messages.list(
+                        thread_id=run.thread_id,
+                        run_id=run.id,
+                        order=ListSortOrder.DESCENDING,
+                        limit=1
+                    )
+                    async for msg in messages:
+                        if msg.role == "assistant":
+                            reply = msg.content[0].text.value
+                        break
+            elif run.status == "requires_action":
+                await self._cancel_run_async(project, run.thread_id, run.id)
+        except asyncio.CancelledError:
+            # Timed out by the orchestrator, lost a hedge or the client disconnected
+            if run.status not in TERMINAL_STATUSES:
+                _record_status("abandoned")
+                task = asyncio.ensure_future(self._cancel_run_async(project, run.thread_id, run.id))
+                _cleanup_tasks.add(task)
+                task.add_done_callback(_cleanup_tasks.discard)
+            raise
+        finally:
+            task = asyncio.ensure_future(self._delete_thread_async(project, run.thread_id))
+            _cleanup_tasks.add(task)
+            task.add_done_callback(_cleanup_tasks.discard)
+
+        return reply if reply is not None else RUN_FAILED
+
+    @staticmethod
+    async def _delete_thread_async(project, thread_id):
+        try:
+            await project.agents.threads.delete(thread_id)
+        except Exception as e:
+            logger.warning("could not delete thread %s: %s", thread_id, e)
+
+    @staticmethod
+    async def _cancel_run_async(project, thread_id, run_id):
+        try:
+            await project.agents.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception as e:
+            logger.warning("could not cancel run %s: %s", run_id, e)
+
+    def _cancel_run(self, thread_id, run_id):
+        """Stop a run server-side so it no longer uses quota (best effort)."""
+        if run_id is None:
+            return
+        try:
+            self.project.agents.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception as e:
+            logger.warning("could not cancel run %s: %s", run_id, e)
+
+    def _reply_or_cancel(self, thread_id, run):
+        """Reply of a finished run; a run stuck in requires_action is cancelled instead."""
+        if run.status == "requires_action":
+            self._cancel_run(thread_id, run.id)
+        if run.status != "completed":
+            return None
+        return self._latest_reply(thread_id, run.id)
+
+    def _wait_backoff(self, thread_id, messages, deadline):
+        """Create the run and poll it, starting fast and backing off."""
+        with timed(AZURE_PHASE, "run_create"):
+            run = self.project.agents.runs.create(
+                thread_id=thread_id,
+                agent_id=self.agent.id,
+                additional_messages=messages
+            )
+        delay = RUN_POLL_INITIAL
+        polls = 0
+        with timed(AZURE_PHASE, "run_wait"):
+            while run.status not in TERMINAL_STATUSES:
+                # Returns early when the deadline is cancelled (timeout, disconnect, lost hedge)
+                deadline.sleep(delay)
+                if deadline.expired():
+                    _record_status("deadline_exceeded")
+                    self._cancel_run(thread_id, run.id)
+                    deadline.check()
+                delay = min(delay * RUN_POLL_FACTOR, RUN_POLL_MAX)
+                run = self.project.agents.runs.get(thread_id=thread_id, run_id=run.id)
+                polls += 1
+        AZURE_POLLS.observe(polls)
+        _check_rate_limit(run)
+        return run.status, self._reply_or_cancel(thread_id, run)
+
+    def _wait_stream(self, thread_id, messages, deadline):
+        """Stream run events; the completed message carries the reply, so no polling or fetch."""
+        status, reply, run = None, None, None
+        with timed(AZURE_PHASE, "stream"), self.project.agents.runs.stream(
+            thread_id=thread_id,
+            agent_id=self.agent.id,
+            additional_messages=messages
+        ) as stream:
+            for event_type, event_data, _ in stream:
+                if isinstance(event_data, ThreadMessage) and event_type == AgentStreamEvent.THREAD_MESSAGE_COMPLETED:
+                    if event_data.role == "assistant" and event_data.text_messages:
+                        reply = event_data.text_messages[0].text.value
+                elif isinstance(event_data, ThreadRun):
+                    run, status = event_data, event_data.status
+                    _check_rate_limit(event_data)
+                if deadline.expired():
+                    break
+        if status not in TERMINAL_STATUSES and run is not None:
+            # Left the stream at the deadline
+            _record_status("deadline_exceeded")
+            self._cancel_run(thread_id, run.id)
+            deadline.check()
+        if status == "requires_action":
+            self._cancel_run(thread_id, run.id)
+        return status, reply
+
+    def _latest_reply(self, thread_id, run_id):
+        """Fetch only the newest assistant message written by this run."""
+        with timed(AZURE_PHASE, "message_fetch"):
+            messages = self.project.agents.messages.list(
+                thread_id=thread_id,
+                run_id=run_id,
+                order=ListSortOrder.DESCENDING,
+                limit=1
+            )
+            msg = next(iter(messages), None)
+        if msg is not None and msg.role == "assistant":
+            return msg.content[0].text.value
+        return None
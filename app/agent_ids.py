@@ -0,0 +1,50 @@
+# Persisted Foundry agent IDs
+# Creating a server-side agent on every boot is slow and leaves orphans on the
+# project, so the ID of each agent is stored in a small JSON file and reused
+# by later processes with the same backend, endpoint, model, name and
+# instructions (fake-backend IDs never collide with real ones).
+
+import hashlib
+import json
+import os
+import threading
+
+from app.config import AGENT_ID_STORE, AZURE_BACKEND, PROJECT_ENDPOINT, MODEL_NAME
+
+_lock = threading.Lock()
+
+
+def agent_key(agent_name, instructions):
+    """Key identifying an agent definition on a given backend, project and model."""
+    digest = hashlib.sha256(instructions.encode("utf-8")).hexdigest()[:12]
+    return f"{AZURE_BACKEND}|{PROJECT_ENDPOINT}|{MODEL_NAME}|{agent_name}|{digest}"
+
+
+def _load():
+    try:
+        with open(AGENT_ID_STORE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_agent_id(key):
+    """Stored agent ID for key, or None."""
+    with _lock:
+        return _load().get(key)
+
+
+def save_agent_id(key, agent_id):
+    """Store (or with agent_id=None, forget) the agent ID for key."""
+    with _lock:
+        ids = _load()
+        if agent_id is None:
+            ids.pop(key, None)
+        else:
+            ids[key] = agent_id
+        os.makedirs(os.path.dirname(AGENT_ID_STORE) or ".", exist_ok=True)
+        tmp_path = f"{AGENT_ID_STORE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(ids, f, indent=2)
+        # Atomic swap so concurrent workers never read a half-written file
+        os.replace(tmp_path, AGENT_ID_STORE)
@@ -11,15 +11,26 @@ def import_from_path(module_name, file_path):
     return module
  
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-search_web = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
+web_search = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py'))
+search_web = web_search.search_web
+search_web_async = web_search.search_web_async
+search_web_stream = web_search.search_web_stream
+# web_search puts the repo root on sys.path, so package imports work from here on
+from app.utils.countries import canonical_city, canonical_country, canonical_nationality, lookup
  
+# Countries where sub-$50 hotels usually mean highway motels
+EXPENSIVE_SAFE_MARKETS = {"US", "GB", "CA", "FR", "DE"}
+
 class AccommodationAgent:
-    def process(self, country=None, city=None, planned_stay=None, nationality=None, gender=None, budget_range=None, purpose=None, **kwargs):
+    def build_query(self, country=None, city=None, planned_stay=None, nationality=None, gender=None, budget_range=None, purpose=None, **kwargs):
         """
         Recommends accommodation while enforcing safety standards for business travelers.
         Includes a 'Sanity Check' for low budgets.
         """
         # 1. Parse Inputs & Defaults
+        country = canonical_country(country)
+        city = canonical_city(city)
+        nationality = canonical_nationality(nationality)
         gender = gender.lower() if gender else "male"
         purpose = purpose if purpose else "Business"
         location = f"{city}, {country}" if city else country
@@ -33,9 +44,8 @@ class AccommodationAgent:
                 is_low_budget = True
  
         # Check if country is generally expensive/requires higher safety standards
-        is_developed_nation = False
-        if country and country.lower() in ["usa", "us", "united states", "uk", "london", "canada", "france", "germany"]:
-            is_developed_nation = True
+        destination = lookup(country)
+        is_developed_nation = bool(destination and destination.iso2 in EXPENSIVE_SAFE_MARKETS)
  
         # 3. Define Safety Rules based on Profile
         safety_instruction = ""
@@ -81,8 +91,21 @@ class AccommodationAgent:
                 f"List 3 specific options with pros/cons."
             )
  
-        # 5. Execute
+        # 5. Detail Level
         # We always use 'detailed' to get safety reviews, unless it's a very short stay check
-        search_result = search_web(query, "detailed")
-        
-        return f"{search_result}"
\ No newline at end of file
+        return query, "detailed"
+
+    def process(self, **kwargs):
+        """Run the query built from the traveler profile."""
+        query, detail_level = self.build_query(**kwargs)
+        return search_web(query, detail_level, agent="AccommodationAgent")
+
+    async def process_async(self, **kwargs):
+        """Async variant of process() for the ASGI app."""
+        query, detail_level = self.build_query(**kwargs)
+        return await search_web_async(query, detail_level, agent="AccommodationAgent")
+
+    def process_stream(self, **kwargs):
+        """Yield the answer in chunks as the model produces it."""
+        query, detail_level = self.build_query(**kwargs)
+        yield from search_web_stream(query, detail_level, agent="AccommodationAgent")
@@ -12,51 +12,42 @@ def import_from_path(module_name, file_path):
 
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 # Assuming search_web returns a string summary or search results
-search_web = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
+web_search = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py'))
+search_web = web_search.search_web
+search_web_async = web_search.search_web_async
+search_web_stream = web_search.search_web_stream
+# web_search puts the repo root on sys.path, so package imports work from here on
+from app.utils.countries import canonical_city, canonical_country, canonical_nationality, is_domestic
+from app.telemetry import log_sampled
+from app.query_planner import SubQuery, DESTINATION, TRAVELER, combine, execute_plan, execute_plan_async, stream_plan
 
 class ComplianceAgent:
-    def _is_domestic(self, nationality, country):
+    def build_plan(self, country=None, city=None, planned_stay=None, nationality=None, gender=None, health_conditions=None, **kwargs):
         """
-        Helper to determine if travel is domestic.
+        Returns a list of SubQuery: entry rules depend on nationality and stay,
+        medication rules on the health condition, and the female business
+        traveler check only on the destination, so each is cached on its own.
         """
-        if not nationality or not country:
-            return False
-            
-        nat = nationality.lower().strip()
-        cnt = country.lower().strip()
-        
-        # Direct match or common demonyms
-        # You can expand this map or use a library like pycountry for robustness in the future
-        mappings = {
-            "india": "indian", "usa": "american", "united states": "american",
-            "uk": "british", "united kingdom": "british", "germany": "german",
-            "france": "french", "china": "chinese", "japan": "japanese"
-        }
-        
-        # Check if country matches nationality directly or via mapping
-        if nat in cnt or cnt in nat: 
-            return True
-        if mappings.get(cnt) == nat:
-            return True
-            
-        return False
-
-    def process(self, country=None, city=None, planned_stay=None, nationality=None, gender=None, health_conditions=None, **kwargs):
         # 1. Extract Attributes from both named params and kwargs
         health_condition = health_conditions or kwargs.get('health_condition', None)  # Accept both spellings
         gender = gender or kwargs.get('gender', None)
         
+        # Canonical names so equivalent profiles produce identical prompts
+        country = canonical_country(country)
+        city = canonical_city(city)
+        nationality = canonical_nationality(nationality)
+        
         # Default planned_stay if missing
         days = int(planned_stay) if planned_stay else 7
         
-        is_domestic = self._is_domestic(nationality, country)
+        domestic = is_domestic(nationality, country)
         location_str = f"{city}, {country}" if city else country
 
         # 2. Build the Search Query using Prompt Engineering Logic
-        queries = []
+        plan = []
 
         # --- SCENARIO A: DOMESTIC TRAVEL ---
-        if is_domestic:
+        if domestic:
             base_query = (
                 f"Official domestic travel compliance rules for {nationality} citizen traveling to {location_str}. "
                 f"IGNORE visa, immigration, and work permits. "
@@ -64,17 +55,19 @@ class ComplianceAgent:
             
             if days < 30:
                 # Short Term Domestic: Focus on ID, GST, Security
-                queries.append(base_query + 
+                plan.append(SubQuery(base_query + 
                     "Focus on: Accepted Government ID proofs for airport/hotel (Aadhar/DL), "
                     "GST invoice requirements for hotel business stays, "
-                    "and any state-specific entry permits (e.g. Inner Line Permit if applicable)."
-                )
+                    "and any state-specific entry permits (e.g. Inner Line Permit if applicable).",
+                    'detailed', TRAVELER, "Travel documents"
+                ))
             else:
                 # Long Term Domestic: Focus on State domicile rules? (Rare, but possible)
-                queries.append(base_query + 
+                plan.append(SubQuery(base_query + 
                     "Focus on: Long-term rental agreement norms for visitors, "
-                    "local business registration requirements if setting up an office."
-                )
+                    "local business registration requirements if setting up an office.",
+                    'detailed', TRAVELER, "Long-stay rules"
+                ))
 
         # --- SCENARIO B: INTERNATIONAL TRAVEL ---
         else:
@@ -84,37 +77,53 @@ class ComplianceAgent:
             
             if days < 90:
                 # Short Term Intl: Visa, Invitation Letters
-                queries.append(base_query + 
+                plan.append(SubQuery(base_query + 
                     f"Focus on: Business Visa requirements for {days} days stay, "
                     "Invitation letter requirements, Passport validity rules (6 months rule), "
-                    "and Return ticket requirements."
-                )
+                    "and Return ticket requirements.",
+                    'detailed', TRAVELER, "Visa and entry"
+                ))
             else:
                 # Long Term Intl: Work Permit, Tax Residency
-                queries.append(base_query + 
+                plan.append(SubQuery(base_query + 
                     f"CRITICAL: Check Tax Residency rules (183-day rule) for {country}, "
                     "Long-term Work Permit (not Business Visa) requirements, "
-                    "Social Security contribution mandates for expats."
-                )
+                    "Social Security contribution mandates for expats.",
+                    'detailed', TRAVELER, "Work permit and tax residency"
+                ))
 
         # --- SPECIAL COMPLIANCE: MEDICAL & GENDER ---
         # This fixes the missing "Diabetes" check
         if health_condition and health_condition.lower() != "none":
-            queries.append(
+            plan.append(SubQuery(
                 f"Airport security and customs regulations for carrying {health_condition} medicines/equipment "
-                f"(like insulin/syringes) into {country}. Prescription requirements."
-            )
+                f"(like insulin/syringes) into {country}. Prescription requirements.",
+                'detailed', TRAVELER, "Medication rules"
+            ))
             
         # Optional: Gender specific laws (e.g. Middle East restrictions, though less common now)
-        if gender and gender.lower() == "female" and not is_domestic:
-             queries.append(
-                 f"Female business traveler legal restrictions or dress code laws for {country} business meetings."
-             )
+        if gender and gender.lower() == "female" and not domestic:
+             plan.append(SubQuery(
+                 f"Female business traveler legal restrictions or dress code laws for {country} business meetings.",
+                 'detailed', DESTINATION, "Business conduct for women"
+             ))
 
-        # 3. Combine queries and execute
-        # We combine them to get a holistic answer from the web search tool
-        final_query = " | ".join(queries)
-        
-        print(f"DEBUG: Agent Generated Query -> {final_query}") # Helpful for your Hackathon demo
+        log_sampled("agent.plan", agent="ComplianceAgent", queries=[sq.text for sq in plan])
         
-        return search_web(final_query, 'detailed')
\ No newline at end of file
+        return plan
+
+    def build_query(self, **kwargs):
+        """The whole plan as one (query, detail_level) prompt."""
+        return combine(self.build_plan(**kwargs))
+
+    def process(self, **kwargs):
+        """Run the plan built from the traveler profile."""
+        return execute_plan(self.build_plan(**kwargs), search_web, agent="ComplianceAgent")
+
+    async def process_async(self, **kwargs):
+        """Async variant of process() for the ASGI app."""
+        return await execute_plan_async(self.build_plan(**kwargs), search_web_async, agent="ComplianceAgent")
+
+    def process_stream(self, **kwargs):
+        """Yield the answer in chunks as the model produces it."""
+        yield from stream_plan(self.build_plan(**kwargs), search_web, search_web_stream, agent="ComplianceAgent")
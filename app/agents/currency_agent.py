@@ -1,22 +1,50 @@
 # currency_agent.py
 
 import re
-from app.agent import AzureAIAgent
+from app.clients import get_agent
+from app.config import CURRENCY_MEMO_PATH
+from app.utils.countries import currency_for
+from app.utils.response_cache import ResponseCache
+
+# LLM answers for unknown nationalities are kept for a year
+MEMO_TTL = 365 * 24 * 3600
 
 def normalize(text):
     return re.sub(r'[^a-z ]', '', text.strip().lower())
 
 class CurrencyAgent:
     def __init__(self):
-        self.agent = AzureAIAgent(agent_name="CurrencyAgent")
+        self._agent = None
+        self.memo = ResponseCache(CURRENCY_MEMO_PATH, max_bytes=1024 * 1024)
+
+    @property
+    def agent(self):
+        # Only needed for nationalities missing from the bundled table
+        if self._agent is None:
+            self._agent = get_agent("CurrencyAgent")
+        return self._agent
 
     def process(self, payload):
         nationality = payload.get('nationality', '')
+        # Common case: bundled ISO 4217 table, no network
+        currency = currency_for(nationality)
+        if currency:
+            return { 'currency': currency }
+
+        key = normalize(nationality)
+        currency = self.memo.get(key) if key else None
+        if currency:
+            return { 'currency': currency }
+
         prompt = f"What is the official currency code (like USD, EUR, INR, etc.) for a person whose nationality is '{nationality}'? Only return the ISO currency code."
-        response = self.agent.run(prompt)
+        response = self.agent.run(prompt, caller="CurrencyAgent")
         matches = re.findall(r'([A-Z]{3})', response)
         # Filter out 'ISO' and pick the first valid code
-        currency = next((m for m in matches if m != 'ISO'), "USD")
+        currency = next((m for m in matches if m != 'ISO'), None)
+        if currency is None:
+            return { 'currency': "USD" }
+        if key:
+            self.memo.set(key, currency, MEMO_TTL)
         return { 'currency': currency }
 
 currency_agent = CurrencyAgent().process
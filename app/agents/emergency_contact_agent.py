@@ -11,71 +11,87 @@ def import_from_path(module_name, file_path):
     return module
  
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-search_web = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
+web_search = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py'))
+search_web = web_search.search_web
+search_web_async = web_search.search_web_async
+search_web_stream = web_search.search_web_stream
+# web_search puts the repo root on sys.path, so package imports work from here on
+from app.utils.countries import canonical_city, canonical_country, canonical_nationality, is_domestic
+from app.telemetry import log_sampled
+from app.query_planner import SubQuery, DESTINATION, TRAVELER, combine, execute_plan, execute_plan_async, stream_plan
  
 class EmergencyContactAgent:
-    def _is_domestic(self, nationality, country):
-        """Helper to check if travel is domestic"""
-        if not nationality or not country:
-            return False
-        nat = nationality.lower().strip()
-        cnt = country.lower().strip()
-        # Common mappings
-        if (nat == "indian" and cnt == "india") or \
-           (nat == "american" and cnt in ["usa", "united states", "us"]):
-            return True
-        return nat in cnt or cnt in nat
- 
-    def process(self, country=None, city=None, planned_stay=None, nationality=None, gender=None, health_condition=None, **kwargs):
+    def build_plan(self, country=None, city=None, planned_stay=None, nationality=None, gender=None, health_condition=None, **kwargs):
         """
         Finds the NEAREST Diplomatic Mission and Medical Support.
         Filters out irrelevant countries and finds jurisdiction-specific consulates.
+
+        Returns a list of SubQuery: local emergency, ambulance and police
+        numbers are destination-wide and shared; consulate, condition-specific
+        care and women's helplines are traveler-specific deltas.
         """
         # 1. Setup Context
+        country = canonical_country(country)
+        city = canonical_city(city)
+        nationality = canonical_nationality(nationality) if nationality else "Foreign"
         location = f"{city}, {country}" if city else country
-        nationality = nationality if nationality else "Foreign"
-        is_domestic = self._is_domestic(nationality, country)
+        domestic = is_domestic(nationality, country)
         
         # 2. Build Specific Queries
-        queries = []
+        # Emergency info requires detail (exact phone numbers/addresses), so we use 'detailed'
+        plan = []
+
+        # --- Query A: Local emergency numbers (same for every traveler) ---
+        plan.append(SubQuery(
+            f"Local emergency services numbers (Police, Fire, Ambulance) in {location}. "
+            f"General emergency ambulance number and nearest general hospital in {city}. "
+            f"Police Non-Emergency number for {city} (for reporting theft/lost items).",
+            "detailed", DESTINATION, "Local emergency services"
+        ))
         
-        # --- Query A: Diplomatic Support (Jurisdiction Logic) ---
-        if not is_domestic:
+        # --- Query B: Diplomatic Support (Jurisdiction Logic) ---
+        if not domestic:
             # CRITICAL FIX: We ask "Which consulate covers [City]" to get the correct number (e.g. NY vs DC)
             # This prevents the agent from listing Embassies in random countries like Canada/Australia.
-            queries.append(
+            plan.append(SubQuery(
                 f"Emergency contact number and address for {nationality} Consulate having jurisdiction over {city}, {country}. "
-                f"Search for '{nationality} Consulate jurisdiction {city}'."
-            )
-        else:
-            # Domestic: Just local emergency
-            queries.append(f"Local emergency services numbers (Police, Fire, Ambulance) in {city}, {country}.")
+                f"Search for '{nationality} Consulate jurisdiction {city}'.",
+                "detailed", TRAVELER, "Consulate"
+            ))
  
-        # --- Query B: Health Support (Condition Specific) ---
+        # --- Query C: Health Support (Condition Specific) ---
         # This fixes the missing "Diabetes" context
         if health_condition and health_condition.lower() != "none":
-            queries.append(
-                f"Top-rated emergency hospital and 24-hour pharmacy in {city} for {health_condition} patients. "
-                f"Ambulance number for {city}."
-            )
-        else:
-            queries.append(f"General emergency ambulance number and nearest general hospital in {city}.")
+            plan.append(SubQuery(
+                f"Top-rated emergency hospital and 24-hour pharmacy in {city} for {health_condition} patients.",
+                "detailed", TRAVELER, "Medical support"
+            ))
  
-        # --- Query C: Safety & Gender ---
+        # --- Query D: Safety & Gender ---
         if gender and gender.lower() == "female":
-            queries.append(
+            plan.append(SubQuery(
                 f"Women's safety helpline number in {city}, {country}. "
-                f"Police Non-Emergency number for {city} (for reporting theft/harassment)."
-            )
-        else:
-             queries.append(f"Police Non-Emergency number for {city} (for reporting theft/lost items).")
- 
-        # 3. Combine & Execute
-        # We use ' | ' to create a rich context for the search tool
-        final_query = " | ".join(queries)
+                f"Police Non-Emergency number for {city} (for reporting theft/harassment).",
+                "detailed", TRAVELER, "Women's safety"
+            ))
         
-        # Debug Print (Shows judges you are finding the *exact* consulate)
-        print(f"DEBUG [EmergencyAgent]: Jurisdiction Search -> {final_query}")
- 
-        # Emergency info requires detail (exact phone numbers/addresses), so we use 'detailed'
-        return search_web(final_query, "detailed")
\ No newline at end of file
+        # Sampled structured log (shows the *exact* consulate being searched)
+        log_sampled("agent.plan", agent="EmergencyContactAgent", queries=[sq.text for sq in plan])
+
+        return plan
+
+    def build_query(self, **kwargs):
+        """The whole plan as one (query, detail_level) prompt."""
+        return combine(self.build_plan(**kwargs))
+
+    def process(self, **kwargs):
+        """Run the plan built from the traveler profile."""
+        return execute_plan(self.build_plan(**kwargs), search_web, agent="EmergencyContactAgent")
+
+    async def process_async(self, **kwargs):
+        """Async variant of process() for the ASGI app."""
+        return await execute_plan_async(self.build_plan(**kwargs), search_web_async, agent="EmergencyContactAgent")
+
+    def process_stream(self, **kwargs):
+        """Yield the answer in chunks as the model produces it."""
+        yield from stream_plan(self.build_plan(**kwargs), search_web, search_web_stream, agent="EmergencyContactAgent")
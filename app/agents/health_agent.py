@@ -13,27 +13,30 @@ def import_from_path(module_name, file_path):
     return module
 
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-search_web = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
+web_search = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py'))
+search_web = web_search.search_web
+search_web_async = web_search.search_web_async
+search_web_stream = web_search.search_web_stream
+# web_search puts the repo root on sys.path, so package imports work from here on
+from app.utils.countries import canonical_city, canonical_country, canonical_nationality, is_domestic
 
 class HealthAgent:
-    def process(self, country=None, city=None, gender=None, health_conditions=None, nationality=None, planned_stay=None, **kwargs):
+    def build_query(self, country=None, city=None, gender=None, health_conditions=None, nationality=None, planned_stay=None, **kwargs):
         # Determine detail level based on planned stay
         detail_level = "critical" if planned_stay and planned_stay < 10 else "detailed"
         
+        # Canonical names so equivalent profiles produce identical prompts
+        country = canonical_country(country)
+        city = canonical_city(city)
+        nationality = canonical_nationality(nationality)
+        
         # Check if this is domestic travel
-        is_domestic = False
-        if nationality and country:
-            nationality_lower = nationality.lower().strip()
-            country_lower = country.lower().strip()
-            if (nationality_lower in country_lower or country_lower in nationality_lower or
-                (nationality_lower == "indian" and country_lower == "india") or
-                (nationality_lower == "american" and country_lower in ["usa", "united states"])):
-                is_domestic = True
+        domestic = is_domestic(nationality, country)
         
         # Build a query that includes all context for personalized recommendations
         base = f"A {nationality if nationality else 'foreign'} traveler is visiting {city+', ' if city else ''}{country} for {planned_stay if planned_stay else 'several'} days."
         
-        if is_domestic:
+        if domestic:
             base += f" This is DOMESTIC travel within their home country."
         else:
             base += f" This is INTERNATIONAL travel."
@@ -67,4 +70,19 @@ class HealthAgent:
         
         base += " Include any region-specific health precautions."
         query = base
-        return search_web(query, detail_level)
\ No newline at end of file
+        return query, detail_level
+
+    def process(self, **kwargs):
+        """Run the query built from the traveler profile."""
+        query, detail_level = self.build_query(**kwargs)
+        return search_web(query, detail_level, agent="HealthAgent")
+
+    async def process_async(self, **kwargs):
+        """Async variant of process() for the ASGI app."""
+        query, detail_level = self.build_query(**kwargs)
+        return await search_web_async(query, detail_level, agent="HealthAgent")
+
+    def process_stream(self, **kwargs):
+        """Yield the answer in chunks as the model produces it."""
+        query, detail_level = self.build_query(**kwargs)
+        yield from search_web_stream(query, detail_level, agent="HealthAgent")
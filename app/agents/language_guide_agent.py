@@ -11,51 +11,33 @@ def import_from_path(module_name, file_path):
     return module
  
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-search_web = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
+web_search = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py'))
+search_web = web_search.search_web
+search_web_async = web_search.search_web_async
+search_web_stream = web_search.search_web_stream
+# web_search puts the repo root on sys.path, so package imports work from here on
+from app.utils.countries import canonical_city, canonical_country, canonical_nationality, is_domestic, shares_language
+from app.telemetry import log_sampled
  
 class LanguageGuideAgent:
-    def _is_same_language_context(self, nationality, country):
-        """
-        Helper to detect English-to-English travel (e.g., Indian to USA/UK).
-        Prevents the agent from translating 'Hello' to 'Hello'.
-        """
-        if not nationality or not country:
-            return False
-            
-        nat = nationality.lower().strip()
-        cnt = country.lower().strip()
-        
-        # List of primary English-speaking business contexts
-        # You can expand this list (e.g. Singapore, Ireland)
-        english_origins = ["indian", "american", "british", "australian", "canadian"]
-        english_destinations = ["usa", "united states", "us", "uk", "united kingdom", "australia", "canada", "new zealand"]
-        
-        if nat in english_origins and cnt in english_destinations:
-            return True
-        return False
- 
-    def process(self, country=None, city=None, planned_stay=None, nationality=None, **kwargs):
+    def build_query(self, country=None, city=None, planned_stay=None, nationality=None, **kwargs):
         """
         Provides Cultural Intelligence.
         Mode A: Same Language -> Focus on Slang, Etiquette, Tipping.
         Mode B: Foreign Language -> Focus on Business Phrases & Translation.
         """
         # 1. Setup Context
+        country = canonical_country(country)
+        city = canonical_city(city)
+        nationality = canonical_nationality(nationality) if nationality else "Foreign"
         location = f"{city}, {country}" if city else country
-        nationality = nationality if nationality else "Foreign"
-        
-        is_same_language = self._is_same_language_context(nationality, country)
         
-        # Check domestic (fallback logic from your original code)
-        is_domestic = False
-        if nationality and country:
-            nat_lower = nationality.lower().strip()
-            cnt_lower = country.lower().strip()
-            if nat_lower in cnt_lower or cnt_lower in nat_lower or (nat_lower == "indian" and cnt_lower == "india"):
-                is_domestic = True
+        # English to English (e.g. Indian to USA/UK): don't translate 'Hello' to 'Hello'
+        is_same_language = shares_language(nationality, country)
+        domestic = is_domestic(nationality, country)
  
         # 2. Build Specific Queries based on Context
-        if is_same_language and not is_domestic:
+        if is_same_language and not domestic:
             # --- MODE A: CULTURAL COACHING (English to English) ---
             # Don't translate. Teach how to 'fit in'.
             query = (
@@ -65,7 +47,7 @@ class LanguageGuideAgent:
                 f"What are cultural faux pas or taboos a {nationality} professional should avoid in {country}?"
             )
             
-        elif is_domestic:
+        elif domestic:
             # --- MODE B: REGIONAL NUANCE ---
             query = (
                 f"Regional business culture in {city} compared to rest of {country}. "
@@ -86,6 +68,21 @@ class LanguageGuideAgent:
         # unless it's a super short trip where we just need 'Critical Do's and Don'ts'.
         mode = "critical" if planned_stay and planned_stay < 5 else "detailed"
         
-        print(f"DEBUG [LanguageAgent]: Same Lang? {is_same_language} | Query -> {query}")
+        log_sampled("agent.query", agent="LanguageGuideAgent", same_language=is_same_language, query=query)
         
-        return search_web(query, mode)
\ No newline at end of file
+        return query, mode
+
+    def process(self, **kwargs):
+        """Run the query built from the traveler profile."""
+        query, detail_level = self.build_query(**kwargs)
+        return search_web(query, detail_level, agent="LanguageGuideAgent")
+
+    async def process_async(self, **kwargs):
+        """Async variant of process() for the ASGI app."""
+        query, detail_level = self.build_query(**kwargs)
+        return await search_web_async(query, detail_level, agent="LanguageGuideAgent")
+
+    def process_stream(self, **kwargs):
+        """Yield the answer in chunks as the model produces it."""
+        query, detail_level = self.build_query(**kwargs)
+        yield from search_web_stream(query, detail_level, agent="LanguageGuideAgent")
@@ -12,85 +12,98 @@ def import_from_path(module_name, file_path):
     return module
  
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-search_web = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
+web_search = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py'))
+search_web = web_search.search_web
+search_web_async = web_search.search_web_async
+search_web_stream = web_search.search_web_stream
+# web_search puts the repo root on sys.path, so package imports work from here on
+from app.utils.countries import canonical_city, canonical_country, canonical_nationality, is_domestic
+from app.telemetry import log_sampled
+from app.query_planner import SubQuery, DESTINATION, TRAVELER, combine, execute_plan, execute_plan_async, stream_plan
  
 class NewsAlertAgent:
-    def _is_domestic(self, nationality, country):
-        """Helper to check if travel is domestic"""
-        if not nationality or not country:
-            return False
-        
-        nat = nationality.lower().strip()
-        cnt = country.lower().strip()
-        
-        # Common mappings
-        if (nat == "indian" and cnt == "india") or \
-           (nat == "american" and cnt in ["usa", "united states", "us"]):
-            return True
-            
-        # Direct string matching
-        return nat in cnt or cnt in nat
- 
-    def process(self, country=None, city=None, planned_stay=None, nationality=None, gender=None, **kwargs):
+    def build_plan(self, country=None, city=None, planned_stay=None, nationality=None, gender=None, **kwargs):
         """
         Fetches HYPER-LOCAL and REAL-TIME alerts.
         Differentiates between 'Live Breaking News' and 'Seasonal Expectations'.
+
+        Returns a list of SubQuery: disruption and safety scans depend only on
+        the destination and are shared by every traveler going there; the
+        women's-safety and diplomatic checks are traveler-specific deltas.
         """
         # 1. Setup Context Variables
+        country = canonical_country(country)
+        city = canonical_city(city)
+        nationality = canonical_nationality(nationality)
         location = f"{city}, {country}" if city else country
-        is_domestic = self._is_domestic(nationality, country)
+        domestic = is_domestic(nationality, country)
         
         # 2. Dynamic Time Detection
         # This makes your agent smart: It knows what "Today" is.
         today = datetime.now().strftime("%B %Y")  # e.g., "December 2025"
+
+        # 3. Detail Level
+        # We use 'critical' or 'detailed' based on length, but 'detailed' is usually
+        # better for news to capture the specific headlines.
+        # If the stay is very short, we might force 'critical' to get just the warnings.
+        # Destination scans always use 'detailed' so short and long stays share them.
+        mode = "critical" if planned_stay and planned_stay < 5 else "detailed"
         
-        # 3. Build Specialized Queries
-        queries = []
+        # 4. Build Specialized Queries
+        plan = []
         
         # Query A: The "Disruption" Check (Weather & Transport)
         # We ask for "Active" or "Scheduled" disruptions to get real news.
-        queries.append(
+        plan.append(SubQuery(
             f"Active travel disruptions in {location} during {today}. "
             f"Search for: 'Transport strikes scheduled in {location}', "
             f"'Severe weather warnings for {city} next 7 days', "
-            f"'Flight cancellations {country} recent news'."
-        )
+            f"'Flight cancellations {country} recent news'.",
+            "detailed", DESTINATION, "Travel disruptions"
+        ))
         
         # Query B: The "Safety" Check (Crime & Unrest)
         # We ask for "Recent incidents" to avoid generic "Be careful" advice.
-        safety_query = (
+        plan.append(SubQuery(
             f"Recent safety incidents in {location} business districts last 30 days. "
             f"Check for: 'Protests in {city}', 'Civil unrest alerts {country}', "
-            f"'Crime spike downtown {city}'."
-        )
+            f"'Crime spike downtown {city}'.",
+            "detailed", DESTINATION, "Safety incidents"
+        ))
         
         # Gender Specific Safety Layer
         if gender and gender.lower() == "female":
-            safety_query += (
-                f" focus on 'Safety alerts for women in {city}', "
-                f"'Recent incidents involving female travelers in {country}'."
-            )
-        queries.append(safety_query)
+            plan.append(SubQuery(
+                f"Safety alerts for women in {city}. "
+                f"Recent incidents involving female travelers in {country}.",
+                mode, TRAVELER, "Women's safety"
+            ))
  
         # Query C: The "Diplomatic" Check (International Only)
-        if not is_domestic:
-            queries.append(
+        if not domestic:
+            plan.append(SubQuery(
                 f"Political tension between {nationality} and {country} currently. "
-                f"Latest Embassy travel advisory for {nationality} citizens in {country}."
-            )
- 
-        # 4. Combine Queries
-        # " | " acts as a separator if your search tool handles complex queries,
-        # otherwise it concatenates context for a rich search.
-        final_query = " | ".join(queries)
+                f"Latest Embassy travel advisory for {nationality} citizens in {country}.",
+                mode, TRAVELER, "Diplomatic situation"
+            ))
         
-        # Debug Print (Vital for showing Judges the "Reasoning")
-        print(f"DEBUG [NewsAgent]: Real-Time Scan Query -> {final_query}")
- 
-        # 5. Execution
-        # We use 'critical' or 'detailed' based on length, but 'detailed' is usually
-        # better for news to capture the specific headlines.
-        # If the stay is very short, we might force 'critical' to get just the warnings.
-        mode = "critical" if planned_stay and planned_stay < 5 else "detailed"
+        # Sampled structured log of the "Reasoning"
+        log_sampled("agent.plan", agent="NewsAlertAgent", queries=[sq.text for sq in plan])
         
-        return search_web(final_query, mode)
\ No newline at end of file
+        return plan
+
+    def build_query(self, **kwargs):
+        """The whole plan as one (query, detail_level) prompt."""
+        return combine(self.build_plan(**kwargs))
+
+    def process(self, **kwargs):
+        """Run the plan built from the traveler profile."""
+        return execute_plan(self.build_plan(**kwargs), search_web, agent="NewsAlertAgent")
+
+    async def process_async(self, **kwargs):
+        """Async variant of process() for the ASGI app."""
+        return await execute_plan_async(self.build_plan(**kwargs), search_web_async, agent="NewsAlertAgent")
+
+    def process_stream(self, **kwargs):
+        """Yield the answer in chunks as the model produces it."""
+        yield from stream_plan(self.build_plan(**kwargs), search_web, search_web_stream, agent="NewsAlertAgent")
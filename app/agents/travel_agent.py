@@ -11,16 +11,24 @@ def import_from_path(module_name, file_path):
     return module
  
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-search_web = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
+web_search = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py'))
+search_web = web_search.search_web
+search_web_async = web_search.search_web_async
+search_web_stream = web_search.search_web_stream
+# web_search puts the repo root on sys.path, so package imports work from here on
+from app.utils.countries import canonical_city, canonical_country, canonical_nationality
+from app.utils.climate import season_for
+from app.telemetry import log_sampled
  
 class TravelAgent:
-    def process(self, country=None, city=None, duration=None, season=None, planned_stay=None, nationality=None, **kwargs):
+    def build_query(self, country=None, city=None, duration=None, season=None, planned_stay=None, nationality=None, **kwargs):
         """
         Recommend logistics based on Persona (Business vs Leisure), Safety Profile, and Health needs.
         """
-        # Validate inputs
-        if not country:
-            return "Please provide at least a country for travel recommendations."
+        # Canonical names so equivalent profiles produce identical prompts
+        country = canonical_country(country)
+        city = canonical_city(city)
+        nationality = canonical_nationality(nationality)
  
         # 1. Extract Context Variables
         purpose = kwargs.get('purpose', 'Business').lower()
@@ -62,6 +70,9 @@ class TravelAgent:
             )
  
         # 5. Seasonal Context (Impact on Business)
+        # Without an explicit season, the bundled climate table gives this month's (no LLM call)
+        if not season and country:
+            season = season_for(country, city)
         weather_context = ""
         if season:
             weather_context = f"Consdering the season is {season}, warn about specific commute disruptions (e.g., Monsoon flooding roads, heatwave fatigue)."
@@ -82,10 +93,31 @@ class TravelAgent:
             "Provide 3 distinct sections: 'Recommended Commute', 'Safety & Health', and 'Traffic/Logistics Alerts'."
         )
        
-        # Debug print to show judges the 'Reasoning' behind the query
-        print(f"DEBUG [TravelAgent]: Generated Strategy -> {query}")
+        # Sampled structured log of the 'Reasoning' behind the query
+        log_sampled("agent.query", agent="TravelAgent", query=query)
  
-        # 7. Execute Search
+        # 7. Detail Level
         # We always use 'detailed' for business travel to ensure we get specific traffic/safety data
-        return f"{search_web(query, 'detailed')}"
- 
\ No newline at end of file
+        return query, 'detailed'
+
+    def process(self, **kwargs):
+        """Run the query built from the traveler profile."""
+        if not kwargs.get("country"):
+            return "Please provide at least a country for travel recommendations."
+        query, detail_level = self.build_query(**kwargs)
+        return search_web(query, detail_level, agent="TravelAgent")
+
+    async def process_async(self, **kwargs):
+        """Async variant of process() for the ASGI app."""
+        if not kwargs.get("country"):
+            return "Please provide at least a country for travel recommendations."
+        query, detail_level = self.build_query(**kwargs)
+        return await search_web_async(query, detail_level, agent="TravelAgent")
+
+    def process_stream(self, **kwargs):
+        """Yield the answer in chunks as the model produces it."""
+        if not kwargs.get("country"):
+            yield "Please provide at least a country for travel recommendations."
+            return
+        query, detail_level = self.build_query(**kwargs)
+        yield from search_web_stream(query, detail_level, agent="TravelAgent")
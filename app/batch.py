@@ -0,0 +1,226 @@
+
+# Batch assessment of many traveler profiles
+#
+# Profiles are read lazily from JSONL or CSV, assessed a few at a time with
+# Orchestrator.handle_all, and written to JSONL as each one completes, so
+# memory stays flat however long the input is. Identical agent prompts across
+# travelers are answered once: search_web's response cache and single-flight
+# coalescing share them, whether they repeat later in the batch or overlap
+# in time.
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator, Tuple
+
+# Add parent directory to path for imports
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app.config import BATCH_CONCURRENCY
+from app.utils.response_cache import get_search_cache
+from app.utils.singleflight import search_flights
+
+# CSV columns converted from text
+INT_FIELDS = ("planned_stay",)
+# handle_all parameters; a profile may not set them
+OPTION_FIELDS = ("agent_types", "max_workers", "timeout", "batched")
+
+
+class InvalidProfile(ValueError):
+    """An input line that is not a traveler profile; read_profiles yields it in the line's place."""
+
+
+def _clean_profile(profile):
+    if not isinstance(profile, dict):
+        raise TypeError(f"expected a JSON object, got {type(profile).__name__}")
+    profile = {k: v for k, v in profile.items() if k and v not in (None, "")}
+    for field in INT_FIELDS:
+        if str(profile.get(field, "")).strip().isdigit():
+            profile[field] = int(profile[field])
+    return profile
+
+
+def read_profiles(source, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield traveler profiles one at a time.
+
+    A line that cannot be parsed into a profile yields an InvalidProfile
+    instead, so the rest of the file is still read and indices stay aligned.
+
+    Args:
+        source: Path to a .jsonl/.csv file, or an open text stream
+        fmt: "jsonl" or "csv" (inferred from the file extension if omitted)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        fmt = fmt or ("csv" if str(source).lower().endswith(".csv") else "jsonl")
+        with open(source, newline="", encoding="utf-8") as f:
+            yield from read_profiles(f, fmt)
+        return
+
+    if fmt == "csv":
+        for row in csv.DictReader(source):
+            yield _parse(_clean_profile, row)
+    else:
+        for line in source:
+            line = line.strip()
+            if line:
+                yield _parse(lambda text: _clean_profile(json.loads(text)), line)
+
+
+def _parse(parse, raw):
+    try:
+        return parse(raw)
+    except (ValueError, TypeError) as e:
+        return InvalidProfile(f"Invalid traveler profile: {e}")
+
+
+def parse_profiles(text: str, fmt: str) -> Iterator[Dict[str, Any]]:
+    """read_profiles for an in-memory JSONL/CSV document."""
+    return read_profiles(io.StringIO(text), fmt)
+
+
+def iter_batch(orchestrator, profiles: Iterable[Dict[str, Any]], agent_types=None, concurrency: Optional[int] = None,
+               timeout: Optional[float] = None, skip=None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Assess profiles with bounded concurrency, yielding (index, record) as each traveler finishes.
+
+    Args:
+        orchestrator: Orchestrator with the assessment agents registered
+        profiles: Iterable of traveler profiles (consumed lazily)
+        agent_types: Agents to run per traveler (defaults to ASSESSMENT_AGENTS)
+        concurrency: Travelers assessed at the same time
+        timeout: Seconds each agent may run
+        skip: Callable index -> bool for travelers already done
+
+    Records hold "index", "traveler_id" (when the profile has one), "results",
+    "errors" and "elapsed". An InvalidProfile from read_profiles becomes
+    {"index", "error"} without running any agent. Results arrive in
+    completion order, not input order.
+    """
+    concurrency = concurrency or BATCH_CONCURRENCY
+
+    def assess(index, profile):
+        profile = {k: v for k, v in profile.items() if k not in OPTION_FIELDS}
+        traveler_id = profile.pop("traveler_id", None)
+        try:
+            assessment = orchestrator.handle_all(agent_types, timeout=timeout, **profile)
+        except Exception as e:
+            assessment = {"results": {}, "errors": {"batch": str(e)}, "elapsed": 0.0}
+        record = {"index": index}
+        if traveler_id is not None:
+            record["traveler_id"] = traveler_id
+        record.update(assessment)
+        return index, record
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+    try:
+        pending = set()
+        for index, profile in enumerate(profiles):
+            if skip is not None and skip(index):
+                continue
+            if isinstance(profile, InvalidProfile):
+                yield index, {"index": index, "error": str(profile)}
+                continue
+            # Only read further input once a slot is free, so memory stays flat
+            while len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(assess, index, profile))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Checkpoint:
+    """
+    Batch progress as a watermark (every index below it is done) plus the
+    few finished indices above it, so the file stays small for any batch size.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.watermark = 0
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.watermark = state.get("watermark", 0)
+            self.done = set(state.get("done", []))
+
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done
+
+    def mark(self, index: int) -> None:
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.discard(self.watermark)
+            self.watermark += 1
+        self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"watermark": self.watermark, "done": sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+
+def run_batch(orchestrator, input_path: str, output_path: str, checkpoint_path: Optional[str] = None,
+              agent_types=None, concurrency: Optional[int] = None, timeout: Optional[float] = None,
+              fmt: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Assess every profile in input_path and append one JSON line per traveler to output_path.
+
+    Re-running with the same checkpoint resumes where the previous run stopped.
+    A crash between writing a result and updating the checkpoint can repeat
+    that traveler's line, so consumers should key on "index".
+
+    Returns:
+        Summary with counts, elapsed seconds and how many searches were shared
+    """
+    checkpoint = Checkpoint(checkpoint_path or f"{output_path}.checkpoint.json")
+    search_cache = get_search_cache()
+    cache_before = search_cache.stats() if search_cache else {}
+    shared_before = search_flights.stats()["shared"]
+    started_at = time.monotonic()
+    assessed = failed = 0
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        for index, record in iter_batch(
+            orchestrator,
+            read_profiles(input_path, fmt),
+            agent_types=agent_types,
+            concurrency=concurrency,
+            timeout=timeout,
+            skip=checkpoint.is_done,
+        ):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            checkpoint.mark(index)
+            assessed += 1
+            if record.get("errors") or "error" in record:
+                failed += 1
+
+    cache_after = search_cache.stats() if search_cache else {}
+    return {
+        "assessed": assessed,
+        "with_errors": failed,
+        "completed_through": checkpoint.watermark,
+        "elapsed": round(time.monotonic() - started_at, 3),
+        "shared_searches": search_flights.stats()["shared"] - shared_before,
+        "cached_searches": sum(
+            cache_after.get(k, 0) - cache_before.get(k, 0) for k in ("hits", "disk_hits")
+        ),
+    }
@@ -0,0 +1,167 @@
+# Process-wide Azure clients shared by every agent
+# One credential (one token cache), one pooled keep-alive HTTP session and one
+# AIProjectClient per process, plus a registry of AzureAIAgent instances by name.
+# With AZURE_BACKEND=fake the clients come from app/fake_backend.py instead.
+
+import asyncio
+import atexit
+import threading
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from azure.core.pipeline.policies import AsyncRetryPolicy, RetryPolicy
+from azure.core.pipeline.transport import RequestsTransport
+from azure.identity import ClientSecretCredential
+from azure.identity.aio import ClientSecretCredential as AsyncClientSecretCredential
+from azure.ai.projects import AIProjectClient
+from azure.ai.projects.aio import AIProjectClient as AsyncAIProjectClient
+
+from app.config import (
+    AZURE_BACKEND,
+    TENANT_ID,
+    CLIENT_ID,
+    CLIENT_SECRET,
+    PROJECT_ENDPOINT,
+    HTTP_POOL_SIZE,
+    THREAD_POOL_SIZE,
+    THREAD_MAX_OUTSTANDING
+)
+from app.thread_manager import ThreadManager
+
+_lock = threading.RLock()
+_session = None
+_transport = None
+_credential = None
+_project = None
+_thread_manager = None
+_agents = {}
+# asyncio clients are bound to the event loop they were created on
+_async_projects = weakref.WeakKeyDictionary()
+
+
+class _NoThrottleRetryPolicy(RetryPolicy):
+    """SDK retries for transient errors, but 429s go back to app.scheduler, which pauses every caller."""
+
+    def is_retry(self, settings, response):
+        if response.http_response.status_code == 429:
+            return False
+        return super().is_retry(settings, response)
+
+
+class _AsyncNoThrottleRetryPolicy(AsyncRetryPolicy):
+    def is_retry(self, settings, response):
+        if response.http_response.status_code == 429:
+            return False
+        return super().is_retry(settings, response)
+
+
+def get_session():
+    """Pooled requests session reused for every Azure call (TLS + keep-alive)."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            # Retries are handled by the Azure pipeline policies, not urllib3
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=Retry(total=False, redirect=False, raise_on_status=False)
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_transport():
+    """Azure transport wrapping the shared session."""
+    global _transport
+    with _lock:
+        if _transport is None:
+            _transport = RequestsTransport(session=get_session(), session_owner=False)
+        return _transport
+
+
+def get_credential():
+    """Single credential so the AAD token is fetched once and cached."""
+    global _credential
+    with _lock:
+        if _credential is None and AZURE_BACKEND == "fake":
+            from app.fake_backend import FakeCredential
+            _credential = FakeCredential()
+        elif _credential is None:
+            _credential = ClientSecretCredential(
+                tenant_id=TENANT_ID,
+                client_id=CLIENT_ID,
+                client_secret=CLIENT_SECRET,
+                transport=get_transport()
+            )
+        return _credential
+
+
+def get_project_client():
+    """Shared AIProjectClient (its agents client reuses the same transport)."""
+    global _project
+    with _lock:
+        if _project is None and AZURE_BACKEND == "fake":
+            from app.fake_backend import FakeProjectClient
+            _project = FakeProjectClient()
+        elif _project is None:
+            _project = AIProjectClient(
+                credential=get_credential(),
+                endpoint=PROJECT_ENDPOINT,
+                transport=get_transport(),
+                retry_policy=_NoThrottleRetryPolicy()
+            )
+        return _project
+
+
+def get_thread_manager():
+    """Shared thread lifecycle manager; pooled threads are cleaned up at exit."""
+    global _thread_manager
+    with _lock:
+        if _thread_manager is None:
+            _thread_manager = ThreadManager(
+                get_project_client(),
+                pool_size=THREAD_POOL_SIZE,
+                max_outstanding=THREAD_MAX_OUTSTANDING
+            )
+            atexit.register(_thread_manager.close)
+        return _thread_manager
+
+
+def get_async_project_client():
+    """AIProjectClient on the asyncio transport, one per running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        project = _async_projects.get(loop)
+        if project is None and AZURE_BACKEND == "fake":
+            from app.fake_backend import FakeAsyncProjectClient
+            project = _async_projects[loop] = FakeAsyncProjectClient()
+        elif project is None:
+            credential = AsyncClientSecretCredential(
+                tenant_id=TENANT_ID,
+                client_id=CLIENT_ID,
+                client_secret=CLIENT_SECRET
+            )
+            project = AsyncAIProjectClient(
+                credential=credential,
+                endpoint=PROJECT_ENDPOINT,
+                retry_policy=_AsyncNoThrottleRetryPolicy()
+            )
+            _async_projects[loop] = project
+        return project
+
+
+def get_agent(agent_name="TravelSearchAgent"):
+    """Get or create the AzureAIAgent registered under agent_name."""
+    from app.agent import AzureAIAgent
+
+    with _lock:
+        agent = _agents.get(agent_name)
+        if agent is None:
+            agent = AzureAIAgent(agent_name=agent_name)
+            _agents[agent_name] = agent
+        return agent
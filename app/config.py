@@ -12,6 +12,9 @@ CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 PROJECT_ENDPOINT = os.getenv("PROJECT_ENDPOINT")
 MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o-mini")
 
+# "azure" talks to AI Foundry; "fake" uses the in-process simulator in app/fake_backend.py
+AZURE_BACKEND = os.getenv("AZURE_BACKEND", "azure")
+
 # Google Gemini Configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
@@ -24,3 +27,158 @@ AZURE_CLIENT_ID = os.getenv("AZURE_CLIENT_ID")
 AZURE_CLIENT_SECRET = os.getenv("AZURE_CLIENT_SECRET")
 
 
+
+# Full-trip assessment (Orchestrator.handle_all)
+ASSESSMENT_MAX_WORKERS = int(os.getenv("ASSESSMENT_MAX_WORKERS", "7"))
+AGENT_TIMEOUT = float(os.getenv("AGENT_TIMEOUT", "90"))
+
+# Shared Azure HTTP connection pool (app/clients.py)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+
+# How AzureAIAgent.run waits for a run to finish:
+#   "backoff" - create the run and poll with short-start exponential backoff
+#   "stream"  - stream run events and take the reply from the completed message
+#   "process" - let the SDK's create_and_process poll (1s granularity)
+RUN_WAIT_STRATEGY = os.getenv("RUN_WAIT_STRATEGY", "backoff").lower()
+RUN_POLL_INITIAL = float(os.getenv("RUN_POLL_INITIAL", "0.2"))
+RUN_POLL_MAX = float(os.getenv("RUN_POLL_MAX", "2.0"))
+RUN_POLL_FACTOR = float(os.getenv("RUN_POLL_FACTOR", "1.6"))
+
+# Longest an Azure run may take when the caller set no deadline (app/deadlines.py);
+# a run past its deadline is cancelled server-side
+LLM_RUN_TIMEOUT = float(os.getenv("LLM_RUN_TIMEOUT", "120"))
+# Hedged runs: start a duplicate once a run is slower than the caller's observed
+# LLM_HEDGE_QUANTILE latency and keep whichever answers first (costs extra runs)
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "0") == "1"
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# At most this many hedges per primary run, and this many hedges running at once;
+# no hedge starts while calls are queued in app.scheduler
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))
+LLM_HEDGE_MAX_CONCURRENT = int(os.getenv("LLM_HEDGE_MAX_CONCURRENT", "8"))
+
+# Azure thread lifecycle (app/thread_manager.py)
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", "4"))
+THREAD_MAX_OUTSTANDING = int(os.getenv("THREAD_MAX_OUTSTANDING", "64"))
+
+# search_web response cache (app/utils/response_cache.py)
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "1") == "1"
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"))
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", os.path.join(CACHE_DIR, "search_cache.sqlite3"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+SEARCH_CACHE_DEFAULT_TTL = int(os.getenv("SEARCH_CACHE_DEFAULT_TTL", "3600"))
+# Seconds a cached answer stays fresh, per calling agent
+SEARCH_CACHE_TTLS = {
+    "NewsAlertAgent": 15 * 60,
+    "TravelAgent": 6 * 3600,
+    "AccommodationAgent": 24 * 3600,
+    "EmergencyContactAgent": 24 * 3600,
+    "HealthAgent": 24 * 3600,
+    "ComplianceAgent": 7 * 24 * 3600,
+    "LanguageGuideAgent": 30 * 24 * 3600,
+    "LiveWeather": 3 * 3600,
+}
+
+# Live weather line on the dashboard, fetched off the critical path (season
+# comes from the bundled table in app/utils/climate.py either way)
+LIVE_WEATHER_ENABLED = os.getenv("LIVE_WEATHER_ENABLED", "0") == "1"
+
+# Seconds a caller waits on an identical in-flight search_web query, and the
+# longest the shared run may take (app/utils/singleflight.py)
+SEARCH_FLIGHT_TIMEOUT = float(os.getenv("SEARCH_FLIGHT_TIMEOUT", "120"))
+
+# Foundry agent IDs reused across restarts (app/agent_ids.py)
+AGENT_ID_STORE = os.getenv("AGENT_ID_STORE", os.path.join(CACHE_DIR, "agent_ids.json"))
+
+# Currency codes learned from the LLM for nationalities missing from the bundled table
+CURRENCY_MEMO_PATH = os.getenv("CURRENCY_MEMO_PATH", os.path.join(CACHE_DIR, "currency_memo.sqlite3"))
+
+# Offline copy of the WHO indicators the dashboard uses (app/data/who_store.py)
+WHO_STORE_PATH = os.getenv("WHO_STORE_PATH", os.path.join(CACHE_DIR, "who_store.sqlite3"))
+WHO_SYNC_INDICATORS = tuple(
+    code.strip() for code in os.getenv("WHO_SYNC_INDICATORS", "NCD_BMI_30,MORT_DIAB,MORT_CVD,MMR").split(",") if code.strip()
+)
+
+# Travelers assessed at the same time by batch mode (app/batch.py)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# Background assessment jobs (app/jobs.py, worker.py): the SQLite queue, worker
+# processes x jobs each runs at once, and how long a claimed job stays with a
+# worker that stopped renewing its lease before another worker takes it over
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+JOB_WORKER_PROCESSES = int(os.getenv("JOB_WORKER_PROCESSES", "2"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+# Seconds finished jobs are kept for /api/jobs/<id>/result
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))
+
+# Sub-queries of one agent's plan run at the same time (app/query_planner.py)
+PLANNER_MAX_WORKERS = int(os.getenv("PLANNER_MAX_WORKERS", "64"))
+
+# Fake backend behaviour (AZURE_BACKEND=fake). Latencies are "fixed:S",
+# "uniform:MIN,MAX", "normal:MEAN,SD" or "lognormal:MEDIAN,SIGMA" in seconds.
+FAKE_RUN_LATENCY = os.getenv("FAKE_RUN_LATENCY", "lognormal:2.0,0.5")
+FAKE_API_LATENCY = os.getenv("FAKE_API_LATENCY", "fixed:0.02")
+# Final run statuses with weights, e.g. "completed=0.95,failed=0.04,expired=0.01"
+FAKE_RUN_STATUSES = os.getenv("FAKE_RUN_STATUSES", "completed=1")
+# Fraction of API calls answered with HTTP 500 / 429
+FAKE_ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", "0"))
+FAKE_THROTTLE_RATE = float(os.getenv("FAKE_THROTTLE_RATE", "0"))
+FAKE_SEED = os.getenv("FAKE_SEED")
+
+# Admission control for the Flask and ASGI APIs (app/admission.py), per process: requests
+# running at once and requests allowed to wait for a slot, by route. Beyond
+# that, or after ADMISSION_QUEUE_TIMEOUT seconds in the queue, requests get 503.
+ADMISSION_LIMITS = {
+    "agent": (32, 64),
+    "chat": (16, 32),
+    "assessment": (8, 16),
+    "assessment_stream": (8, 16),
+    "batch": (2, 2),
+    "jobs": (16, 32),
+}
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+# Per client (X-Client-Id header, else remote address): requests per minute and
+# at once, answered with 429 beyond that; 0 disables the quota
+CLIENT_RPM = int(os.getenv("CLIENT_RPM", "0"))
+CLIENT_MAX_CONCURRENT = int(os.getenv("CLIENT_MAX_CONCURRENT", "0"))
+
+# Production server (serve.py): worker processes x threads per worker, and the
+# seconds in-flight requests get to finish on shutdown. LLM_RPM / LLM_TPM and
+# the search cache file are shared by all workers.
+SERVE_BIND = os.getenv("SERVE_BIND", "0.0.0.0:5050")
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "1"))
+SERVE_THREADS = int(os.getenv("SERVE_THREADS", "16"))
+SERVE_DRAIN_TIMEOUT = float(os.getenv("SERVE_DRAIN_TIMEOUT", str(AGENT_TIMEOUT + 10)))
+
+# Observability (app/telemetry.py): log level and the fraction of agent prompts logged
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+# Outbound LLM call scheduler (app/scheduler.py). Set LLM_RPM / LLM_TPM a little
+# below the deployment's quota; 0 disables that bucket (429s are still handled).
+LLM_RPM = int(os.getenv("LLM_RPM", "0"))
+LLM_TPM = int(os.getenv("LLM_TPM", "0"))
+# Completion tokens assumed per run when estimating TPM use
+LLM_COMPLETION_TOKENS = int(os.getenv("LLM_COMPLETION_TOKENS", "800"))
+# Priority class per calling agent: critical, high, normal or low
+LLM_PRIORITIES = {
+    "EmergencyContactAgent": "critical",
+    "ComplianceAgent": "critical",
+    "HealthAgent": "high",
+    "NewsAlertAgent": "high",
+    "BatchedAssessment": "high",
+    "TravelAgent": "normal",
+    "AccommodationAgent": "normal",
+    "LanguageGuideAgent": "low",
+    "LiveWeather": "low",
+}
+LLM_DEFAULT_PRIORITY = os.getenv("LLM_DEFAULT_PRIORITY", "normal")
+# Seconds waited before a queued call moves up one priority class
+LLM_PRIORITY_AGING = float(os.getenv("LLM_PRIORITY_AGING", "30"))
+# Retries of a throttled run, and the pause when Azure gives no Retry-After
+LLM_THROTTLE_RETRIES = int(os.getenv("LLM_THROTTLE_RETRIES", "3"))
+LLM_THROTTLE_DEFAULT_WAIT = float(os.getenv("LLM_THROTTLE_DEFAULT_WAIT", "5"))
@@ -0,0 +1,282 @@
+# Offline store of WHO GHO indicator data
+#
+# Indicators are bulk-synced into SQLite with a composite index on
+# (indicator, SpatialDim, Dim1, TimeDim), so per-country lookups and
+# cross-country comparisons run in-process instead of over HTTP.
+# Refreshes are incremental: only rows whose Date is newer than the last
+# sync are fetched.
+#
+#   python -m app.data.who_store sync [INDICATOR ...]
+#   python -m app.data.who_store stats
+
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+
+# Add parent directory to path for imports (who_api loads this file by path)
+root_dir = Path(__file__).parent.parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app.config import WHO_STORE_PATH, WHO_SYNC_INDICATORS
+
+logger = logging.getLogger("travel_risk.who_store")
+
+# Columns fetched during a sync (Id keys the upsert, Date drives incremental refresh)
+SYNC_SELECT = ("Id", "SpatialDim", "TimeDim", "Dim1", "NumericValue", "Date")
+
+# Filter fields that map onto indexed columns
+FILTER_COLUMNS = {
+    "SpatialDim": "spatial_dim",
+    "Dim1": "dim1",
+    "TimeDim": "time_dim",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY,
+    indicator TEXT NOT NULL,
+    spatial_dim TEXT,
+    dim1 TEXT,
+    time_dim INTEGER,
+    numeric_value REAL,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS observations_lookup
+    ON observations (indicator, spatial_dim, dim1, time_dim);
+CREATE INDEX IF NOT EXISTS observations_by_dim1
+    ON observations (indicator, dim1, time_dim);
+CREATE TABLE IF NOT EXISTS sync_state (
+    indicator TEXT PRIMARY KEY,
+    last_date TEXT,
+    synced_at REAL NOT NULL,
+    rows INTEGER NOT NULL
+);
+"""
+
+
+class WHOStore:
+    def __init__(self, path: str = WHO_STORE_PATH):
+        """
+        Args:
+            path: SQLite file holding the synced indicators
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = None
+        self._db_pid = None
+        self._synced = None  # indicator -> last sync time, loaded lazily
+        self._synced_version = None
+
+    def has_indicator(self, indicator: str) -> bool:
+        """True if indicator has been synced at least once (by this or any other process)."""
+        with self._lock:
+            try:
+                db = self._connection()
+                # data_version changes whenever another connection commits,
+                # e.g. a `python -m app.data.who_store sync` run from the CLI
+                version = db.execute("PRAGMA data_version").fetchone()[0]
+                if self._synced is None or version != self._synced_version:
+                    self._synced = {
+                        row[0]: row[1] for row in db.execute("SELECT indicator, synced_at FROM sync_state")
+                    }
+                    self._synced_version = version
+            except sqlite3.Error as e:
+                logger.warning("WHO store read failed: %s", e)
+                return False
+            return indicator in self._synced
+
+    def query(self, indicator: str, filters: Optional[Dict[str, Any]] = None, top: Optional[int] = None
+              ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Rows of a synced indicator matching exact-value filters.
+
+        Args:
+            indicator: WHO indicator code
+            filters: Mapping of SpatialDim / Dim1 / TimeDim to the required value
+            top: Maximum number of rows to return
+
+        Returns:
+            (records, total) with records shaped like the GHO API rows
+        """
+        where, args = ["indicator = ?"], [indicator]
+        for field, value in (filters or {}).items():
+            where.append(f"{FILTER_COLUMNS[field]} = ?")
+            args.append(value)
+        clause = " AND ".join(where)
+
+        with self._lock:
+            db = self._connection()
+            total = db.execute(f"SELECT COUNT(*) FROM observations WHERE {clause}", args).fetchone()[0]
+            sql = (
+                "SELECT spatial_dim, time_dim, numeric_value, dim1 FROM observations "
+                f"WHERE {clause} ORDER BY spatial_dim, time_dim DESC"
+            )
+            if top is not None:
+                sql += f" LIMIT {int(top)}"
+            rows = db.execute(sql, args).fetchall()
+
+        records = [
+            {"SpatialDim": spatial_dim, "TimeDim": time_dim, "NumericValue": value, "Dim1": dim1}
+            for spatial_dim, time_dim, value, dim1 in rows
+        ]
+        return records, total
+
+    def latest_by_country(self, indicator: str, countries: Optional[Iterable[str]] = None,
+                          dim1: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Most recent value per country, for cross-country comparisons.
+
+        Args:
+            indicator: WHO indicator code
+            countries: ISO3 codes to include (None for every country)
+            dim1: Dim1 value to restrict to (e.g. 'FMLE'); None for all
+
+        Returns:
+            ISO3 code -> {"year": ..., "value": ..., "dim1": ...}. Without dim1,
+            rows of the latest year are tie-broken by Dim1 (NULL first), so
+            the same series is picked on every call.
+        """
+        where, args = ["indicator = ?"], [indicator]
+        if dim1 is not None:
+            where.append("dim1 = ?")
+            args.append(dim1)
+        if countries is not None:
+            countries = list(countries)
+            where.append(f"spatial_dim IN ({','.join('?' * len(countries))})")
+            args.extend(countries)
+
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT spatial_dim, time_dim, numeric_value, dim1 FROM ("
+                "SELECT spatial_dim, time_dim, numeric_value, dim1, ROW_NUMBER() OVER ("
+                "PARTITION BY spatial_dim ORDER BY time_dim DESC, dim1) AS rank FROM observations "
+                f"WHERE {' AND '.join(where)}) WHERE rank = 1",
+                args
+            ).fetchall()
+        return {
+            spatial_dim: {"year": year, "value": value, "dim1": series}
+            for spatial_dim, year, value, series in rows
+        }
+
+    def sync(self, indicator: str, client=None) -> int:
+        """
+        Pull new and changed rows for indicator from the GHO API.
+
+        Args:
+            indicator: WHO indicator code
+            client: WHOClient to fetch with (defaults to the shared one)
+
+        Returns:
+            Number of rows written
+        """
+        if client is None:
+            from app.utils.who_api import get_client
+            client = get_client()
+
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT last_date FROM sync_state WHERE indicator = ?", (indicator,)
+            ).fetchone()
+        last_date = row[0] if row else None
+
+        odata_filter = f"Date gt {last_date}" if last_date else None
+        records, _ = client.get_records(indicator, filter=odata_filter, select=SYNC_SELECT)
+
+        rows = [
+            (
+                record.get("Id"),
+                indicator,
+                record.get("SpatialDim"),
+                record.get("Dim1"),
+                record.get("TimeDim"),
+                record.get("NumericValue"),
+                record.get("Date"),
+            )
+            for record in records
+            if record.get("Id") is not None
+        ]
+        newest = max((r[6] for r in rows if r[6]), default=last_date)
+
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO observations "
+                    "(id, indicator, spatial_dim, dim1, time_dim, numeric_value, date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                total = db.execute(
+                    "SELECT COUNT(*) FROM observations WHERE indicator = ?", (indicator,)
+                ).fetchone()[0]
+                db.execute(
+                    "INSERT OR REPLACE INTO sync_state (indicator, last_date, synced_at, rows) VALUES (?, ?, ?, ?)",
+                    (indicator, newest, time.time(), total)
+                )
+            self._synced = None
+        return len(rows)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-indicator row counts and last sync times."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT indicator, rows, last_date, synced_at FROM sync_state ORDER BY indicator"
+            ).fetchall()
+        return [
+            {"indicator": indicator, "rows": count, "last_date": last_date, "synced_at": synced_at}
+            for indicator, count, last_date, synced_at in rows
+        ]
+
+    def _connection(self):
+        """SQLite connection for this process (reopened after a fork)."""
+        if self._db is None or self._db_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._db, self._db_pid = db, os.getpid()
+        return self._db
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> WHOStore:
+    """Process-wide WHO store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WHOStore()
+        return _store
+
+
+def sync_all(indicators: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Sync every indicator in WHO_SYNC_INDICATORS (or the given ones)."""
+    store = get_store()
+    written = {}
+    for indicator in indicators or WHO_SYNC_INDICATORS:
+        try:
+            written[indicator] = store.sync(indicator)
+        except Exception as e:
+            logger.warning("WHO sync of %s failed: %s", indicator, e)
+            written[indicator] = str(e)
+    return written
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "sync"
+    if command == "sync":
+        for indicator, written in sync_all(sys.argv[2:]).items():
+            print(f"{indicator}: {written}")
+    elif command == "stats":
+        for entry in get_store().stats():
+            print(entry)
+    else:
+        print("usage: python -m app.data.who_store [sync [INDICATOR ...] | stats]")
+        sys.exit(2)
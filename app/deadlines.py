@@ -0,0 +1,105 @@
+
+# Deadlines for LLM runs
+#
+# A Deadline travels in a context variable from the HTTP handler or the
+# orchestrator down to AzureAIAgent, whose wait loops stop, cancel the run
+# server-side and raise DeadlineExceeded once it passes or is cancelled
+# (agent timeout, client disconnect, losing hedge). A nested deadline never
+# outlives its parent and is cancelled with it. Worker threads only see the
+# caller's deadline when the work is handed over with submit().
+
+import contextvars
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The run's deadline passed or it was cancelled before finishing."""
+
+
+class Deadline:
+    def __init__(self, seconds=None, parent=None):
+        """Expires seconds from now (never if None), or earlier if parent does."""
+        expires_at = time.monotonic() + seconds if seconds is not None else None
+        if parent is not None and parent.expires_at is not None:
+            expires_at = parent.expires_at if expires_at is None else min(expires_at, parent.expires_at)
+        self.expires_at = expires_at
+        self._cancelled = threading.Event()
+        self._children = weakref.WeakSet()
+        self._lock = threading.Lock()
+        if parent is not None:
+            parent._adopt(self)
+
+    def _adopt(self, child):
+        with self._lock:
+            self._children.add(child)
+        if self.cancelled:
+            child.cancel()
+
+    def cancel(self):
+        """Stop every run under this deadline (and its children) as soon as possible."""
+        self._cancelled.set()
+        with self._lock:
+            children = list(self._children)
+        for child in children:
+            child.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def remaining(self):
+        """Seconds left, or None without a time limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.cancelled or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def check(self):
+        """Raise DeadlineExceeded if the deadline has passed or was cancelled."""
+        if self.cancelled:
+            raise DeadlineExceeded("Run cancelled")
+        if self.expired():
+            raise DeadlineExceeded("Deadline exceeded")
+
+    def sleep(self, seconds):
+        """Sleep up to seconds, waking early on cancellation or expiry."""
+        remaining = self.remaining()
+        self._cancelled.wait(seconds if remaining is None else min(seconds, remaining))
+
+
+def current():
+    """The deadline of the running request, or None."""
+    return _current.get()
+
+
+@contextmanager
+def scope(seconds=None):
+    """Run the block under a new deadline nested in the current one."""
+    deadline = Deadline(seconds, parent=_current.get())
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def use(deadline):
+    """Run the block under an existing deadline."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def submit(executor, fn, *args, **kwargs):
+    """executor.submit that carries the caller's deadline into the worker thread."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
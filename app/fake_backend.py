@@ -0,0 +1,452 @@
+
+# In-process stand-in for AIProjectClient (AZURE_BACKEND=fake)
+#
+# Implements the slice of the Foundry agents API this app uses (agents,
+# threads, messages, runs incl. streaming, create_thread_and_run and the
+# asyncio client) with configurable latency distributions, final run statuses
+# and injected HTTP errors, so the orchestration and caching layers can be
+# benchmarked and exercised without Azure.
+
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict, Any
+
+from azure.core.credentials import AccessToken
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from azure.ai.agents.models import (
+    AgentStreamEvent,
+    MessageDelta,
+    MessageDeltaChunk,
+    MessageDeltaTextContent,
+    MessageDeltaTextContentObject,
+    MessageTextContent,
+    MessageTextDetails,
+    ThreadMessage,
+    ThreadRun
+)
+
+from app.config import (
+    FAKE_RUN_LATENCY,
+    FAKE_API_LATENCY,
+    FAKE_RUN_STATUSES,
+    FAKE_ERROR_RATE,
+    FAKE_THROTTLE_RATE,
+    FAKE_SEED
+)
+
+# Number of delta events a streamed reply is split into
+STREAM_CHUNKS = 8
+
+_BATCH_KEYS = re.compile(r"JSON object with exactly these keys: ((?:\"[^\"]+\"(?:, )?)+)")
+
+
+class Latency:
+    """A latency distribution parsed from "kind:a,b" (seconds)."""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.args = [float(a) for a in args.split(",") if a.strip()]
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        a = self.args
+        if self.kind == "fixed":
+            value = a[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(a[0], a[1])
+        elif self.kind == "normal":
+            value = rng.gauss(a[0], a[1])
+        else:
+            # Median and sigma of the underlying normal: right-skewed like real LLM runs
+            value = a[0] * rng.lognormvariate(0, a[1])
+        return max(0.0, value)
+
+
+def _parse_statuses(spec):
+    weights = {}
+    for part in spec.split(","):
+        status, _, weight = part.partition("=")
+        if status.strip():
+            weights[status.strip()] = float(weight or 1)
+    return weights
+
+
+class _Settings:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.configure(
+            run_latency=FAKE_RUN_LATENCY,
+            api_latency=FAKE_API_LATENCY,
+            statuses=FAKE_RUN_STATUSES,
+            error_rate=FAKE_ERROR_RATE,
+            throttle_rate=FAKE_THROTTLE_RATE,
+            seed=FAKE_SEED
+        )
+
+    def configure(self, run_latency=None, api_latency=None, statuses=None, error_rate=None,
+                  throttle_rate=None, seed=None):
+        with self.lock:
+            if run_latency is not None:
+                self.run_latency = Latency(run_latency)
+            if api_latency is not None:
+                self.api_latency = Latency(api_latency)
+            if statuses is not None:
+                self.statuses = _parse_statuses(statuses) if isinstance(statuses, str) else dict(statuses)
+            if error_rate is not None:
+                self.error_rate = error_rate
+            if throttle_rate is not None:
+                self.throttle_rate = throttle_rate
+            if seed is not None or not hasattr(self, "rng"):
+                self.rng = random.Random(seed)
+
+    def sample_run(self):
+        with self.lock:
+            latency = self.run_latency.sample(self.rng)
+            statuses, weights = zip(*self.statuses.items())
+            status = self.rng.choices(statuses, weights)[0]
+        return latency, status
+
+    def api_call(self):
+        """Delay of one API round trip, or an injected HTTP error."""
+        with self.lock:
+            delay = self.api_latency.sample(self.rng)
+        time.sleep(delay)
+        self._inject_error()
+
+    async def api_call_async(self):
+        with self.lock:
+            delay = self.api_latency.sample(self.rng)
+        await asyncio.sleep(delay)
+        self._inject_error()
+
+    def _inject_error(self):
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.throttle_rate:
+            error = HttpResponseError(message="(429) Rate limit is exceeded. Try again in 1 seconds.")
+            error.status_code = 429
+            raise error
+        if roll < self.throttle_rate + self.error_rate:
+            error = HttpResponseError(message="(500) Internal server error (injected by fake backend).")
+            error.status_code = 500
+            raise error
+
+
+_settings = _Settings()
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_threads = {}  # thread_id -> list of ThreadMessage
+_runs = {}  # run_id -> dict(thread_id, agent_id, status, ready_at, reply)
+counters = {"api_calls": 0, "runs": 0, "threads_created": 0, "threads_deleted": 0}
+
+
+def configure(**kwargs):
+    """Change latency, statuses or error rates at runtime (see _Settings.configure)."""
+    _settings.configure(**kwargs)
+
+
+def reset():
+    """Forget every thread and run and zero the counters."""
+    with _lock:
+        _threads.clear()
+        _runs.clear()
+        for key in counters:
+            counters[key] = 0
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(counters)
+        stats["threads"] = len(_threads)
+        stats["active_runs"] = sum(1 for run in _runs.values() if run["ready_at"] > time.monotonic())
+    return stats
+
+
+def fake_reply(prompt: str) -> str:
+    """Deterministic answer; batched prompts get the JSON sections they ask for."""
+    match = _BATCH_KEYS.search(prompt)
+    if match:
+        keys = re.findall(r"\"([^\"]+)\"", match.group(1))
+        return json.dumps({key: f"Simulated answer for the {key} section." for key in keys})
+    return f"Simulated answer ({len(prompt)} character prompt): {prompt[-160:]}"
+
+
+def _new_id(prefix):
+    return f"{prefix}_fake{next(_ids)}"
+
+
+def _count(name):
+    with _lock:
+        counters["api_calls"] += 1
+        if name:
+            counters[name] += 1
+
+
+def _message(thread_id, role, text):
+    return ThreadMessage(
+        id=_new_id("msg"),
+        thread_id=thread_id,
+        role=role,
+        content=[MessageTextContent(text=MessageTextDetails(value=text, annotations=[]))]
+    )
+
+
+def _thread_run(run_id, run):
+    status = run["status"] if time.monotonic() >= run["ready_at"] else "in_progress"
+    return ThreadRun(id=run_id, thread_id=run["thread_id"], agent_id=run["agent_id"], status=status)
+
+
+def _start_run(thread_id, agent_id, messages):
+    with _lock:
+        if thread_id not in _threads:
+            raise ResourceNotFoundError(message=f"No thread found with id '{thread_id}'.")
+        for message in messages or []:
+            _threads[thread_id].append(_message(thread_id, "user", message.content))
+        prompt = _threads[thread_id][-1].content[0].text.value if _threads[thread_id] else ""
+    latency, status = _settings.sample_run()
+    run_id = _new_id("run")
+    with _lock:
+        _runs[run_id] = {
+            "thread_id": thread_id,
+            "agent_id": agent_id,
+            "status": status,
+            "ready_at": time.monotonic() + latency,
+            "reply": fake_reply(prompt) if status == "completed" else None,
+            "stored": False,
+        }
+        counters["runs"] += 1
+    return run_id
+
+
+def _settle(run_id):
+    """Append the assistant reply once a completed run's time is up."""
+    with _lock:
+        run = _runs[run_id]
+        if run["reply"] is not None and not run["stored"] and time.monotonic() >= run["ready_at"]:
+            message = _message(run["thread_id"], "assistant", run["reply"])
+            message.run_id = run_id
+            _threads.setdefault(run["thread_id"], []).append(message)
+            run["stored"] = True
+        return _thread_run(run_id, run)
+
+
+def _drop_thread(thread_id):
+    with _lock:
+        _threads.pop(thread_id, None)
+        for run_id in [r for r, run in _runs.items() if run["thread_id"] == thread_id]:
+            del _runs[run_id]
+
+
+def _cancel(run_id):
+    with _lock:
+        run = _runs[run_id]
+        if time.monotonic() < run["ready_at"]:
+            run.update(status="cancelled", ready_at=time.monotonic(), reply=None)
+        return _thread_run(run_id, run)
+
+
+def _list_messages(thread_id, run_id=None, order=None, limit=None):
+    with _lock:
+        if thread_id not in _threads:
+            raise ResourceNotFoundError(message=f"No thread found with id '{thread_id}'.")
+        messages = [m for m in _threads[thread_id] if run_id is None or getattr(m, "run_id", None) == run_id]
+    if str(order).lower().endswith("desc"):
+        messages.reverse()
+    return messages[:limit] if limit else messages
+
+
+class _FakeThreads:
+    def create(self, **kwargs):
+        _settings.api_call()
+        _count("threads_created")
+        thread_id = _new_id("thread")
+        with _lock:
+            _threads[thread_id] = []
+        return ThreadMessage(id=thread_id)  # only .id is used
+
+    def delete(self, thread_id, **kwargs):
+        _settings.api_call()
+        _count("threads_deleted")
+        _drop_thread(thread_id)
+
+
+class _FakeMessages:
+    def list(self, thread_id, run_id=None, order=None, limit=None, **kwargs):
+        _settings.api_call()
+        _count(None)
+        return iter(_list_messages(thread_id, run_id, order, limit))
+
+
+class _FakeStream:
+    def __init__(self, run_id):
+        self.run_id = run_id
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        with _lock:
+            run = dict(_runs[self.run_id])
+        yield AgentStreamEvent.THREAD_RUN_CREATED, _thread_run(self.run_id, dict(run, ready_at=float("inf"))), None
+        remaining = max(0.0, run["ready_at"] - time.monotonic())
+        reply = run["reply"]
+        if reply:
+            size = -(-len(reply) // STREAM_CHUNKS)
+            chunks = [reply[i:i + size] for i in range(0, len(reply), size)]
+            for chunk in chunks:
+                time.sleep(remaining / len(chunks))
+                yield AgentStreamEvent.THREAD_MESSAGE_DELTA, MessageDeltaChunk(
+                    id=self.run_id,
+                    delta=MessageDelta(role="assistant", content=[
+                        MessageDeltaTextContent(index=0, text=MessageDeltaTextContentObject(value=chunk))
+                    ])
+                ), None
+        else:
+            time.sleep(remaining)
+        final = _settle(self.run_id)
+        if reply:
+            yield AgentStreamEvent.THREAD_MESSAGE_COMPLETED, _message(run["thread_id"], "assistant", reply), None
+        yield f"thread.run.{final.status}", final, None
+
+
+class _FakeRuns:
+    def create(self, thread_id, agent_id, additional_messages=None, **kwargs):
+        _settings.api_call()
+        _count(None)
+        run_id = _start_run(thread_id, agent_id, additional_messages)
+        with _lock:
+            return _thread_run(run_id, dict(_runs[run_id], ready_at=float("inf")))
+
+    def get(self, thread_id, run_id, **kwargs):
+        _settings.api_call()
+        _count(None)
+        return _settle(run_id)
+
+    def create_and_process(self, thread_id, agent_id, additional_messages=None, **kwargs):
+        run = self.create(thread_id, agent_id, additional_messages=additional_messages)
+        with _lock:
+            ready_at = _runs[run.id]["ready_at"]
+        time.sleep(max(0.0, ready_at - time.monotonic()))
+        return _settle(run.id)
+
+    def stream(self, thread_id, agent_id, additional_messages=None, **kwargs):
+        _settings.api_call()
+        _count(None)
+        return _FakeStream(_start_run(thread_id, agent_id, additional_messages))
+
+    def cancel(self, thread_id, run_id, **kwargs):
+        _settings.api_call()
+        _count(None)
+        return _cancel(run_id)
+
+
+class _FakeAgentsClient:
+    def __init__(self):
+        self.threads = _FakeThreads()
+        self.messages = _FakeMessages()
+        self.runs = _FakeRuns()
+
+    def create_agent(self, model=None, name=None, instructions=None, **kwargs):
+        _settings.api_call()
+        _count(None)
+        return ThreadMessage(id=_new_id("asst"))  # only .id is used
+
+    def create_thread_and_run(self, agent_id, thread=None, **kwargs):
+        thread_id = self.threads.create().id
+        return self.runs.create(thread_id, agent_id, additional_messages=thread.messages if thread else None)
+
+
+class FakeProjectClient:
+    """Drop-in for azure.ai.projects.AIProjectClient as used by this app."""
+
+    def __init__(self, **kwargs):
+        self.agents = _FakeAgentsClient()
+
+    def close(self):
+        pass
+
+
+class _AsyncIterator:
+    def __init__(self, items):
+        self._items = iter(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._items)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _FakeAsyncThreads:
+    async def delete(self, thread_id, **kwargs):
+        await _settings.api_call_async()
+        _count("threads_deleted")
+        _drop_thread(thread_id)
+
+
+class _FakeAsyncRuns:
+    async def get(self, thread_id, run_id, **kwargs):
+        await _settings.api_call_async()
+        _count(None)
+        return _settle(run_id)
+
+    async def cancel(self, thread_id, run_id, **kwargs):
+        await _settings.api_call_async()
+        _count(None)
+        return _cancel(run_id)
+
+
+class _FakeAsyncMessages:
+    def list(self, thread_id, run_id=None, order=None, limit=None, **kwargs):
+        _count(None)
+        return _AsyncIterator(_list_messages(thread_id, run_id, order, limit))
+
+
+class _FakeAsyncAgentsClient:
+    def __init__(self):
+        self.threads = _FakeAsyncThreads()
+        self.messages = _FakeAsyncMessages()
+        self.runs = _FakeAsyncRuns()
+
+    async def create_thread_and_run(self, agent_id, thread=None, **kwargs):
+        await _settings.api_call_async()
+        _count("threads_created")
+        thread_id = _new_id("thread")
+        with _lock:
+            _threads[thread_id] = []
+        run_id = _start_run(thread_id, agent_id, thread.messages if thread else None)
+        with _lock:
+            return _thread_run(run_id, dict(_runs[run_id], ready_at=float("inf")))
+
+
+class FakeAsyncProjectClient:
+    """Drop-in for azure.ai.projects.aio.AIProjectClient as used by this app."""
+
+    def __init__(self, **kwargs):
+        self.agents = _FakeAsyncAgentsClient()
+
+    async def close(self):
+        pass
+
+
+class FakeCredential:
+    def get_token(self, *scopes, **kwargs):
+        _settings.api_call()
+        return AccessToken("fake-token", int(time.time()) + 3600)
+
+    def close(self):
+        pass
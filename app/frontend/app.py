@@ -1,5 +1,6 @@
 import sys
 import os
+import json
 import importlib.util
 
 def import_from_path(module_name, file_path):
@@ -10,18 +11,95 @@ def import_from_path(module_name, file_path):
     return module
 
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-Orchestrator = import_from_path('Orchestrator', os.path.join(root, 'app', 'orchestrator.py')).Orchestrator
-ComplianceAgent = import_from_path('ComplianceAgent', os.path.join(root, 'app', 'agents', 'compliance_agent.py')).ComplianceAgent
-HealthAgent = import_from_path('HealthAgent', os.path.join(root, 'app', 'agents', 'health_agent.py')).HealthAgent
-TravelAgent = import_from_path('TravelAgent', os.path.join(root, 'app', 'agents', 'travel_agent.py')).TravelAgent
-AccommodationAgent = import_from_path('AccommodationAgent', os.path.join(root, 'app', 'agents', 'accommodation_agent.py')).AccommodationAgent
-NewsAlertAgent = import_from_path('NewsAlertAgent', os.path.join(root, 'app', 'agents', 'news_alert_agent.py')).NewsAlertAgent
-LanguageGuideAgent = import_from_path('LanguageGuideAgent', os.path.join(root, 'app', 'agents', 'language_guide_agent.py')).LanguageGuideAgent
-EmergencyContactAgent = import_from_path('EmergencyContactAgent', os.path.join(root, 'app', 'agents', 'emergency_contact_agent.py')).EmergencyContactAgent
+if root not in sys.path:
+    sys.path.insert(0, root)
 
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import LIVE_WEATHER_ENABLED
+from app.utils.climate import season_for
+from app.utils.response_cache import ResponseCache, cache_key, ttl_for
+
+# Streamlit re-executes this script on every widget change. Everything that is
+# expensive to build (agent modules, agents, Azure clients, WHO client) lives in
+# st.cache_resource, so it is created once per server process instead.
+
+@st.cache_resource
+def load_agents():
+    """Agent modules, agents and orchestrator, built once and shared by every session."""
+    def load(name, *path):
+        return getattr(import_from_path(name, os.path.join(root, 'app', *path)), name)
+
+    agents = {
+        "compliance": load('ComplianceAgent', 'agents', 'compliance_agent.py')(),
+        "health": load('HealthAgent', 'agents', 'health_agent.py')(),
+        "travel": load('TravelAgent', 'agents', 'travel_agent.py')(),
+        "accommodation": load('AccommodationAgent', 'agents', 'accommodation_agent.py')(),
+        "news_alert": load('NewsAlertAgent', 'agents', 'news_alert_agent.py')(),
+        "language_guide": load('LanguageGuideAgent', 'agents', 'language_guide_agent.py')(),
+        "emergency_contact": load('EmergencyContactAgent', 'agents', 'emergency_contact_agent.py')(),
+    }
+    return agents, load('Orchestrator', 'orchestrator.py')(agents)
+
+@st.cache_resource
+def load_who_api():
+    """WHO client module (its connection pool and response cache survive reruns)."""
+    try:
+        return import_from_path('who_api', os.path.join(root, 'app', 'utils', 'who_api.py'))
+    except Exception:
+        return None
 
+@st.cache_resource
+def load_search_web():
+    try:
+        return import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
+    except Exception:
+        return None
+
+@st.cache_resource
+def weather_executor():
+    """Background thread for the optional live weather line."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="live-weather")
+
+@st.cache_resource
+def result_memo():
+    """Agent answers per (agent, traveler profile), with the agent's search cache TTL."""
+    return ResponseCache(None)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_who_data(indicator_code, filters):
+    return load_who_api().get_who_indicator_data(indicator_code, filters)
+
+def profile_key(agent_type, profile):
+    return cache_key(json.dumps(profile, sort_keys=True, default=str), agent_type)
+
+def remember(agent_type, profile, result):
+    # Failed runs are not memoized so the next click retries them
+    if isinstance(result, str) and not result.startswith(("Error", "Azure AI Agent error")):
+        result_memo().set(profile_key(agent_type, profile), result, ttl_for(type(agents[agent_type]).__name__))
+
+def agent_result(agent_type, profile):
+    """Memoized answer of one agent for this profile."""
+    key = profile_key(agent_type, profile)
+    result = result_memo().get(key)
+    if result is None:
+        result = orchestrator.handle_request(agent_type, **profile)
+        remember(agent_type, profile, result)
+    return result
+
+def show_weather(placeholder, future, wait=False):
+    """Put the live weather in placeholder once it has arrived; True when future is settled."""
+    if not (wait or future.done()):
+        return False
+    try:
+        info = future.result()
+    except Exception:
+        return True  # the season caption stays
+    if isinstance(info, str) and not info.startswith(("Error", "Azure AI Agent error")):
+        placeholder.caption(f"🌤️ Current Weather: {info[:150]}{'...' if len(info) > 150 else ''}")
+    return True
 
-import streamlit as st
 
 st.set_page_config(page_title="Business Traveler Risk Dashboard", layout="centered")
 st.title("Business Traveler Risk Analysis Dashboard")
@@ -29,17 +107,7 @@ st.title("Business Traveler Risk Analysis Dashboard")
 st.write("Enter your travel details to get personalized recommendations and compliance checks.")
 
 
-agents = {
-    "compliance": ComplianceAgent(),
-    "health": HealthAgent(),
-    "travel": TravelAgent(),
-    "accommodation": AccommodationAgent(),
-    "news_alert": NewsAlertAgent(),
-    "language_guide": LanguageGuideAgent(),
-    "emergency_contact": EmergencyContactAgent(),
-}
-
-orchestrator = Orchestrator(agents)
+agents, orchestrator = load_agents()
 
 import datetime
 
@@ -115,11 +183,7 @@ who_indicator_map = {
     "Pregnancy": None,  # No direct indicator
 }
 
-# Import WHO API using custom import function
-try:
-    who_api = import_from_path('who_api', os.path.join(root, 'app', 'utils', 'who_api.py'))
-except:
-    who_api = None
+who_api = load_who_api()
 
 # Gender code mapping for WHO API
 gender_code_map = {
@@ -140,7 +204,7 @@ if who_api and health_conditions in who_indicator_map and who_indicator_map[heal
     if gender_code:
         filters = f"$filter=Dim1 eq '{gender_code}'"
     try:
-        who_data = who_api.get_who_indicator_data(indicator_code, filters)
+        who_data = fetch_who_data(indicator_code, filters)
     except Exception as e:
         who_error = str(e)
 
@@ -176,22 +240,24 @@ st.session_state["nationality"] = nationality
 st.session_state["health_conditions"] = health_conditions
 st.session_state["gender"] = gender
 
-# Determine season from current month (Northern Hemisphere logic) - fallback only
-month = datetime.datetime.now().month
-if month in [12, 1, 2]:
-    season = "winter"
-elif month in [3, 4, 5]:
-    season = "spring"
-elif month in [6, 7, 8]:
-    season = "summer"
-else:
-    season = "autumn"
-
-# Import web search for real-time weather (used when fetching recommendations)
-try:
-    search_web = import_from_path('search_web', os.path.join(root, 'app', 'utils', 'web_search.py')).search_web
-except:
-    search_web = None
+# Season at the destination this month from the bundled climate table (hemisphere, monsoon, wet/dry)
+season = season_for(country, city)
+
+# Web search for the optional live weather line
+search_web = load_search_web() if LIVE_WEATHER_ENABLED else None
+
+# Every agent gets the whole profile (each one picks the fields it uses)
+profile = {
+    "country": country,
+    "city": city,
+    "planned_stay": planned_stay,
+    "nationality": nationality,
+    "gender": gender,
+    "health_conditions": health_conditions,
+    "health_condition": health_conditions,
+    "budget_range": budget_range,
+    "purpose": purpose,
+}
 
 
 # Navigation state (robust initialization)
@@ -209,116 +275,62 @@ if selected_agent and selected_agent in agents:
     if not country:
         st.warning("Please enter a country to view details.")
     else:
-        if selected_agent == "travel":
-            result = agents[selected_agent].process(
-                country=country,
-                city=city,
-                season=season.lower(),
-                planned_stay=planned_stay,
-                nationality=nationality,
-                gender=gender,                      
-                health_condition=health_conditions, 
-                purpose=purpose
-            )
-            st.write(result)
-        elif selected_agent == "health":
-            result = agents[selected_agent].process(
-                country=country, 
-                city=city, 
-                gender=gender, 
-                health_conditions=health_conditions,
-                nationality=nationality,
-                planned_stay=planned_stay
-            )
-            st.write(result)
-        else:
-            result = agents[selected_agent].process(
-                country=country, 
-                city=city, 
-                planned_stay=planned_stay,
-                nationality=nationality,
-                gender=gender,
-                health_conditions=health_conditions,
-                budget_range=budget_range
-            )
-            st.write(result)
+        st.write(agent_result(selected_agent, dict(profile, season=season)))
     if st.button("Back to Dashboard"):
         st.session_state.selected_agent = None
         st.rerun()
 else:
     if st.button("Get Recommendations") and country:
-        # Fetch real-time weather and season for the country
-        weather_info = None
-        season_detected = season  # Fallback to hardcoded season
-        
+        # Live weather is optional and runs next to the agents, never before them
+        weather = None
         if search_web:
-            try:
-                # Get current weather and season
-                weather_query = f"What is the current season and weather in {city+', ' if city else ''}{country} right now in December 2025? Reply with just the season name (summer/winter/spring/autumn) and a brief weather description."
-                weather_info = search_web(weather_query, "critical")
-                
-                # Extract season from weather info (default to fallback if not detected)
-                weather_lower = weather_info.lower()
-                if "summer" in weather_lower:
-                    season_detected = "summer"
-                elif "winter" in weather_lower:
-                    season_detected = "winter"
-                elif "spring" in weather_lower:
-                    season_detected = "spring"
-                elif "autumn" in weather_lower or "fall" in weather_lower:
-                    season_detected = "autumn"
-            except Exception as e:
-                # If weather fetch fails, use fallback season
-                pass
-        
+            weather_query = (
+                f"What is the weather in {city+', ' if city else ''}{country} right now "
+                f"({datetime.date.today():%B %Y})? Reply with a brief weather description."
+            )
+            weather = weather_executor().submit(search_web, weather_query, "critical", agent="LiveWeather")
+
         st.subheader(f"Recommendations for {country}")
         # Show detail level indicator
         detail_mode = "Critical Info Only" if planned_stay < 10 else "Detailed Info"
-        if weather_info:
-            st.caption(f"🌤️ Current Weather & Season: {weather_info[:150]}{'...' if len(weather_info) > 150 else ''}")
-        else:
-            st.caption(f"(Season auto-detected as {season_detected.title()})")
+        st.caption(f"(Season at destination: {season.title()})")
+        weather_line = st.empty()
         st.caption(f"📅 {detail_mode} for {planned_stay} day stay")
         st.markdown("---")
+        # One placeholder per expander, filled as each agent's answer arrives
         cols = st.columns(2)
-        agent_blocks = list(agents.items())
-        for idx, (agent_type, agent) in enumerate(agent_blocks):
+        placeholders = {}
+        for idx, agent_type in enumerate(agents):
             with cols[idx % 2]:
-                block_title = agent_type.replace('_', ' ').title()
-                with st.expander(block_title):
-                    if agent_type == "travel":
-                        result = agent.process(
-                            country=country,
-                            city=city,
-                            season=season_detected,
-                            planned_stay=planned_stay,
-                            nationality=nationality,
-                            gender=gender,                 
-                            health_condition=health_conditions, 
-                            purpose=purpose  
-                        )
-                        st.write(result)
-                    elif agent_type == "health":
-                        result = agent.process(
-                            country=country, 
-                            city=city, 
-                            gender=gender, 
-                            health_conditions=health_conditions,
-                            nationality=nationality,
-                            planned_stay=planned_stay
-                        )
-                        st.write(result)
-                    else:
-                        result = agent.process(
-                            country=country, 
-                            city=city, 
-                            planned_stay=planned_stay,
-                            nationality=nationality,
-                            gender=gender,
-                            health_conditions=health_conditions,
-                            budget_range=budget_range
-                        )
-                        st.write(result)
+                with st.expander(agent_type.replace('_', ' ').title()):
+                    placeholders[agent_type] = st.empty()
+
+        travel_profile = dict(profile, season=season)
+        pending = []
+        for agent_type, placeholder in placeholders.items():
+            cached = result_memo().get(profile_key(agent_type, travel_profile))
+            if cached is not None:
+                placeholder.write(cached)
+            else:
+                placeholder.caption("Waiting for answer...")
+                pending.append(agent_type)
+
+        # All remaining agents run concurrently; answers are streamed into their expanders
+        if pending:
+            partial = {}
+            for event, agent_type, data in orchestrator.stream_all(pending, **travel_profile):
+                if event == "token":
+                    partial[agent_type] = partial.get(agent_type, "") + data
+                    placeholders[agent_type].markdown(partial[agent_type])
+                elif event == "result":
+                    placeholders[agent_type].write(data)
+                    remember(agent_type, travel_profile, data)
+                elif event == "error":
+                    placeholders[agent_type].error(data)
+                if weather is not None and show_weather(weather_line, weather):
+                    weather = None
+        if weather is not None:
+            show_weather(weather_line, weather, wait=True)
     else:
         st.info("Enter a country and click 'Get Recommendations' to see results.")
 
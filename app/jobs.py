@@ -0,0 +1,418 @@
+
+# Durable queue of background assessment jobs
+#
+# POST /api/jobs stores the traveler profile in SQLite and returns a job ID
+# at once; worker.py processes claim queued jobs, run the agents and record
+# each agent's answer as soon as it arrives, so GET /api/jobs/<id> can show
+# per-agent progress. A claimed job carries a lease that its worker renews
+# while it runs. If the worker dies (crash, restart, redeploy) the lease runs
+# out and another worker takes the job over, re-running only the agents that
+# had not answered yet. HTTP workers only read and write rows, so they are
+# never held for the length of an assessment.
+#
+#   python -m app.jobs stats
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# Add parent directory to path for imports
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app.config import (
+    JOB_STORE_PATH,
+    JOB_WORKER_CONCURRENCY,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_MAX_QUEUED,
+    JOB_RETENTION,
+    JOB_POLL_INTERVAL
+)
+from app.orchestrator import ASSESSMENT_AGENTS
+
+logger = logging.getLogger("travel_risk.jobs")
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+# The job is still this worker's current attempt and its lease has not run out
+_HOLDS_LEASE = "id = ? AND worker = ? AND attempts = ? AND status = 'running' AND lease_until > ?"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_agents (
+    job_id TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    finished_at REAL,
+    PRIMARY KEY (job_id, agent)
+);
+"""
+
+
+class QueueFull(Exception):
+    """JOB_MAX_QUEUED jobs are already waiting."""
+
+
+class LeaseLost(Exception):
+    """The worker's lease on a job ran out and the job may belong to another worker now."""
+
+
+class JobStore:
+    def __init__(self, path: str = JOB_STORE_PATH):
+        """
+        Args:
+            path: SQLite file holding the queue (shared by the API and every worker process)
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = None
+        self._db_pid = None
+        self._submitted = 0
+
+    def submit(self, profile: Dict[str, Any], agent_types: Optional[List[str]] = None,
+               timeout: Optional[float] = None, batched: bool = False) -> str:
+        """Queue an assessment of profile and return its job ID; raises QueueFull."""
+        agent_types = list(dict.fromkeys(agent_types or ASSESSMENT_AGENTS))
+        job_id = uuid.uuid4().hex
+        request = {"profile": profile, "agents": agent_types, "timeout": timeout, "batched": batched}
+        now = time.time()
+        with self._transaction() as db:
+            queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= JOB_MAX_QUEUED:
+                raise QueueFull(f"{queued} jobs are already queued")
+            db.execute(
+                "INSERT INTO jobs (id, status, request, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(request), now)
+            )
+            db.executemany(
+                "INSERT INTO job_agents (job_id, agent, position, status) VALUES (?, ?, ?, 'queued')",
+                [(job_id, agent, i) for i, agent in enumerate(agent_types)]
+            )
+            self._submitted += 1
+            # Drop old finished jobs now and then so the file does not grow forever
+            if self._submitted % 100 == 0:
+                self._purge(db, now - JOB_RETENTION)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job state with per-agent progress, or None if unknown."""
+        with self._lock:
+            db = self._connection()
+            job = db.execute(
+                "SELECT status, created_at, started_at, finished_at, attempts, error FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            status, created_at, started_at, finished_at, attempts, error = job
+            agents = db.execute(
+                "SELECT agent, status FROM job_agents WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+            position = None
+            if status == "queued":
+                position = db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (created_at,)
+                ).fetchone()[0]
+
+        finished = sum(1 for _, agent_status in agents if agent_status in ("done", "error"))
+        state = {
+            "job_id": job_id,
+            "status": status,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "attempts": attempts,
+            "progress": {"finished": finished, "total": len(agents), "agents": dict(agents)},
+        }
+        if position is not None:
+            state["queue_position"] = position
+        if error:
+            state["error"] = error
+        return state
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Answers so far in the shape of Orchestrator.handle_all, or None if unknown."""
+        with self._lock:
+            db = self._connection()
+            job = db.execute("SELECT started_at, finished_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = db.execute(
+                "SELECT agent, status, result, error FROM job_agents WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+        started_at, finished_at = job
+        results = {agent: json.loads(result) for agent, status, result, _ in rows if status == "done"}
+        errors = {agent: error for agent, status, _, error in rows if status == "error"}
+        elapsed = round(finished_at - started_at, 3) if started_at and finished_at else None
+        return {"results": results, "errors": errors, "elapsed": elapsed}
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Take the oldest queued job (or one whose worker's lease ran out) for worker."""
+        now = time.time()
+        claimable = "status = 'queued' OR (status = 'running' AND lease_until < ?)"
+        # Idle workers poll with a plain read; only a hit takes the write lock
+        with self._lock:
+            if self._connection().execute(f"SELECT 1 FROM jobs WHERE {claimable} LIMIT 1", (now,)).fetchone() is None:
+                return None
+        with self._transaction() as db:
+            while True:
+                row = db.execute(
+                    f"SELECT id, request, attempts FROM jobs WHERE {claimable} ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    return None
+                job_id, request, attempts = row
+                if attempts >= JOB_MAX_ATTEMPTS:
+                    # Its workers keep dying on it: stop retrying
+                    error = f"Abandoned after {attempts} attempts"
+                    db.execute(
+                        "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                        (now, error, job_id)
+                    )
+                    self._fail_agents(db, job_id, error, now)
+                    continue
+                db.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                    "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    (worker, now + JOB_LEASE_SECONDS, now, job_id)
+                )
+                pending = [
+                    agent for (agent,) in db.execute(
+                        "SELECT agent FROM job_agents WHERE job_id = ? AND status NOT IN ('done', 'error') "
+                        "ORDER BY position", (job_id,)
+                    )
+                ]
+                db.execute(
+                    "UPDATE job_agents SET status = 'running' WHERE job_id = ? AND status NOT IN ('done', 'error')",
+                    (job_id,)
+                )
+                return {"id": job_id, "request": json.loads(request), "attempt": attempts + 1, "pending": pending}
+
+    def renew(self, job_ids: List[str], worker: str) -> None:
+        """Extend the leases of worker's running jobs."""
+        if not job_ids:
+            return
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                [(time.time() + JOB_LEASE_SECONDS, job_id, worker) for job_id in job_ids]
+            )
+
+    def record(self, job: Dict[str, Any], worker: str, agent: str, result: Any = None,
+               error: Optional[str] = None) -> None:
+        """Store one agent's answer (or error) of a claimed job as soon as it arrives; raises LeaseLost."""
+        now = time.time()
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE job_agents SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ? AND agent = ? "
+                f"AND EXISTS (SELECT 1 FROM jobs WHERE {_HOLDS_LEASE})",
+                (
+                    "error" if error is not None else "done",
+                    json.dumps(result) if error is None else None,
+                    error,
+                    now,
+                    job["id"],
+                    agent,
+                    job["id"],
+                    worker,
+                    job["attempt"],
+                    now,
+                )
+            ).rowcount
+        if not updated:
+            raise LeaseLost(f"Lost the lease on job {job['id']}")
+
+    def finish(self, job: Dict[str, Any], worker: str, error: Optional[str] = None) -> None:
+        """Mark a claimed job done, or failed with error; raises LeaseLost."""
+        now = time.time()
+        with self._transaction() as db:
+            updated = db.execute(
+                f"UPDATE jobs SET status = ?, finished_at = ?, error = ?, lease_until = NULL WHERE {_HOLDS_LEASE}",
+                ("failed" if error else "done", now, error, job["id"], worker, job["attempt"], now)
+            ).rowcount
+            if updated and error:
+                self._fail_agents(db, job["id"], error, now)
+        if not updated:
+            raise LeaseLost(f"Lost the lease on job {job['id']}")
+
+    def counts(self) -> Dict[str, int]:
+        """Jobs per status."""
+        with self._lock:
+            rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(dict.fromkeys(JOB_STATUSES, 0), **dict(rows))
+
+    @staticmethod
+    def _fail_agents(db, job_id, error, now):
+        """Give the agents of a failed job that never answered its error, so none is left 'running'."""
+        db.execute(
+            "UPDATE job_agents SET status = 'error', error = ?, finished_at = ? "
+            "WHERE job_id = ? AND status NOT IN ('done', 'error')",
+            (error, now, job_id)
+        )
+
+    def _purge(self, db, before):
+        db.execute(
+            "DELETE FROM job_agents WHERE job_id IN "
+            "(SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?)", (before,)
+        )
+        db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (before,))
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two processes can never claim the same job
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _connection(self):
+        """SQLite connection for this process (reopened after a fork)."""
+        if self._db is None or self._db_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db, self._db_pid = db, os.getpid()
+        return self._db
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Process-wide job store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
+
+
+def process_job(orchestrator, store: JobStore, job: Dict[str, Any], worker: str) -> None:
+    """
+    Run the agents a job still needs, recording each answer as it arrives.
+
+    Stops as soon as the lease turns out to be lost: the job is another
+    worker's by then, and its answers must not be overwritten.
+    """
+    request = job["request"]
+    try:
+        if job["pending"]:
+            if request.get("batched"):
+                assessment = orchestrator.handle_all(
+                    job["pending"], timeout=request.get("timeout"), batched=True, **request["profile"]
+                )
+                for agent_type, result in assessment["results"].items():
+                    store.record(job, worker, agent_type, result=result)
+                for agent_type, error in assessment["errors"].items():
+                    store.record(job, worker, agent_type, error=error)
+            else:
+                events = orchestrator.stream_all(job["pending"], timeout=request.get("timeout"), **request["profile"])
+                try:
+                    for event, agent_type, data in events:
+                        if event == "result":
+                            store.record(job, worker, agent_type, result=data)
+                        elif event == "error":
+                            store.record(job, worker, agent_type, error=data)
+                finally:
+                    # Cancels the Azure runs of agents still going when the lease was lost
+                    events.close()
+        store.finish(job, worker)
+    except LeaseLost as e:
+        logger.warning("%s; stopped working on it", e)
+    except Exception as e:
+        logger.warning("job %s failed: %s", job["id"], e)
+        try:
+            store.finish(job, worker, error=str(e))
+        except LeaseLost:
+            pass
+
+
+def run_worker(orchestrator, concurrency: int = JOB_WORKER_CONCURRENCY, stop: Optional[threading.Event] = None) -> None:
+    """
+    Claim and run jobs until stop is set, then finish the jobs in hand.
+
+    Args:
+        orchestrator: Orchestrator with the assessment agents registered
+        concurrency: Jobs this process runs at the same time
+        stop: Event (threading or multiprocessing) that ends the loop
+    """
+    store = get_job_store()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or threading.Event()
+    running = {}  # future -> job ID
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def heartbeat():
+        while not done.wait(JOB_LEASE_SECONDS / 3):
+            with lock:
+                job_ids = list(running.values())
+            try:
+                store.renew(job_ids, worker)
+            except sqlite3.Error as e:
+                logger.warning("lease renewal failed: %s", e)
+
+    threading.Thread(target=heartbeat, name="job-heartbeat", daemon=True).start()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+    try:
+        while not stop.is_set():
+            with lock:
+                for future in [f for f in running if f.done()]:
+                    del running[future]
+                free = len(running) < concurrency
+            job = store.claim(worker) if free else None
+            if job is None:
+                stop.wait(JOB_POLL_INTERVAL)
+                continue
+            with lock:
+                running[executor.submit(process_job, orchestrator, store, job, worker)] = job["id"]
+        # Drain: jobs already claimed run to the end (the heartbeat keeps their leases)
+        wait(list(running))
+    finally:
+        done.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        print(get_job_store().counts())
+    else:
+        print("usage: python -m app.jobs stats")
+        sys.exit(2)
@@ -1,5 +1,46 @@
+
 # Orchestrator for dynamic agent invocation
 
+import asyncio
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
+from pathlib import Path
+
+# Add parent directory to path for imports (the dashboard loads this file by path)
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app import deadlines
+from app.config import ASSESSMENT_MAX_WORKERS, AGENT_TIMEOUT
+from app.telemetry import AGENT_LATENCY, AGENT_ERRORS, AGENT_IN_FLIGHT, span
+
+# Agents that make up a full trip assessment, in dashboard order
+ASSESSMENT_AGENTS = (
+    "compliance",
+    "health",
+    "travel",
+    "accommodation",
+    "news_alert",
+    "language_guide",
+    "emergency_contact",
+)
+
+
+def _agent_kwargs(kwargs):
+    """Agents disagree on health_condition vs health_conditions, so pass both."""
+    kwargs = dict(kwargs)
+    if kwargs.get("health_conditions") and not kwargs.get("health_condition"):
+        kwargs["health_condition"] = kwargs["health_conditions"]
+    elif kwargs.get("health_condition") and not kwargs.get("health_conditions"):
+        kwargs["health_conditions"] = kwargs["health_condition"]
+    return kwargs
+
+
 class Orchestrator:
     def __init__(self, agents):
         self.agents = agents
@@ -8,9 +49,348 @@ class Orchestrator:
         """Dynamically invoke the relevant agent(s) based on request_type."""
         agent = self.agents.get(request_type)
         if agent:
-            # Special case for currency_agent: pass the whole payload as a dict
-            if request_type == "currency_agent":
-                return agent.process(kwargs)
-            return agent.process(**kwargs)
+            with self._instrument(request_type):
+                # Special case for currency_agent: pass the whole payload as a dict
+                if request_type == "currency_agent":
+                    return agent.process(kwargs)
+                return agent.process(**kwargs)
         else:
-            return f"No agent found for request type: {request_type}"
\ No newline at end of file
+            return f"No agent found for request type: {request_type}"
+
+    async def handle_request_async(self, request_type, **kwargs):
+        """Async variant of handle_request; agents without process_async run in a worker thread."""
+        agent = self.agents.get(request_type)
+        if not agent:
+            return f"No agent found for request type: {request_type}"
+        with self._instrument(request_type):
+            if request_type == "currency_agent":
+                return await asyncio.to_thread(agent.process, kwargs)
+            if hasattr(agent, "process_async"):
+                return await agent.process_async(**kwargs)
+            return await asyncio.to_thread(agent.process, **kwargs)
+
+    @staticmethod
+    @contextmanager
+    def _instrument(agent_type):
+        """Latency histogram, error counter, in-flight gauge and span for one agent call."""
+        in_flight = AGENT_IN_FLIGHT.labels(agent_type)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            with span("orchestrator.handle_request", agent_type=agent_type):
+                yield
+        except Exception:
+            AGENT_ERRORS.labels(agent_type).inc()
+            raise
+        finally:
+            in_flight.dec()
+            AGENT_LATENCY.labels(agent_type).observe(time.perf_counter() - start)
+
+    def handle_all(self, agent_types=None, max_workers=None, timeout=None, batched=False, **kwargs):
+        """
+        Invoke several agents concurrently for one traveler profile.
+
+        Args:
+            agent_types: Agents to run (defaults to ASSESSMENT_AGENTS)
+            max_workers: Upper bound on agents running at the same time
+            timeout: Seconds each agent may run before it is reported as timed out
+            batched: Ask for every agent's answer in one combined LLM run
+                     (see app/prompt_batching.py); agents whose section cannot
+                     be parsed from the reply are run individually
+
+        Returns:
+            dict with "results" (agent -> output) for agents that finished,
+            "errors" (agent -> message) for agents that failed or timed out,
+            and "elapsed" wall-clock seconds. Slow agents never block the others,
+            and the Azure runs of an agent that timed out are cancelled.
+            Batched calls also list the agents answered by the combined run in "batched".
+        """
+        if batched:
+            return self._handle_batched(agent_types, max_workers, timeout, **kwargs)
+        agent_types = list(dict.fromkeys(agent_types or ASSESSMENT_AGENTS))
+        max_workers = max_workers or ASSESSMENT_MAX_WORKERS
+        timeout = timeout or AGENT_TIMEOUT
+        kwargs = _agent_kwargs(kwargs)
+
+        results, errors = {}, {}
+        unknown = [a for a in agent_types if a not in self.agents]
+        for agent_type in unknown:
+            errors[agent_type] = f"No agent found for request type: {agent_type}"
+        agent_types = [a for a in agent_types if a not in unknown]
+        if not agent_types:
+            return {"results": results, "errors": errors, "elapsed": 0.0}
+
+        started_at = time.monotonic()
+        starts = {}
+        scopes = {}
+        workers = min(max_workers, len(agent_types))
+        # Agents still queued once every wave could have run are given up on too,
+        # otherwise a pool full of hung agents would keep the caller waiting forever.
+        waves = -(-len(agent_types) // workers)
+        deadline = started_at + timeout * waves
+
+        def run(agent_type):
+            with deadlines.scope(timeout) as scope:
+                scopes[agent_type] = scope
+                starts[agent_type] = time.monotonic()
+                return self.handle_request(agent_type, **kwargs)
+
+        # A fresh pool per call: an agent that hangs past its timeout keeps its
+        # thread, but it can never starve later assessments.
+        executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="assessment",
+        )
+        try:
+            pending = {deadlines.submit(executor, run, agent_type): agent_type for agent_type in agent_types}
+            while pending:
+                wait_for = min(self._next_expiry(pending.values(), starts, timeout), max(0.0, deadline - time.monotonic()))
+                done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    agent_type = pending.pop(future)
+                    try:
+                        results[agent_type] = future.result()
+                    except Exception as e:
+                        errors[agent_type] = str(e)
+                now = time.monotonic()
+                for future, agent_type in list(pending.items()):
+                    start = starts.get(agent_type)
+                    if start is not None and now - start >= timeout:
+                        del pending[future]
+                        errors[agent_type] = f"Timed out after {timeout:g}s"
+                    elif start is None and now >= deadline:
+                        del pending[future]
+                        errors[agent_type] = "Timed out waiting for a free worker"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            # Stop the Azure runs of agents we gave up on
+            for scope in scopes.values():
+                scope.cancel()
+
+        return {"results": results, "errors": errors, "elapsed": round(time.monotonic() - started_at, 3)}
+
+    def _handle_batched(self, agent_types, max_workers, timeout, **kwargs):
+        """handle_all with one combined prompt and a per-agent fallback."""
+        from app.prompt_batching import BATCH_AGENT_NAME, build_sections, build_prompt, parse_response
+        from app.utils.web_search import search_web
+
+        agent_types = list(dict.fromkeys(agent_types or ASSESSMENT_AGENTS))
+        timeout = timeout or AGENT_TIMEOUT
+        kwargs = _agent_kwargs(kwargs)
+        started_at = time.monotonic()
+
+        sections, ttl = build_sections(self.agents, agent_types, kwargs) if kwargs.get("country") else ({}, None)
+        if len(sections) < 2:
+            # Nothing to combine: plain fan-out
+            return dict(self.handle_all(agent_types, max_workers, timeout, **kwargs), batched=[])
+
+        results, errors = {}, {}
+        budget = deadlines.Deadline(timeout, parent=deadlines.current())
+
+        def complete(answer):
+            # Only a reply that answers every section is cached
+            return len(parse_response(answer, sections)) == len(sections)
+
+        def run():
+            with deadlines.use(budget):
+                return search_web(build_prompt(sections), "detailed", agent=BATCH_AGENT_NAME, ttl=ttl, validate=complete)
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assessment-batched")
+        try:
+            future = executor.submit(run)
+            try:
+                results.update(parse_response(future.result(timeout=timeout), sections))
+            except FutureTimeoutError:
+                for agent_type in sections:
+                    errors[agent_type] = f"Timed out after {timeout:g}s"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            budget.cancel()
+        batched = sorted(results)
+
+        # Agents left out of the prompt or missing from the reply run on their own
+        fallback = [a for a in agent_types if a not in results and a not in errors]
+        if fallback:
+            remaining = self.handle_all(fallback, max_workers, timeout, **kwargs)
+            results.update(remaining["results"])
+            errors.update(remaining["errors"])
+
+        return {
+            "results": results,
+            "errors": errors,
+            "elapsed": round(time.monotonic() - started_at, 3),
+            "batched": batched,
+        }
+
+    def stream_all(self, agent_types=None, max_workers=None, timeout=None, **kwargs):
+        """
+        Streaming variant of handle_all: a generator of (event, agent_type, data).
+
+        Events are "token" (a chunk of an agent's answer as the model writes it),
+        "result" (an agent's full answer), "error" (failure or timeout) and a
+        final "done" whose data is {"elapsed": seconds}. Agents without
+        process_stream only emit their result. Closing the generator (e.g.
+        the client disconnected) cancels the agents' Azure runs.
+        """
+        agent_types = list(dict.fromkeys(agent_types or ASSESSMENT_AGENTS))
+        max_workers = max_workers or ASSESSMENT_MAX_WORKERS
+        timeout = timeout or AGENT_TIMEOUT
+        kwargs = _agent_kwargs(kwargs)
+        started_at = time.monotonic()
+
+        for agent_type in agent_types:
+            if agent_type not in self.agents:
+                yield "error", agent_type, f"No agent found for request type: {agent_type}"
+        remaining = {a for a in agent_types if a in self.agents}
+        if not remaining:
+            yield "done", None, {"elapsed": 0.0}
+            return
+
+        events = queue.Queue()
+        closed = threading.Event()
+        starts = {}
+        scopes = {}
+        workers = min(max_workers, len(remaining))
+        deadline = started_at + timeout * -(-len(remaining) // workers)
+
+        def run(agent_type):
+            with deadlines.scope(timeout) as scope:
+                scopes[agent_type] = scope
+                stream_agent(agent_type)
+
+        def stream_agent(agent_type):
+            starts[agent_type] = time.monotonic()
+            agent = self.agents[agent_type]
+            try:
+                if hasattr(agent, "process_stream"):
+                    chunks = []
+                    with self._instrument(agent_type):
+                        stream = agent.process_stream(**kwargs)
+                        try:
+                            for chunk in stream:
+                                if closed.is_set():
+                                    return
+                                chunks.append(chunk)
+                                events.put(("token", agent_type, chunk))
+                        finally:
+                            stream.close()
+                    result = "".join(chunks)
+                else:
+                    result = self.handle_request(agent_type, **kwargs)
+                events.put(("result", agent_type, result))
+            except Exception as e:
+                events.put(("error", agent_type, str(e)))
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assessment-stream")
+        try:
+            for agent_type in agent_types:
+                if agent_type in remaining:
+                    deadlines.submit(executor, run, agent_type)
+            while remaining:
+                wait_for = min(self._next_expiry(remaining, starts, timeout), max(0.0, deadline - time.monotonic()))
+                try:
+                    event, agent_type, data = events.get(timeout=wait_for)
+                    if agent_type in remaining:
+                        if event != "token":
+                            remaining.discard(agent_type)
+                        yield event, agent_type, data
+                except queue.Empty:
+                    pass
+                now = time.monotonic()
+                for agent_type in list(remaining):
+                    start = starts.get(agent_type)
+                    if start is not None and now - start >= timeout:
+                        remaining.discard(agent_type)
+                        scopes[agent_type].cancel()
+                        yield "error", agent_type, f"Timed out after {timeout:g}s"
+                    elif start is None and now >= deadline:
+                        remaining.discard(agent_type)
+                        yield "error", agent_type, "Timed out waiting for a free worker"
+            yield "done", None, {"elapsed": round(time.monotonic() - started_at, 3)}
+        finally:
+            closed.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            for scope in list(scopes.values()):
+                scope.cancel()
+
+    @staticmethod
+    def _next_expiry(running, starts, timeout):
+        """Seconds until the earliest running agent hits its timeout."""
+        now = time.monotonic()
+        expiries = [starts[a] + timeout - now for a in running if a in starts]
+        return max(0.0, min(expiries)) if expiries else timeout
+
+    async def handle_all_async(self, agent_types=None, max_workers=None, timeout=None, batched=False, **kwargs):
+        """Async variant of handle_all with the same arguments and result shape."""
+        if batched:
+            return await self._handle_batched_async(agent_types, max_workers, timeout, **kwargs)
+        agent_types = list(agent_types or ASSESSMENT_AGENTS)
+        max_workers = max_workers or ASSESSMENT_MAX_WORKERS
+        timeout = timeout or AGENT_TIMEOUT
+        kwargs = _agent_kwargs(kwargs)
+
+        results, errors = {}, {}
+        started_at = time.monotonic()
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def run(agent_type):
+            if agent_type not in self.agents:
+                errors[agent_type] = f"No agent found for request type: {agent_type}"
+                return
+            async with semaphore:
+                try:
+                    # wait_for cancels the agent's task on timeout, which cancels its Azure runs
+                    with deadlines.scope(timeout):
+                        results[agent_type] = await asyncio.wait_for(
+                            self.handle_request_async(agent_type, **kwargs), timeout
+                        )
+                except asyncio.TimeoutError:
+                    errors[agent_type] = f"Timed out after {timeout:g}s"
+                except Exception as e:
+                    errors[agent_type] = str(e)
+
+        await asyncio.gather(*(run(agent_type) for agent_type in dict.fromkeys(agent_types)))
+        return {"results": results, "errors": errors, "elapsed": round(time.monotonic() - started_at, 3)}
+
+    async def _handle_batched_async(self, agent_types, max_workers, timeout, **kwargs):
+        """Async variant of _handle_batched."""
+        from app.prompt_batching import BATCH_AGENT_NAME, build_sections, build_prompt, parse_response
+        from app.utils.web_search import search_web_async
+
+        agent_types = list(dict.fromkeys(agent_types or ASSESSMENT_AGENTS))
+        timeout = timeout or AGENT_TIMEOUT
+        kwargs = _agent_kwargs(kwargs)
+        started_at = time.monotonic()
+
+        sections, ttl = build_sections(self.agents, agent_types, kwargs) if kwargs.get("country") else ({}, None)
+        if len(sections) < 2:
+            return dict(await self.handle_all_async(agent_types, max_workers, timeout, **kwargs), batched=[])
+
+        results, errors = {}, {}
+
+        def complete(answer):
+            return len(parse_response(answer, sections)) == len(sections)
+
+        try:
+            answer = await asyncio.wait_for(
+                search_web_async(build_prompt(sections), "detailed", agent=BATCH_AGENT_NAME, ttl=ttl, validate=complete),
+                timeout,
+            )
+            results.update(parse_response(answer, sections))
+        except asyncio.TimeoutError:
+            for agent_type in sections:
+                errors[agent_type] = f"Timed out after {timeout:g}s"
+        batched = sorted(results)
+
+        fallback = [a for a in agent_types if a not in results and a not in errors]
+        if fallback:
+            remaining = await self.handle_all_async(fallback, max_workers, timeout, **kwargs)
+            results.update(remaining["results"])
+            errors.update(remaining["errors"])
+
+        return {
+            "results": results,
+            "errors": errors,
+            "elapsed": round(time.monotonic() - started_at, 3),
+            "batched": batched,
+        }
@@ -0,0 +1,98 @@
+
+# Multi-agent prompt batching
+#
+# Instead of one Azure run per agent, every requested agent's query goes into
+# a single prompt with one named section per agent, and the model is asked to
+# answer with a JSON object keyed by agent type. Sections that are missing or
+# malformed in the reply are handed back to the caller to run per agent.
+
+import json
+import logging
+import re
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+# Add parent directory to path for imports
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app.utils.response_cache import ttl_for
+
+logger = logging.getLogger("travel_risk.prompt_batching")
+
+# Cache name of batched answers (their TTL is the shortest of the agents inside)
+BATCH_AGENT_NAME = "BatchedAssessment"
+
+DETAIL_INSTRUCTIONS = {
+    "critical": "Only the most critical, must-know facts. Be concise.",
+    "detailed": "Detailed, comprehensive, up-to-date information with recommendations.",
+}
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def build_sections(agents, agent_types, kwargs):
+    """
+    Queries of every agent that can be batched.
+
+    Returns:
+        (sections, ttl): OrderedDict agent_type -> (query, detail_level), and
+        the cache lifetime of the combined answer. Agents without build_query,
+        or whose query cannot be built from this profile, are left out.
+    """
+    sections = OrderedDict()
+    ttls = []
+    for agent_type in agent_types:
+        agent = agents.get(agent_type)
+        if agent is None or not hasattr(agent, "build_query"):
+            continue
+        try:
+            sections[agent_type] = agent.build_query(**kwargs)
+        except Exception as e:
+            logger.warning("%s not batched: %s", agent_type, e)
+            continue
+        ttls.append(ttl_for(type(agent).__name__))
+    return sections, min(ttls) if ttls else None
+
+
+def build_prompt(sections):
+    """One prompt asking for a JSON object with an answer per section."""
+    keys = ", ".join(f'"{agent_type}"' for agent_type in sections)
+    parts = [
+        "Answer every section below for the same business traveler. "
+        f"Respond with ONLY a JSON object with exactly these keys: {keys}. "
+        "Each value must be a string holding that section's full answer (Markdown allowed). "
+        "Do not add any text outside the JSON object."
+    ]
+    for agent_type, (query, detail_level) in sections.items():
+        instruction = DETAIL_INSTRUCTIONS.get(detail_level, DETAIL_INSTRUCTIONS["detailed"])
+        parts.append(f"### {agent_type}\n{instruction}\n{query}")
+    return "\n\n".join(parts)
+
+
+def parse_response(text, agent_types):
+    """
+    Split a batched reply into per-agent answers.
+
+    Returns only the sections that came back as non-empty strings; anything
+    else (invalid JSON, missing keys, wrong types) is left for the fallback.
+    """
+    if not text:
+        return {}
+    text = _FENCE.sub("", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        agent_type: data[agent_type].strip()
+        for agent_type in agent_types
+        if isinstance(data.get(agent_type), str) and data[agent_type].strip()
+    }
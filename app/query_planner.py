@@ -0,0 +1,119 @@
+
+# Query planner: splits an agent's prompt into independently cacheable sub-queries
+#
+# Destination-wide facts (strikes, weather, ambulance and police numbers) used
+# to be baked into the same prompt as traveler details such as gender or
+# health condition, so no two travelers ever shared an answer. An agent now
+# returns a plan: destination-scoped sub-queries whose text depends only on
+# the destination (shared by every traveler going there through the search
+# cache and single-flight), plus small traveler-scoped deltas. Sub-queries of
+# one plan run concurrently and their answers are joined under short headings.
+
+import asyncio
+import queue
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path for imports
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app import deadlines
+from app.config import PLANNER_MAX_WORKERS
+
+DESTINATION = "destination"
+TRAVELER = "traveler"
+
+# text: the prompt, scope: DESTINATION or TRAVELER, title: heading in the combined answer
+SubQuery = namedtuple("SubQuery", ["text", "detail_level", "scope", "title"])
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PLANNER_MAX_WORKERS, thread_name_prefix="planner")
+        return _executor
+
+
+def combine(plan):
+    """Single (query, detail_level) equivalent of a plan, for callers that need one prompt."""
+    detail_level = "detailed" if any(sq.detail_level == "detailed" for sq in plan) else "critical"
+    return " | ".join(sq.text for sq in plan), detail_level
+
+
+def format_answers(plan, answers):
+    """Join sub-query answers into one report, in plan order."""
+    if len(plan) == 1:
+        return answers[0]
+    return "\n\n".join(f"**{sq.title}**\n\n{answer}" for sq, answer in zip(plan, answers))
+
+
+def execute_plan(plan, search, agent=None):
+    """
+    Run every sub-query of plan with search(query, detail_level, agent=...) concurrently.
+
+    Identical sub-queries from other travelers, in flight or cached, are shared
+    by search_web itself.
+    """
+    if len(plan) == 1:
+        return search(plan[0].text, plan[0].detail_level, agent=agent)
+    futures = [deadlines.submit(_get_executor(), search, sq.text, sq.detail_level, agent=agent) for sq in plan]
+    return format_answers(plan, [future.result() for future in futures])
+
+
+async def execute_plan_async(plan, search_async, agent=None):
+    """Async variant of execute_plan."""
+    answers = await asyncio.gather(*(search_async(sq.text, sq.detail_level, agent=agent) for sq in plan))
+    return format_answers(plan, list(answers))
+
+
+def _pump(stream, chunks, stop):
+    """Read stream into the chunks queue (None marks the end) until stop is set."""
+    try:
+        for chunk in stream:
+            if stop.is_set():
+                break
+            chunks.put(chunk)
+    finally:
+        stream.close()
+        chunks.put(None)
+
+
+def stream_plan(plan, search, search_stream, agent=None):
+    """
+    Streaming variant of execute_plan. The first traveler-scoped sub-query is
+    streamed as the model writes it; every other sub-query is started up
+    front with search. Everything runs at once, so the whole plan takes about
+    one run while its sections are still yielded in plan order. Destination-
+    scoped answers are shared, so they are usually cache hits anyway.
+    """
+    streamed = next((i for i, sq in enumerate(plan) if sq.scope == TRAVELER), None)
+    prefetched = {
+        i: deadlines.submit(_get_executor(), search, sq.text, sq.detail_level, agent=agent)
+        for i, sq in enumerate(plan) if i != streamed
+    }
+    chunks, stop = queue.Queue(), threading.Event()
+    if streamed is not None:
+        sq = plan[streamed]
+        # Buffered in the background while earlier sections are being waited for
+        deadlines.submit(_get_executor(), _pump, search_stream(sq.text, sq.detail_level, agent=agent), chunks, stop)
+    try:
+        for i, sq in enumerate(plan):
+            if len(plan) > 1:
+                yield ("\n\n" if i else "") + f"**{sq.title}**\n\n"
+            if i in prefetched:
+                yield prefetched[i].result()
+            else:
+                yield from iter(chunks.get, None)
+    finally:
+        stop.set()
+        for future in prefetched.values():
+            future.cancel()
@@ -0,0 +1,61 @@
+# Background warm-up behind the /api/ready probe
+# Importing the backend no longer talks to Azure, so the first real request
+# would pay for the AAD token, TLS handshake and agent lookup. The probe warms
+# those in a background thread and reports ready once they are done.
+
+import threading
+import time
+
+from app import clients
+
+# Registry names of the agents on the request path (the currency agent's LLM
+# fallback is rarely needed since currencies come from a bundled table)
+WARM_AGENTS = ("TravelSearchAgent",)
+TOKEN_SCOPE = "https://ai.azure.com/.default"
+
+_lock = threading.Lock()
+_state = {"status": "cold", "steps": {}, "error": None}
+
+
+def start_warmup():
+    """Kick off the warm-up once (again if the previous attempt failed)."""
+    with _lock:
+        if _state["status"] in ("warming", "ready", "draining"):
+            return
+        _state.update(status="warming", steps={}, error=None)
+    threading.Thread(target=_warm, name="warmup", daemon=True).start()
+
+
+def start_drain():
+    """Shutting down: report not ready so load balancers stop sending requests."""
+    with _lock:
+        _state["status"] = "draining"
+
+
+def readiness():
+    """Current warm-up state: cold, warming, ready, failed or draining, with step timings in ms."""
+    with _lock:
+        return {"status": _state["status"], "steps": dict(_state["steps"]), "error": _state["error"]}
+
+
+def _step(name, fn):
+    start = time.perf_counter()
+    fn()
+    with _lock:
+        _state["steps"][name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def _warm():
+    try:
+        # One token fetch fills the shared credential's cache and opens the pool
+        _step("credential", lambda: clients.get_credential().get_token(TOKEN_SCOPE))
+        for agent_name in WARM_AGENTS:
+            _step(f"agent:{agent_name}", lambda name=agent_name: clients.get_agent(name).agent)
+        _step("threads", lambda: clients.get_thread_manager().prewarm())
+        with _lock:
+            if _state["status"] == "warming":
+                _state["status"] = "ready"
+    except Exception as e:
+        with _lock:
+            if _state["status"] == "warming":
+                _state.update(status="failed", error=str(e))
@@ -0,0 +1,286 @@
+
+# Priority scheduler for outbound LLM calls
+#
+# Every Azure run goes through one process-wide scheduler before it is
+# created. Two token buckets cap requests and (estimated) tokens per minute
+# below the deployment's quota, so bursts queue here instead of coming back
+# as 429s. Waiting calls are admitted by priority class (LLM_PRIORITIES, e.g.
+# emergency numbers before language tips), and within a class by fair
+# queuing across calling agents, so one agent's burst of sub-queries cannot
+# starve another's single query. A 429 from Azure pauses all admissions for
+# its Retry-After instead of every caller retrying on its own.
+
+import asyncio
+import itertools
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app.config import (
+    LLM_RPM,
+    LLM_TPM,
+    LLM_COMPLETION_TOKENS,
+    LLM_PRIORITIES,
+    LLM_DEFAULT_PRIORITY,
+    LLM_PRIORITY_AGING,
+    LLM_THROTTLE_DEFAULT_WAIT
+)
+from app.telemetry import LLM_QUEUE_WAIT, LLM_THROTTLES
+
+# Priority classes, most urgent first
+PRIORITY_CLASSES = ("critical", "high", "normal", "low")
+
+# Longest single sleep of an async waiter before it re-checks the queue
+_ASYNC_POLL = 0.05
+# Waiters behind someone else re-check this often (aging can reorder the queue)
+_RECHECK = 0.5
+
+_RETRY_AFTER = re.compile(r"(?:try again|retry) in (\d+(?:\.\d+)?) ?(ms|milliseconds|s|sec|seconds)?", re.IGNORECASE)
+
+
+class RateLimited(Exception):
+    """Azure refused a run for exceeding the rate limit (HTTP 429 or run error rate_limit_exceeded)."""
+
+    def __init__(self, retry_after=None, message="Rate limit exceeded"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_from(error):
+    """Seconds to wait from a 429 response's headers or a "Try again in N seconds" message, else None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("x-ms-retry-after-ms", 0.001), ("retry-after", 1)):
+        value = next((v for k, v in headers.items() if k.lower() == name), None)
+        if value is not None:
+            try:
+                return float(value) * scale
+            except ValueError:
+                pass  # HTTP-date form: fall back to the message
+    match = _RETRY_AFTER.search(str(getattr(error, "message", None) or error))
+    if match:
+        value = float(match.group(1))
+        return value / 1000 if (match.group(2) or "").lower().startswith("m") else value
+    return None
+
+
+def estimate_tokens(prompt):
+    """Tokens a run will count against TPM: ~4 characters per prompt token plus the expected completion."""
+    return len(prompt) // 4 + LLM_COMPLETION_TOKENS
+
+
+class TokenBucket:
+    """Refills at per_minute / 60 per second up to capacity (a 10-second burst by default, like Azure's windows)."""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or max(1.0, per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount can be taken (0 if it can be now)."""
+        self._refill(now)
+        # A request bigger than the whole bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Ticket:
+    __slots__ = ("caller", "priority", "tokens", "tag", "seq", "enqueued")
+
+    def __init__(self, caller, priority, tokens, tag, seq):
+        self.caller = caller
+        self.priority = priority
+        self.tokens = tokens
+        self.tag = tag
+        self.seq = seq
+        self.enqueued = time.monotonic()
+
+    def rank(self, now):
+        # Aging lifts a waiting call one class per LLM_PRIORITY_AGING seconds so low priority is deferred, not starved
+        boost = int((now - self.enqueued) // LLM_PRIORITY_AGING) if LLM_PRIORITY_AGING > 0 else 0
+        return (max(0, self.priority - boost), self.tag, self.seq)
+
+
+class LLMScheduler:
+    """
+    Admits LLM calls in priority order within RPM/TPM budgets.
+
+    acquire() blocks until the call may start; it holds nothing afterwards,
+    since the buckets limit the start rate, not concurrency.
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM):
+        self.rpm, self.tpm = rpm, tpm
+        self._cond = threading.Condition()
+        self._requests = TokenBucket(rpm) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._waiting = []
+        self._seq = itertools.count()
+        # Start-time fair queuing: each caller's next tag continues from its last one
+        self._virtual_time = 0.0
+        self._finish = {}
+        self._paused_until = 0.0
+        self.counters = {"admitted": 0, "throttled": 0, "wait_seconds": 0.0}
+        self._admitted_by_class = dict.fromkeys(PRIORITY_CLASSES, 0)
+
+    @staticmethod
+    def priority_of(caller):
+        name = LLM_PRIORITIES.get(caller, LLM_DEFAULT_PRIORITY)
+        return PRIORITY_CLASSES.index(name) if name in PRIORITY_CLASSES else PRIORITY_CLASSES.index("normal")
+
+    def _enqueue(self, caller, tokens):
+        with self._cond:
+            start = max(self._virtual_time, self._finish.get(caller, 0.0))
+            self._finish[caller] = start + tokens
+            ticket = _Ticket(caller, self.priority_of(caller), tokens, start, next(self._seq))
+            self._waiting.append(ticket)
+            return ticket
+
+    def _try_admit(self, ticket):
+        """Admit ticket if it is first in line and the budgets allow; else seconds to wait. Caller holds the lock."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        head = min(self._waiting, key=lambda t: t.rank(now))
+        if head is not ticket:
+            return _RECHECK
+        wait = max(
+            self._requests.wait_time(1, now) if self._requests else 0.0,
+            self._tokens.wait_time(ticket.tokens, now) if self._tokens else 0.0
+        )
+        if wait > 0:
+            return wait
+        if self._requests:
+            self._requests.take(1)
+        if self._tokens:
+            self._tokens.take(ticket.tokens)
+        self._waiting.remove(ticket)
+        self._virtual_time = max(self._virtual_time, ticket.tag)
+        waited = now - ticket.enqueued
+        self.counters["admitted"] += 1
+        self.counters["wait_seconds"] += waited
+        self._admitted_by_class[PRIORITY_CLASSES[ticket.priority]] += 1
+        LLM_QUEUE_WAIT.labels(PRIORITY_CLASSES[ticket.priority]).observe(waited)
+        self._cond.notify_all()
+        return 0.0
+
+    def _abandon(self, ticket):
+        with self._cond:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+
+    def acquire(self, caller, prompt, deadline=None):
+        """
+        Block until a call from caller (an agent class name) with this prompt
+        may start. Raises DeadlineExceeded if deadline (app.deadlines) passes
+        or is cancelled while waiting.
+        """
+        ticket = self._enqueue(caller, estimate_tokens(prompt))
+        try:
+            with self._cond:
+                while True:
+                    wait = self._try_admit(ticket)
+                    if wait == 0.0:
+                        return
+                    if deadline is not None:
+                        deadline.check()
+                        wait = min(wait, deadline.remaining() or _RECHECK, _RECHECK)
+                    # Woken early by every admission, pause or abandoned ticket
+                    self._cond.wait(wait)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def acquire_async(self, caller, prompt, deadline=None):
+        """acquire() without blocking the event loop."""
+        ticket = self._enqueue(caller, estimate_tokens(prompt))
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(ticket)
+                if wait == 0.0:
+                    return
+                if deadline is not None:
+                    deadline.check()
+                await asyncio.sleep(min(wait, _ASYNC_POLL))
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def busy(self):
+        """True while calls are waiting for admission or admissions are paused after a 429."""
+        with self._cond:
+            return bool(self._waiting) or time.monotonic() < self._paused_until
+
+    def throttled(self, retry_after=None):
+        """Azure answered 429: hold every admission for retry_after seconds."""
+        delay = retry_after if retry_after is not None else LLM_THROTTLE_DEFAULT_WAIT
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.counters["throttled"] += 1
+            # The deployment is at its limit: drain the buckets so the restart is gradual
+            if self._requests:
+                self._requests.tokens = min(self._requests.tokens, 0.0)
+            if self._tokens:
+                self._tokens.tokens = min(self._tokens.tokens, 0.0)
+            self._cond.notify_all()
+        LLM_THROTTLES.inc()
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            waiting = dict.fromkeys(PRIORITY_CLASSES, 0)
+            for ticket in self._waiting:
+                waiting[PRIORITY_CLASSES[ticket.priority]] += 1
+            admitted = self.counters["admitted"]
+            return {
+                "waiting": waiting,
+                "admitted": dict(self._admitted_by_class),
+                "throttled": self.counters["throttled"],
+                "paused_for": round(max(0.0, self._paused_until - now), 3),
+                "avg_wait_ms": round(self.counters["wait_seconds"] / admitted * 1000, 2) if admitted else 0.0,
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler shared by every AzureAIAgent."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
+
+
+def split_quota(parts):
+    """Limit this process to 1/parts of LLM_RPM / LLM_TPM (serve.py workers share one deployment)."""
+    global _scheduler
+
+    def share(quota):
+        return max(1, quota // parts) if quota > 0 else 0
+
+    with _scheduler_lock:
+        _scheduler = LLMScheduler(share(LLM_RPM), share(LLM_TPM))
+        return _scheduler
@@ -0,0 +1,208 @@
+
+# Metrics, tracing spans and structured logging
+#
+# Prometheus metrics (served on /metrics) and OpenTelemetry spans are both
+# optional: without prometheus_client the metrics are no-ops, without
+# opentelemetry the spans are. Agent prompts are logged as JSON lines for a
+# sampled fraction of requests (LOG_SAMPLE_RATE) instead of printed every time.
+# Under serve.py with several workers, PROMETHEUS_MULTIPROC_DIR is set and
+# /metrics aggregates every worker's samples.
+
+import json
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add parent directory to path for imports
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app.config import LOG_LEVEL, LOG_SAMPLE_RATE
+
+# Optional: Prometheus metrics
+try:
+    from prometheus_client import (
+        Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+    )
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:
+    Counter = Gauge = Histogram = None
+    CONTENT_TYPE_LATEST = "text/plain; charset=utf-8"
+
+# Optional: OpenTelemetry spans (exported only if an SDK is configured)
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("travel_risk")
+except ImportError:
+    _tracer = None
+
+logger = logging.getLogger("travel_risk")
+
+# Buckets for LLM-bound latencies (seconds)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60, 120)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _metric(cls, *args, **kwargs):
+    return cls(*args, **kwargs) if cls is not None else _NoopMetric()
+
+
+AGENT_LATENCY = _metric(
+    Histogram, "agent_request_seconds", "Orchestrator.handle_request latency per agent",
+    ["agent_type"], buckets=LATENCY_BUCKETS
+)
+AGENT_ERRORS = _metric(Counter, "agent_request_errors_total", "Agent requests that raised", ["agent_type"])
+AGENT_IN_FLIGHT = _metric(
+    Gauge, "agent_requests_in_flight", "Agent requests being processed", ["agent_type"], multiprocess_mode="livesum"
+)
+AZURE_PHASE = _metric(
+    Histogram, "azure_run_phase_seconds",
+    "AzureAIAgent.run phases: thread_acquire, run_create, run_wait, message_fetch, stream",
+    ["phase"], buckets=LATENCY_BUCKETS
+)
+AZURE_POLLS = _metric(
+    Histogram, "azure_run_polls", "Status polls per Azure run", buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34)
+)
+AZURE_RUNS = _metric(Counter, "azure_runs_total", "Azure runs by final status", ["status"])
+AZURE_IN_FLIGHT = _metric(Gauge, "azure_runs_in_flight", "Azure runs currently executing", multiprocess_mode="livesum")
+AZURE_HEDGES = _metric(Counter, "azure_run_hedges_total", "Hedged duplicate runs launched, and how often they won", ["outcome"])
+LLM_QUEUE_WAIT = _metric(
+    Histogram, "llm_queue_wait_seconds", "Time runs waited in app.scheduler before starting",
+    ["priority"], buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+)
+LLM_THROTTLES = _metric(Counter, "llm_throttled_total", "Azure 429 / rate_limit_exceeded responses")
+ADMISSION_QUEUE_DEPTH = _metric(
+    Gauge, "admission_queue_depth", "Requests waiting for a slot in app.admission", ["route"], multiprocess_mode="livesum"
+)
+ADMISSION_IN_FLIGHT = _metric(
+    Gauge, "admission_in_flight", "Requests admitted and running", ["route"], multiprocess_mode="livesum"
+)
+ADMISSION_REJECTED = _metric(
+    Counter, "admission_rejected_total", "Requests shed by app.admission (503 or 429)", ["route", "reason"]
+)
+
+
+class _StatsCollector:
+    """Exports the cache, single-flight and thread-pool counters at scrape time."""
+
+    def collect(self):
+        from app import clients, scheduler
+        from app.utils.response_cache import get_search_cache
+        from app.utils.singleflight import search_flights
+
+        cache = get_search_cache()
+        if cache is not None:
+            stats = cache.stats()
+            lookups = CounterMetricFamily("search_cache_lookups", "Search cache lookups by result", labels=["result"])
+            for result in ("hits", "disk_hits", "misses", "expired"):
+                lookups.add_metric([result], stats[result])
+            yield lookups
+            yield CounterMetricFamily("search_cache_evictions", "LRU evictions", value=stats["evictions"])
+            yield GaugeMetricFamily("search_cache_hit_ratio", "Hits / lookups since start", value=stats["hit_ratio"])
+            yield GaugeMetricFamily("search_cache_bytes", "Approximate memory held by the LRU", value=stats["bytes"])
+
+        flights = search_flights.stats()
+        yield GaugeMetricFamily("search_in_flight", "Distinct searches running", value=flights["in_flight"])
+        yield CounterMetricFamily("search_coalesced", "Callers served by another caller's run", value=flights["shared"])
+
+        if clients._thread_manager is not None:
+            threads = clients._thread_manager.stats()
+            yield GaugeMetricFamily("azure_threads_outstanding", "Azure threads not yet deleted", value=threads["outstanding"])
+            yield GaugeMetricFamily("azure_threads_pooled", "Pre-created Azure threads", value=threads["pooled"])
+
+        # Registration collects once, possibly while app.scheduler is still importing this module
+        llm_scheduler = getattr(scheduler, "_scheduler", None)
+        if llm_scheduler is not None:
+            waiting = GaugeMetricFamily("llm_queue_waiting", "Runs waiting in app.scheduler", labels=["priority"])
+            for priority, count in llm_scheduler.stats()["waiting"].items():
+                waiting.add_metric([priority], count)
+            yield waiting
+
+        # Not imported from here: app.jobs pulls in the orchestrator, which imports this module
+        job_store = getattr(sys.modules.get("app.jobs"), "_store", None)
+        if job_store is not None:
+            queue = GaugeMetricFamily("jobs", "Background jobs in app.jobs by status", labels=["status"])
+            for status, count in job_store.counts().items():
+                queue.add_metric([status], count)
+            yield queue
+
+
+if Counter is not None:
+    REGISTRY.register(_StatsCollector())
+
+
+def metrics_payload():
+    """(body, content_type) for the /metrics endpoint, or None without prometheus_client."""
+    if Counter is None:
+        return None
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Metrics of all serve.py workers; the collector's gauges are this worker's
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_StatsCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def worker_exited(pid):
+    """Drop a dead serve.py worker's live gauges from the multiprocess metrics."""
+    if Counter is not None and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Tracing span (no-op without opentelemetry)."""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+@contextmanager
+def timed(histogram, *labels):
+    """Observe the duration of the block on histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(*labels) if labels else histogram).observe(time.perf_counter() - start)
+
+
+def log_sampled(event, rate=None, **fields):
+    """Log event as one JSON line for a random fraction (LOG_SAMPLE_RATE) of calls."""
+    rate = LOG_SAMPLE_RATE if rate is None else rate
+    if rate <= 0 or (rate < 1 and random.random() >= rate) or not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(json.dumps(dict(event=event, **fields), default=str))
+
+
+def configure_logging():
+    """Send app logs to stderr at LOG_LEVEL (entry points call this once)."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
@@ -0,0 +1,138 @@
+# Azure thread lifecycle management
+# Every one-shot query needs an empty thread. Creating it on the request path
+# costs a round trip and never deleting it piles up threads on the project, so
+# threads are pre-created in the background, handed out once and deleted off
+# the request path. Used threads are not reused: an Azure thread keeps its
+# message history, which would leak one traveler's prompt into the next.
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("travel_risk.thread_manager")
+
+
+class ThreadManager:
+    def __init__(self, project, pool_size=4, max_outstanding=64):
+        """
+        Args:
+            project: AIProjectClient used to create and delete threads
+            pool_size: Number of empty threads kept ready
+            max_outstanding: Cap on threads that exist server-side (pooled,
+                in use or waiting for deletion); acquire() blocks beyond it
+        """
+        self.project = project
+        self.pool_size = pool_size
+        self._slots = threading.BoundedSemaphore(max_outstanding)
+        self._lock = threading.Lock()
+        self._pool = []
+        self._refilling = 0
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thread-lifecycle")
+        self._closed = False
+        self.counters = {
+            "created": 0,
+            "deleted": 0,
+            "delete_failures": 0,
+            "warm_hits": 0,
+            "warm_misses": 0,
+            "in_use": 0,
+        }
+
+    def acquire(self):
+        """Return the ID of an empty thread, preferring a pre-created one."""
+        with self._lock:
+            thread_id = self._pool.pop() if self._pool else None
+            self.counters["warm_hits" if thread_id else "warm_misses"] += 1
+            self.counters["in_use"] += 1
+        try:
+            if thread_id is None:
+                thread_id = self._create()
+        except Exception:
+            with self._lock:
+                self.counters["in_use"] -= 1
+            raise
+        self._schedule_refill()
+        return thread_id
+
+    def release(self, thread_id):
+        """Hand a used thread back; it is deleted in the background."""
+        with self._lock:
+            self.counters["in_use"] -= 1
+        self._submit(self._delete, thread_id)
+
+    def prewarm(self):
+        """Start filling the pool of empty threads in the background."""
+        self._schedule_refill()
+
+    def stats(self):
+        """Counters plus current pool and outstanding sizes."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["pooled"] = len(self._pool)
+        stats["outstanding"] = stats["created"] - stats["deleted"] - stats["delete_failures"]
+        return stats
+
+    def close(self):
+        """Delete pooled threads and wait for pending deletions."""
+        with self._lock:
+            self._closed = True
+            pooled, self._pool = self._pool, []
+        for thread_id in pooled:
+            self._submit(self._delete, thread_id)
+        self._executor.shutdown(wait=True)
+
+    def _create(self, blocking=True):
+        if not self._slots.acquire(blocking=blocking):
+            return None
+        try:
+            thread = self.project.agents.threads.create()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.counters["created"] += 1
+        return thread.id
+
+    def _delete(self, thread_id):
+        try:
+            self.project.agents.threads.delete(thread_id)
+            with self._lock:
+                self.counters["deleted"] += 1
+        except Exception as e:
+            with self._lock:
+                self.counters["delete_failures"] += 1
+            logger.warning("could not delete thread %s: %s", thread_id, e)
+        finally:
+            self._slots.release()
+
+    def _schedule_refill(self):
+        with self._lock:
+            missing = self.pool_size - len(self._pool) - self._refilling
+            if self._closed or missing <= 0:
+                return
+            self._refilling += missing
+        for _ in range(missing):
+            self._submit(self._refill_one)
+
+    def _refill_one(self):
+        # Never block a lifecycle worker on the cap: deletions that free
+        # slots run on the same workers.
+        try:
+            thread_id = self._create(blocking=False)
+        except Exception as e:
+            logger.warning("could not pre-create thread: %s", e)
+            thread_id = None
+        with self._lock:
+            self._refilling -= 1
+            if thread_id and not self._closed:
+                self._pool.append(thread_id)
+                thread_id = None
+        if thread_id:
+            self._delete(thread_id)
+
+    def _submit(self, fn, *args):
+        try:
+            self._executor.submit(fn, *args)
+        except RuntimeError:
+            # Executor already shut down (interpreter exit): run inline
+            fn(*args)
@@ -0,0 +1,185 @@
+"""
+Bundled climate table: hemisphere, climate zone and the season of every month.
+
+The season for a destination and month is two dictionary lookups and a tuple
+index, so the dashboard and TravelAgent get a climate-aware season ("monsoon"
+in Mumbai in July, "summer" in Sydney in January) without a weather LLM call.
+Cities whose climate differs from their country's (Chennai's north-east
+monsoon, Darwin's wet season) have their own rows.
+"""
+
+import datetime
+from collections import namedtuple
+from typing import Optional
+
+from app.utils.countries import lookup, normalize
+
+Climate = namedtuple("Climate", ["zone", "hemisphere", "seasons"])
+
+# One letter per month, January first
+_SEASON_NAMES = {
+    "W": "winter",
+    "P": "spring",
+    "S": "summer",
+    "A": "autumn",
+    "H": "hot season",
+    "M": "monsoon",
+    "R": "wet season",
+    "D": "dry season",
+}
+
+_NORTH = "WWPPPSSSAAAW"
+_SOUTH = "SSAAAWWWPPPS"
+_GULF = "WWWHHHHHHHWW"
+_INDIA = "WWSSSMMMMAAW"
+_HIMALAYA = "WWPPSMMMMAAW"
+_MAINLAND_SEA = "DDHHMMMMMMDD"
+_EQUATORIAL = "RDDDDDDDDDRR"
+_SOUTHERN_WET = "RRRDDDDDDDRR"
+_CARIBBEAN = "DDDDRRRRRRRD"
+
+# iso2, zone, hemisphere, seasons by month
+_CLIMATES = [
+    ("AE", "desert", "N", _GULF),
+    ("AR", "temperate", "S", _SOUTH),
+    ("AT", "temperate", "N", _NORTH),
+    ("AU", "temperate", "S", _SOUTH),
+    ("BD", "monsoon", "N", _INDIA),
+    ("BE", "temperate", "N", _NORTH),
+    ("BG", "temperate", "N", _NORTH),
+    ("BH", "desert", "N", _GULF),
+    ("BR", "subtropical", "S", _SOUTH),
+    ("BT", "monsoon", "N", _HIMALAYA),
+    ("CA", "temperate", "N", _NORTH),
+    ("CH", "temperate", "N", _NORTH),
+    ("CL", "temperate", "S", _SOUTH),
+    ("CN", "temperate", "N", _NORTH),
+    ("CO", "equatorial", "N", "DDDRRDDDDRRD"),
+    ("CR", "tropical wet/dry", "N", _CARIBBEAN),
+    ("CY", "mediterranean", "N", _NORTH),
+    ("CZ", "temperate", "N", _NORTH),
+    ("DE", "temperate", "N", _NORTH),
+    ("DK", "temperate", "N", _NORTH),
+    ("DZ", "mediterranean", "N", _NORTH),
+    ("EC", "equatorial", "S", "RRRRRDDDDRRR"),
+    ("EE", "temperate", "N", _NORTH),
+    ("EG", "desert", "N", _NORTH),
+    ("ES", "mediterranean", "N", _NORTH),
+    ("ET", "tropical wet/dry", "N", "DDDDDRRRRDDD"),
+    ("FI", "temperate", "N", _NORTH),
+    ("FJ", "tropical wet/dry", "S", "RRRRDDDDDDRR"),
+    ("FR", "temperate", "N", _NORTH),
+    ("GB", "temperate", "N", _NORTH),
+    ("GH", "tropical wet/dry", "N", "DDDRRRRRRRDD"),
+    ("GR", "mediterranean", "N", _NORTH),
+    ("HK", "subtropical", "N", _NORTH),
+    ("HR", "temperate", "N", _NORTH),
+    ("HU", "temperate", "N", _NORTH),
+    ("ID", "equatorial", "S", _SOUTHERN_WET),
+    ("IE", "temperate", "N", _NORTH),
+    ("IL", "mediterranean", "N", _NORTH),
+    ("IN", "monsoon", "N", _INDIA),
+    ("IQ", "desert", "N", _GULF),
+    ("IR", "desert", "N", _NORTH),
+    ("IS", "temperate", "N", _NORTH),
+    ("IT", "mediterranean", "N", _NORTH),
+    ("JM", "tropical wet/dry", "N", _CARIBBEAN),
+    ("JO", "desert", "N", _NORTH),
+    ("JP", "temperate", "N", _NORTH),
+    ("KE", "tropical wet/dry", "S", "DDRRRDDDDRRR"),
+    ("KH", "monsoon", "N", _MAINLAND_SEA),
+    ("KR", "temperate", "N", _NORTH),
+    ("KW", "desert", "N", _GULF),
+    ("KZ", "temperate", "N", _NORTH),
+    ("LA", "monsoon", "N", _MAINLAND_SEA),
+    ("LB", "mediterranean", "N", _NORTH),
+    ("LK", "monsoon", "N", "DDHHMMMMMMMD"),
+    ("LT", "temperate", "N", _NORTH),
+    ("LU", "temperate", "N", _NORTH),
+    ("LV", "temperate", "N", _NORTH),
+    ("MA", "mediterranean", "N", _NORTH),
+    ("MM", "monsoon", "N", "DDHHHMMMMMDD"),
+    ("MT", "mediterranean", "N", _NORTH),
+    ("MU", "tropical wet/dry", "S", "RRRRDDDDDDRR"),
+    ("MV", "monsoon", "N", "DDDDMMMMMMMD"),
+    ("MX", "tropical wet/dry", "N", "DDDDDRRRRRDD"),
+    ("MY", "equatorial", "N", _EQUATORIAL),
+    ("NG", "tropical wet/dry", "N", "DDDRRRRRRRDD"),
+    ("NL", "temperate", "N", _NORTH),
+    ("NO", "temperate", "N", _NORTH),
+    ("NP", "monsoon", "N", _HIMALAYA),
+    ("NZ", "temperate", "S", _SOUTH),
+    ("OM", "desert", "N", _GULF),
+    ("PE", "subtropical", "S", _SOUTH),
+    ("PH", "tropical wet/dry", "N", "DDHHHRRRRRRD"),
+    ("PK", "monsoon", "N", "WWPSSSMMMAAW"),
+    ("PL", "temperate", "N", _NORTH),
+    ("PT", "mediterranean", "N", _NORTH),
+    ("QA", "desert", "N", _GULF),
+    ("RO", "temperate", "N", _NORTH),
+    ("RS", "temperate", "N", _NORTH),
+    ("RU", "temperate", "N", _NORTH),
+    ("RW", "tropical wet/dry", "S", "DDRRRDDDRRRD"),
+    ("SA", "desert", "N", _GULF),
+    ("SE", "temperate", "N", _NORTH),
+    ("SG", "equatorial", "N", _EQUATORIAL),
+    ("SI", "temperate", "N", _NORTH),
+    ("SK", "temperate", "N", _NORTH),
+    ("TH", "monsoon", "N", _MAINLAND_SEA),
+    ("TN", "mediterranean", "N", _NORTH),
+    ("TR", "mediterranean", "N", _NORTH),
+    ("TW", "subtropical", "N", _NORTH),
+    ("TZ", "tropical wet/dry", "S", "DDRRRDDDDDRR"),
+    ("UA", "temperate", "N", _NORTH),
+    ("UG", "tropical wet/dry", "N", "DDRRRDDDRRRD"),
+    ("US", "temperate", "N", _NORTH),
+    ("UY", "temperate", "S", _SOUTH),
+    ("UZ", "temperate", "N", _NORTH),
+    ("VE", "tropical wet/dry", "N", _CARIBBEAN),
+    ("VN", "tropical wet/dry", "N", "DDDHRRRRRRRD"),
+    ("ZA", "temperate", "S", _SOUTH),
+    ("ZM", "tropical wet/dry", "S", _SOUTHERN_WET),
+    ("ZW", "tropical wet/dry", "S", _SOUTHERN_WET),
+]
+
+# Cities that differ from their country's row: iso2, city, zone, hemisphere, seasons
+_CITIES = [
+    ("AU", "Darwin", "tropical wet/dry", "S", "RRRRDDDDDDRR"),
+    ("AU", "Cairns", "tropical wet/dry", "S", "RRRRDDDDDDRR"),
+    ("BR", "Manaus", "equatorial", "S", "RRRRRDDDDDDR"),
+    ("IN", "Chennai", "monsoon", "N", "DDSSSSSSSMMM"),
+    ("IN", "Kochi", "monsoon", "N", "DDSSMMMMMMMD"),
+    ("IN", "Leh", "temperate", "N", _NORTH),
+    ("PE", "Cusco", "tropical wet/dry", "S", _SOUTHERN_WET),
+    ("US", "Miami", "tropical wet/dry", "N", "DDDDRRRRRRDD"),
+    ("US", "Honolulu", "tropical wet/dry", "N", "RRRDDDDDDDRR"),
+    ("VN", "Hanoi", "subtropical", "N", _NORTH),
+]
+
+def _climate(zone, hemisphere, seasons):
+    return Climate(zone, hemisphere, tuple(_SEASON_NAMES[c] for c in seasons))
+
+
+# Built once at import; every lookup is a dict access and a tuple index
+_BY_COUNTRY = {iso2: _climate(*row) for iso2, *row in _CLIMATES}
+_BY_CITY = {(iso2, normalize(city)): _climate(*row) for iso2, city, *row in _CITIES}
+# Unknown destinations keep the dashboard's old Northern Hemisphere months
+_DEFAULT = _climate("temperate", "N", _NORTH)
+
+
+def climate_for(country: Optional[str], city: Optional[str] = None) -> Optional[Climate]:
+    """Climate of a city (if it has its own row) or its country; None if unknown."""
+    record = lookup(country)
+    if record is None:
+        return None
+    if city:
+        climate = _BY_CITY.get((record.iso2, normalize(city)))
+        if climate is not None:
+            return climate
+    return _BY_COUNTRY.get(record.iso2)
+
+
+def season_for(country: Optional[str], city: Optional[str] = None, month: Optional[int] = None) -> str:
+    """Season at the destination in month (1-12, default this month), e.g. "monsoon" or "winter"."""
+    month = month or datetime.date.today().month
+    return (climate_for(country, city) or _DEFAULT).seasons[month - 1]
@@ -0,0 +1,222 @@
+"""
+Country / nationality normalization index.
+
+Free-text countries and nationalities ("USA", "us", "United States", "american")
+are resolved to one canonical record with O(1) dictionary lookups, so agents
+agree on domestic vs international travel and equivalent traveler profiles
+produce byte-identical prompts (and therefore share cache entries).
+"""
+
+import re
+from collections import namedtuple
+from typing import Optional
+
+Country = namedtuple("Country", ["iso2", "iso3", "name", "demonym", "languages", "currency"])
+
+# iso2, iso3, canonical name, demonym, official/business languages (ISO 639-1), extra aliases
+_COUNTRIES = [
+    ("AE", "ARE", "United Arab Emirates", "Emirati", ("ar", "en"), ("uae", "emirates", "dubai")),
+    ("AR", "ARG", "Argentina", "Argentine", ("es",), ("argentinian", "argentinean")),
+    ("AT", "AUT", "Austria", "Austrian", ("de",), ()),
+    ("AU", "AUS", "Australia", "Australian", ("en",), ("aussie",)),
+    ("BD", "BGD", "Bangladesh", "Bangladeshi", ("bn",), ()),
+    ("BE", "BEL", "Belgium", "Belgian", ("nl", "fr", "de"), ()),
+    ("BG", "BGR", "Bulgaria", "Bulgarian", ("bg",), ()),
+    ("BH", "BHR", "Bahrain", "Bahraini", ("ar",), ()),
+    ("BR", "BRA", "Brazil", "Brazilian", ("pt",), ("brasil",)),
+    ("BT", "BTN", "Bhutan", "Bhutanese", ("dz",), ()),
+    ("CA", "CAN", "Canada", "Canadian", ("en", "fr"), ()),
+    ("CH", "CHE", "Switzerland", "Swiss", ("de", "fr", "it"), ()),
+    ("CL", "CHL", "Chile", "Chilean", ("es",), ()),
+    ("CN", "CHN", "China", "Chinese", ("zh",), ("prc", "peoples republic of china", "mainland china")),
+    ("CO", "COL", "Colombia", "Colombian", ("es",), ()),
+    ("CR", "CRI", "Costa Rica", "Costa Rican", ("es",), ()),
+    ("CY", "CYP", "Cyprus", "Cypriot", ("el", "tr"), ()),
+    ("CZ", "CZE", "Czech Republic", "Czech", ("cs",), ("czechia",)),
+    ("DE", "DEU", "Germany", "German", ("de",), ("deutschland",)),
+    ("DK", "DNK", "Denmark", "Danish", ("da",), ("dane",)),
+    ("DZ", "DZA", "Algeria", "Algerian", ("ar", "fr"), ()),
+    ("EC", "ECU", "Ecuador", "Ecuadorian", ("es",), ()),
+    ("EE", "EST", "Estonia", "Estonian", ("et",), ()),
+    ("EG", "EGY", "Egypt", "Egyptian", ("ar",), ()),
+    ("ES", "ESP", "Spain", "Spanish", ("es",), ("espana", "spaniard")),
+    ("ET", "ETH", "Ethiopia", "Ethiopian", ("am",), ()),
+    ("FI", "FIN", "Finland", "Finnish", ("fi", "sv"), ("finn",)),
+    ("FJ", "FJI", "Fiji", "Fijian", ("en",), ()),
+    ("FR", "FRA", "France", "French", ("fr",), ()),
+    ("GB", "GBR", "United Kingdom", "British", ("en",), ("uk", "great britain", "britain", "england", "scotland", "wales", "english", "scottish", "welsh")),
+    ("GH", "GHA", "Ghana", "Ghanaian", ("en",), ()),
+    ("GR", "GRC", "Greece", "Greek", ("el",), ()),
+    ("HK", "HKG", "Hong Kong", "Hongkonger", ("zh", "en"), ("hong kong sar",)),
+    ("HR", "HRV", "Croatia", "Croatian", ("hr",), ()),
+    ("HU", "HUN", "Hungary", "Hungarian", ("hu",), ()),
+    ("ID", "IDN", "Indonesia", "Indonesian", ("id",), ()),
+    ("IE", "IRL", "Ireland", "Irish", ("en", "ga"), ()),
+    ("IL", "ISR", "Israel", "Israeli", ("he",), ()),
+    ("IN", "IND", "India", "Indian", ("hi", "en"), ("bharat",)),
+    ("IQ", "IRQ", "Iraq", "Iraqi", ("ar",), ()),
+    ("IR", "IRN", "Iran", "Iranian", ("fa",), ("persia", "persian")),
+    ("IS", "ISL", "Iceland", "Icelandic", ("is",), ()),
+    ("IT", "ITA", "Italy", "Italian", ("it",), ()),
+    ("JM", "JAM", "Jamaica", "Jamaican", ("en",), ()),
+    ("JO", "JOR", "Jordan", "Jordanian", ("ar",), ()),
+    ("JP", "JPN", "Japan", "Japanese", ("ja",), ()),
+    ("KE", "KEN", "Kenya", "Kenyan", ("en", "sw"), ()),
+    ("KH", "KHM", "Cambodia", "Cambodian", ("km",), ()),
+    ("KR", "KOR", "South Korea", "South Korean", ("ko",), ("korea", "republic of korea", "korean")),
+    ("KW", "KWT", "Kuwait", "Kuwaiti", ("ar",), ()),
+    ("KZ", "KAZ", "Kazakhstan", "Kazakh", ("kk", "ru"), ()),
+    ("LA", "LAO", "Laos", "Lao", ("lo",), ("laotian",)),
+    ("LB", "LBN", "Lebanon", "Lebanese", ("ar",), ()),
+    ("LK", "LKA", "Sri Lanka", "Sri Lankan", ("si", "ta"), ()),
+    ("LT", "LTU", "Lithuania", "Lithuanian", ("lt",), ()),
+    ("LU", "LUX", "Luxembourg", "Luxembourgish", ("lb", "fr", "de"), ()),
+    ("LV", "LVA", "Latvia", "Latvian", ("lv",), ()),
+    ("MA", "MAR", "Morocco", "Moroccan", ("ar", "fr"), ()),
+    ("MM", "MMR", "Myanmar", "Burmese", ("my",), ("burma",)),
+    ("MT", "MLT", "Malta", "Maltese", ("mt", "en"), ()),
+    ("MU", "MUS", "Mauritius", "Mauritian", ("en", "fr"), ()),
+    ("MV", "MDV", "Maldives", "Maldivian", ("dv",), ()),
+    ("MX", "MEX", "Mexico", "Mexican", ("es",), ()),
+    ("MY", "MYS", "Malaysia", "Malaysian", ("ms", "en"), ()),
+    ("NG", "NGA", "Nigeria", "Nigerian", ("en",), ()),
+    ("NL", "NLD", "Netherlands", "Dutch", ("nl",), ("holland",)),
+    ("NO", "NOR", "Norway", "Norwegian", ("no",), ()),
+    ("NP", "NPL", "Nepal", "Nepali", ("ne",), ("nepalese",)),
+    ("NZ", "NZL", "New Zealand", "New Zealander", ("en", "mi"), ("kiwi",)),
+    ("OM", "OMN", "Oman", "Omani", ("ar",), ()),
+    ("PE", "PER", "Peru", "Peruvian", ("es",), ()),
+    ("PH", "PHL", "Philippines", "Filipino", ("en", "tl"), ("philippine",)),
+    ("PK", "PAK", "Pakistan", "Pakistani", ("ur", "en"), ()),
+    ("PL", "POL", "Poland", "Polish", ("pl",), ("pole",)),
+    ("PT", "PRT", "Portugal", "Portuguese", ("pt",), ()),
+    ("QA", "QAT", "Qatar", "Qatari", ("ar",), ()),
+    ("RO", "ROU", "Romania", "Romanian", ("ro",), ()),
+    ("RS", "SRB", "Serbia", "Serbian", ("sr",), ()),
+    ("RU", "RUS", "Russia", "Russian", ("ru",), ("russian federation",)),
+    ("RW", "RWA", "Rwanda", "Rwandan", ("rw", "en", "fr"), ()),
+    ("SA", "SAU", "Saudi Arabia", "Saudi", ("ar",), ("ksa", "saudi arabian")),
+    ("SE", "SWE", "Sweden", "Swedish", ("sv",), ("swede",)),
+    ("SG", "SGP", "Singapore", "Singaporean", ("en", "ms", "zh", "ta"), ()),
+    ("SI", "SVN", "Slovenia", "Slovenian", ("sl",), ()),
+    ("SK", "SVK", "Slovakia", "Slovak", ("sk",), ()),
+    ("TH", "THA", "Thailand", "Thai", ("th",), ()),
+    ("TN", "TUN", "Tunisia", "Tunisian", ("ar", "fr"), ()),
+    ("TR", "TUR", "Turkey", "Turkish", ("tr",), ("turkiye", "turk")),
+    ("TW", "TWN", "Taiwan", "Taiwanese", ("zh",), ()),
+    ("TZ", "TZA", "Tanzania", "Tanzanian", ("sw", "en"), ()),
+    ("UA", "UKR", "Ukraine", "Ukrainian", ("uk",), ()),
+    ("UG", "UGA", "Uganda", "Ugandan", ("en", "sw"), ()),
+    ("US", "USA", "United States", "American", ("en",), ("united states of america", "america")),
+    ("UY", "URY", "Uruguay", "Uruguayan", ("es",), ()),
+    ("UZ", "UZB", "Uzbekistan", "Uzbek", ("uz",), ()),
+    ("VE", "VEN", "Venezuela", "Venezuelan", ("es",), ()),
+    ("VN", "VNM", "Vietnam", "Vietnamese", ("vi",), ("viet nam",)),
+    ("ZA", "ZAF", "South Africa", "South African", ("en", "af", "zu"), ()),
+    ("ZM", "ZMB", "Zambia", "Zambian", ("en",), ()),
+    ("ZW", "ZWE", "Zimbabwe", "Zimbabwean", ("en",), ()),
+]
+
+
+# ISO 4217 currency per country (iso2 -> code)
+_CURRENCIES = {
+    "AE": "AED", "AR": "ARS", "AT": "EUR", "AU": "AUD", "BD": "BDT", "BE": "EUR", "BG": "BGN",
+    "BH": "BHD", "BR": "BRL", "BT": "BTN", "CA": "CAD", "CH": "CHF", "CL": "CLP", "CN": "CNY",
+    "CO": "COP", "CR": "CRC", "CY": "EUR", "CZ": "CZK", "DE": "EUR", "DK": "DKK", "DZ": "DZD",
+    "EC": "USD", "EE": "EUR", "EG": "EGP", "ES": "EUR", "ET": "ETB", "FI": "EUR", "FJ": "FJD",
+    "FR": "EUR", "GB": "GBP", "GH": "GHS", "GR": "EUR", "HK": "HKD", "HR": "EUR", "HU": "HUF",
+    "ID": "IDR", "IE": "EUR", "IL": "ILS", "IN": "INR", "IQ": "IQD", "IR": "IRR", "IS": "ISK",
+    "IT": "EUR", "JM": "JMD", "JO": "JOD", "JP": "JPY", "KE": "KES", "KH": "KHR", "KR": "KRW",
+    "KW": "KWD", "KZ": "KZT", "LA": "LAK", "LB": "LBP", "LK": "LKR", "LT": "EUR", "LU": "EUR",
+    "LV": "EUR", "MA": "MAD", "MM": "MMK", "MT": "EUR", "MU": "MUR", "MV": "MVR", "MX": "MXN",
+    "MY": "MYR", "NG": "NGN", "NL": "EUR", "NO": "NOK", "NP": "NPR", "NZ": "NZD", "OM": "OMR",
+    "PE": "PEN", "PH": "PHP", "PK": "PKR", "PL": "PLN", "PT": "EUR", "QA": "QAR", "RO": "RON",
+    "RS": "RSD", "RU": "RUB", "RW": "RWF", "SA": "SAR", "SE": "SEK", "SG": "SGD", "SI": "EUR",
+    "SK": "EUR", "TH": "THB", "TN": "TND", "TR": "TRY", "TW": "TWD", "TZ": "TZS", "UA": "UAH",
+    "UG": "UGX", "US": "USD", "UY": "UYU", "UZ": "UZS", "VE": "VES", "VN": "VND", "ZA": "ZAR",
+    "ZM": "ZMW", "ZW": "ZWG",
+}
+
+
+def normalize(text: str) -> str:
+    """Lookup key for a place name: lower case, letters and digits only, no leading "the"."""
+    text = (text or "").lower().replace("&", " and ")
+    text = re.sub(r"[^a-z0-9 ]", "", text)
+    text = " ".join(text.split())
+    if text.startswith("the "):
+        text = text[4:]
+    return text
+
+
+def _build_index():
+    index = {}
+    for iso2, iso3, name, demonym, languages, aliases in _COUNTRIES:
+        country = Country(iso2, iso3, name, demonym, languages, _CURRENCIES.get(iso2))
+        for key in (iso2, iso3, name, demonym, *aliases):
+            index.setdefault(normalize(key), country)
+    return index
+
+
+# Built once at import; every lookup is a single dict access
+_INDEX = _build_index()
+
+
+def lookup(text: Optional[str]) -> Optional[Country]:
+    """Resolve a country name, ISO code, demonym or alias; None if unknown."""
+    if not text:
+        return None
+    return _INDEX.get(normalize(text))
+
+
+def canonical_country(text: Optional[str]) -> Optional[str]:
+    """Canonical country name ("usa" -> "United States"); unknown input is only tidied."""
+    country = lookup(text)
+    if country:
+        return country.name
+    return " ".join(text.split()) if text else text
+
+
+def canonical_nationality(text: Optional[str]) -> Optional[str]:
+    """Canonical demonym ("USA", "american" -> "American"); unknown input is only tidied."""
+    country = lookup(text)
+    if country:
+        return country.demonym
+    return " ".join(text.split()) if text else text
+
+
+def canonical_city(text: Optional[str]) -> Optional[str]:
+    """Tidy whitespace and fix all-lower/all-upper city names ("new york" -> "New York")."""
+    if not text:
+        return text
+    city = " ".join(text.split())
+    if city.islower() or city.isupper():
+        city = city.title()
+    return city
+
+
+def currency_for(text: Optional[str]) -> Optional[str]:
+    """ISO 4217 code for a country or nationality ("Indian" -> "INR"); None if unknown."""
+    country = lookup(text)
+    return country.currency if country else None
+
+
+def is_domestic(nationality: Optional[str], country: Optional[str]) -> bool:
+    """True when the traveler's nationality belongs to the destination country."""
+    if not nationality or not country:
+        return False
+    home, destination = lookup(nationality), lookup(country)
+    if home and destination:
+        return home.iso2 == destination.iso2
+    return normalize(nationality) == normalize(country)
+
+
+def shares_language(nationality: Optional[str], country: Optional[str]) -> bool:
+    """
+    True for English-to-English travel (e.g. Indian to the USA or UK), so the
+    language guide does not translate 'Hello' to 'Hello'. Other shared
+    languages (Swiss to Italy) still get the foreign-language guide.
+    """
+    home, destination = lookup(nationality), lookup(country)
+    if not home or not destination:
+        return False
+    return "en" in home.languages and "en" in destination.languages
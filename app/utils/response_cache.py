@@ -0,0 +1,198 @@
+"""
+Response cache for search_web.
+
+An in-memory LRU (bounded by approximate size in bytes) in front of an SQLite
+file, so answers survive a restart of backend_api.py. Entries carry their own
+expiry, which lets each agent pick a TTL that matches how fast its facts change.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from app.config import (
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_PATH,
+    SEARCH_CACHE_MAX_BYTES,
+    SEARCH_CACHE_DEFAULT_TTL,
+    SEARCH_CACHE_TTLS
+)
+
+logger = logging.getLogger("travel_risk.response_cache")
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different prompts share an entry."""
+    return re.sub(r"\s+", " ", (query or "").strip()).lower()
+
+
+def cache_key(query: str, detail_level: str) -> str:
+    """Stable key for a (query, detail_level) pair."""
+    raw = f"{detail_level}\n{normalize_query(query)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def ttl_for(agent: Optional[str]) -> int:
+    """Freshness window in seconds for answers requested by agent."""
+    return SEARCH_CACHE_TTLS.get(agent, SEARCH_CACHE_DEFAULT_TTL)
+
+
+class ResponseCache:
+    def __init__(self, path: Optional[str] = None, max_bytes: int = SEARCH_CACHE_MAX_BYTES):
+        """
+        Args:
+            path: SQLite file backing the cache (None keeps it memory-only)
+            max_bytes: Approximate memory budget for the LRU layer
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._db = None
+        self._db_pid = None
+        self._writes = 0
+        self.counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "writes": 0,
+        }
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return value
+                self._drop(key)
+                self.counters["expired"] += 1
+
+            row = self._disk_get(key, now)
+            if row is not None:
+                value, expires_at = row
+                self._remember(key, value, expires_at)
+                self.counters["disk_hits"] += 1
+                return value
+
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        """Store value for ttl seconds."""
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._disk_set(key, value, expires_at)
+            self.counters["writes"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters plus current size."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Forget everything, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM responses")
+                db.commit()
+
+    def _remember(self, key, value, expires_at):
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.counters["evictions"] += 1
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _connection(self):
+        """SQLite connection for this process (reopened after a fork)."""
+        if not self.path:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db, self._db_pid = db, os.getpid()
+        return self._db
+
+    def _disk_get(self, key, now):
+        try:
+            db = self._connection()
+            if db is None:
+                return None
+            return db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("search cache read failed: %s", e)
+            return None
+
+    def _disk_set(self, key, value, expires_at):
+        try:
+            db = self._connection()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._writes += 1
+            # Purge expired rows now and then so the file does not grow forever
+            if self._writes % 100 == 0:
+                db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            db.commit()
+        except sqlite3.Error as e:
+            logger.warning("search cache write failed: %s", e)
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[ResponseCache]:
+    """Process-wide cache used by search_web (None when disabled)."""
+    global _search_cache
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = ResponseCache(SEARCH_CACHE_PATH)
+        return _search_cache
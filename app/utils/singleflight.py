@@ -0,0 +1,165 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one execution. The first
+caller starts it on its own thread (or task) under its own deadline, so no
+caller's timeout or cancellation is inherited by the shared run; every caller,
+the first included, then waits for the result up to its own timeout. Errors
+are re-raised in every waiting caller. The run is cancelled (app.deadlines)
+once the last caller waiting for it has given up.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app import deadlines
+
+# How often a waiting caller checks whether its own deadline was cancelled
+_CANCEL_POLL = 0.1
+
+
+class _Call:
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class _AsyncCall:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.counters = {"executed": 0, "shared": 0, "wait_timeouts": 0, "abandoned": 0}
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None,
+           run_timeout: Optional[float] = None) -> Any:
+        """
+        Run fn() once for all concurrent callers with the same key.
+
+        Args:
+            timeout: Seconds this caller waits for the result
+            run_timeout: Deadline of the shared run (None: until the last caller leaves)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            first = call is None
+            if first:
+                call = self._calls[key] = _Call(deadlines.Deadline(run_timeout))
+                self.counters["executed"] += 1
+            else:
+                self.counters["shared"] += 1
+            call.waiters += 1
+        if first:
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run, args=(self._run, key, call, fn), name="singleflight", daemon=True
+            ).start()
+
+        try:
+            self._wait(call, timeout)
+        finally:
+            self._leave(key, call)
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _run(self, key, call, fn):
+        try:
+            with deadlines.use(call.deadline):
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def _wait(self, call, timeout):
+        own = deadlines.current()
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if expires_at is None else expires_at - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                with self._lock:
+                    self.counters["wait_timeouts"] += 1
+                raise TimeoutError(f"Timed out after {timeout:g}s waiting for an identical in-flight request")
+            # Without a deadline of its own the caller can only time out, so no polling
+            step = remaining if own is None else min(_CANCEL_POLL, remaining or _CANCEL_POLL)
+            if call.done.wait(step):
+                return
+            if own is not None:
+                own.check()
+
+    def _leave(self, key, call):
+        with self._lock:
+            call.waiters -= 1
+            if call.waiters or call.done.is_set():
+                return
+            # Nobody wants the result any more: new callers start a fresh run
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            self.counters["abandoned"] += 1
+        call.deadline.cancel()
+
+    async def do_async(self, key: str, coro_fn: Callable[[], Any], timeout: Optional[float] = None,
+                       run_timeout: Optional[float] = None) -> Any:
+        """Async variant of do(); coro_fn() returns the awaitable to share."""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        call = self._async_calls.get(flight_key)
+        if call is None:
+            self.counters["executed"] += 1
+            call = self._async_calls[flight_key] = _AsyncCall(
+                loop.create_task(self._run_async(coro_fn, deadlines.Deadline(run_timeout)))
+            )
+            call.task.add_done_callback(lambda _: self._forget_async(flight_key, call))
+        else:
+            self.counters["shared"] += 1
+        call.waiters += 1
+        try:
+            # shield: one caller timing out or being cancelled must not cancel the others' run
+            return await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        except asyncio.TimeoutError:
+            self.counters["wait_timeouts"] += 1
+            raise TimeoutError(f"Timed out after {timeout:g}s waiting for an identical in-flight request")
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                # The last caller left: cancelling the task cancels its Azure run
+                self._forget_async(flight_key, call)
+                self.counters["abandoned"] += 1
+                call.task.cancel()
+
+    @staticmethod
+    async def _run_async(coro_fn, deadline):
+        # The task has its own copy of the context, so this deadline stays inside it
+        with deadlines.use(deadline):
+            return await coro_fn()
+
+    def _forget_async(self, flight_key, call):
+        if self._async_calls.get(flight_key) is call:
+            del self._async_calls[flight_key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self._calls) + len(self._async_calls)
+        return stats
+
+
+# Shared by every copy of web_search (agents load that file by path)
+search_flights = SingleFlight()
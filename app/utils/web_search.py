@@ -9,34 +9,118 @@ from pathlib import Path
 root_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
-from app.agent import AzureAIAgent
-
-# Create a singleton instance for reuse
-_agent_instance = None
+from app import clients, deadlines
+from app.agent import RUN_FAILED
+from app.config import SEARCH_FLIGHT_TIMEOUT
+from app.utils.response_cache import get_search_cache, cache_key, ttl_for
+from app.utils.singleflight import search_flights
+from app.telemetry import span
 
 def get_agent():
-    """Get or create the Azure AI agent instance"""
-    global _agent_instance
-    if _agent_instance is None:
-        _agent_instance = AzureAIAgent(agent_name="TravelSearchAgent")
-    return _agent_instance
+    """Get the shared Azure AI agent instance.
+
+    Agents load this file by path, so each of them executes it separately; the
+    instance lives in app.clients so every copy shares the same one.
+    """
+    return clients.get_agent("TravelSearchAgent")
+
+def format_query(query, detail_level="detailed"):
+    """Wrap the query with the instructions for the requested detail level."""
+    if detail_level == "critical":
+        return f"You are a travel and compliance assistant. Provide ONLY the most critical, essential information that a traveler must know. Be concise and focus on must-know facts, requirements, and safety information: {query}"
+    return f"You are a travel and compliance assistant. Provide detailed, comprehensive, up-to-date information with all relevant details and recommendations: {query}"
+
+def _flight_timeout():
+    """Wait for a shared in-flight query no longer than the caller's own deadline."""
+    deadline = deadlines.current()
+    remaining = deadline.remaining() if deadline is not None else None
+    return SEARCH_FLIGHT_TIMEOUT if remaining is None else min(SEARCH_FLIGHT_TIMEOUT, remaining)
 
-def search_web(query, detail_level="detailed"):
+def _cached(query, detail_level):
+    cache = get_search_cache()
+    if cache is None:
+        return None
+    return cache.get(cache_key(query, detail_level))
+
+def _store(query, detail_level, agent, result, ttl=None, validate=None):
+    # Failed or rejected runs are not cached so the next call retries
+    cache = get_search_cache()
+    if cache is not None and result != RUN_FAILED and (validate is None or validate(result)):
+        cache.set(cache_key(query, detail_level), result, ttl or ttl_for(agent))
+
+def search_web(query, detail_level="detailed", agent=None, ttl=None, validate=None):
     """
     Uses Azure AI Foundry Agent to get answers for travel-related queries.
     
     Args:
         query: The search query
         detail_level: Either "critical" (for short stays < 10 days) or "detailed" (for longer stays)
+        agent: Name of the calling agent, selects the cache TTL (see SEARCH_CACHE_TTLS)
+            and the scheduling priority (see LLM_PRIORITIES)
+        ttl: Cache lifetime in seconds, overriding the agent's
+        validate: Callable answer -> bool; answers it rejects are returned but not cached
+    """
+    cached = _cached(query, detail_level)
+    if cached is not None:
+        return cached
+
+    def run():
+        # A flight that finished just before we joined has already filled the cache
+        cached = _cached(query, detail_level)
+        if cached is not None:
+            return cached
+        result = get_agent().run(format_query(query, detail_level), caller=agent)
+        _store(query, detail_level, agent, result, ttl, validate)
+        return result
+
+    # Identical concurrent queries share one Azure run; it runs under its own
+    # deadline and is cancelled only once every caller waiting for it has left
+    try:
+        with span("search_web", agent=agent or "", detail_level=detail_level):
+            return search_flights.do(
+                cache_key(query, detail_level), run, timeout=_flight_timeout(), run_timeout=SEARCH_FLIGHT_TIMEOUT
+            )
+    except Exception as e:
+        return f"Azure AI Agent error: {str(e)}"
+
+def search_web_stream(query, detail_level="detailed", agent=None):
+    """
+    Streaming variant of search_web: yields the answer in chunks as the model
+    produces them. A cached answer is yielded in one piece; the full answer is
+    cached once the run completes. Streams are not coalesced: each caller
+    needs its own token stream.
     """
+    cached = _cached(query, detail_level)
+    if cached is not None:
+        yield cached
+        return
+    chunks = []
     try:
-        agent = get_agent()
-        # Format the query based on detail level
-        if detail_level == "critical":
-            full_query = f"You are a travel and compliance assistant. Provide ONLY the most critical, essential information that a traveler must know. Be concise and focus on must-know facts, requirements, and safety information: {query}"
-        else:
-            full_query = f"You are a travel and compliance assistant. Provide detailed, comprehensive, up-to-date information with all relevant details and recommendations: {query}"
-        result = agent.run(full_query)
+        for chunk in get_agent().run_stream(format_query(query, detail_level), caller=agent):
+            chunks.append(chunk)
+            yield chunk
+    except Exception as e:
+        yield f"Azure AI Agent error: {str(e)}"
+        return
+    _store(query, detail_level, agent, "".join(chunks))
+
+async def search_web_async(query, detail_level="detailed", agent=None, ttl=None, validate=None):
+    """Async variant of search_web (same cache, asyncio Azure clients)."""
+    cached = _cached(query, detail_level)
+    if cached is not None:
+        return cached
+
+    async def run():
+        cached = _cached(query, detail_level)
+        if cached is not None:
+            return cached
+        result = await get_agent().run_async(format_query(query, detail_level), caller=agent)
+        _store(query, detail_level, agent, result, ttl, validate)
         return result
+
+    try:
+        return await search_flights.do_async(
+            cache_key(query, detail_level), run, timeout=_flight_timeout(), run_timeout=SEARCH_FLIGHT_TIMEOUT
+        )
     except Exception as e:
-        return f"Azure AI Agent error: {str(e)}"
\ No newline at end of file
+        return f"Azure AI Agent error: {str(e)}"
@@ -3,47 +3,207 @@ WHO API Integration Module
 Provides functions to fetch health indicator data from the World Health Organization API
 """
 
+import hashlib
+import json
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import parse_qsl
+
 import requests
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional: incremental JSON parsing for large, unbounded responses
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Add parent directory to path for imports (the dashboard loads this file by path)
+root_dir = Path(__file__).parent.parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from app.utils.response_cache import ResponseCache
+from app.data.who_store import get_store, FILTER_COLUMNS
+
+BASE_URL = "https://ghoapi.azureedge.net/api"
+
+# Columns the app actually uses; everything else is left on the server
+DEFAULT_SELECT = ("SpatialDim", "TimeDim", "NumericValue", "Dim1")
+
+# Number of records returned in "sample_data"
+SAMPLE_SIZE = 5
+
+_EQ_CLAUSE = re.compile(r"^\s*(\w+)\s+eq\s+(?:'([^']*)'|(\d+))\s*$")
+
+
+def parse_simple_filter(odata_filter: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Turn "Dim1 eq 'FMLE' and SpatialDim eq 'USA'" into {"Dim1": "FMLE", "SpatialDim": "USA"}.
+    Returns None for anything the offline store cannot answer.
+    """
+    if not odata_filter:
+        return {}
+    filters = {}
+    for clause in re.split(r"\s+and\s+", odata_filter.strip()):
+        match = _EQ_CLAUSE.match(clause)
+        if not match or match.group(1) not in FILTER_COLUMNS:
+            return None
+        field, text, number = match.groups()
+        filters[field] = int(number) if number is not None else text
+    return filters
+
+
+class WHOClient:
+    def __init__(self, base_url: str = BASE_URL, timeout: float = 10, cache_ttl: int = 3600,
+                 cache_bytes: int = 4 * 1024 * 1024):
+        """
+        Args:
+            base_url: WHO GHO OData endpoint
+            timeout: Per-request timeout in seconds
+            cache_ttl: Seconds a response is served from memory
+            cache_bytes: Memory budget of the response cache
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.cache = ResponseCache(None, max_bytes=cache_bytes)
+        self._count_supported = True
+        self._lock = threading.Lock()
+
+        # Pooled keep-alive session with retries for throttling and server errors
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=("GET",))
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/json"
+
+    def get_records(self, indicator_code: str, filter: Optional[str] = None, top: Optional[int] = None,
+                    select: Optional[Tuple[str, ...]] = DEFAULT_SELECT, extra_params: Optional[Dict[str, str]] = None
+                    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Fetch indicator rows with filtering, paging and projection done server-side.
+
+        Args:
+            indicator_code: WHO indicator code (e.g. 'NCD_BMI_30')
+            filter: OData $filter expression (e.g. "Dim1 eq 'FMLE'")
+            top: Maximum number of rows to return ($top)
+            select: Columns to return ($select); None returns every column
+            extra_params: Any other OData query options
+
+        Returns:
+            (records, total) where total is the number of matching rows
+        """
+        params = dict(extra_params or {})
+        if filter:
+            params["$filter"] = filter
+        if top is not None:
+            params["$top"] = str(top)
+        if select:
+            params["$select"] = ",".join(select)
+        if top is not None and self._count_supported:
+            # Ask for the total so "records_found" stays meaningful with $top
+            params["$count"] = "true"
+
+        url = f"{self.base_url}/{indicator_code}"
+        key = hashlib.sha256(f"{url}?{sorted(params.items())}".encode("utf-8")).hexdigest()
+        cached = self.cache.get(key)
+        if cached is not None:
+            records, total = json.loads(cached)
+            return records, total
+
+        try:
+            records, total = self._fetch(url, params)
+        except requests.exceptions.HTTPError as e:
+            if "$count" not in params or e.response is None or e.response.status_code != 400:
+                raise
+            # Endpoint rejected $count: remember and retry without it
+            with self._lock:
+                self._count_supported = False
+            params.pop("$count")
+            records, total = self._fetch(url, params)
+
+        self.cache.set(key, json.dumps([records, total]), self.cache_ttl)
+        return records, total
+
+    def _fetch(self, url, params):
+        response = self.session.get(url, params=params, timeout=self.timeout, stream=True)
+        try:
+            response.raise_for_status()
+            if ijson is not None and "$top" not in params:
+                # Unbounded result: parse row by row instead of building the whole document
+                records = []
+                response.raw.decode_content = True
+                for record in ijson.items(response.raw, "value.item", use_float=True):
+                    records.append(record)
+                return records, len(records)
+            data = response.json()
+        finally:
+            response.close()
+        records = data.get("value", [])
+        return records, data.get("@odata.count", len(records))
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> WHOClient:
+    """Shared WHO client (pooled session and response cache)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = WHOClient()
+        return _default_client
 
 
 def get_who_indicator_data(indicator_code: str, filters: Optional[str] = None) -> Dict[str, Any]:
     """
     Fetch WHO health indicator data for a specific indicator code.
-    
+
     Args:
         indicator_code (str): The WHO indicator code (e.g., 'NCD_BMI_30', 'MORT_DIAB')
         filters (str, optional): OData filter string (e.g., "$filter=Dim1 eq 'FMLE'")
-    
+
     Returns:
         Dict[str, Any]: Processed WHO data or error message
     """
-    base_url = "https://ghoapi.azureedge.net/api"
-    
     try:
-        # Construct the API URL
-        url = f"{base_url}/{indicator_code}"
-        if filters:
-            url = f"{url}?{filters}"
-        
-        # Make the API request
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        
+        # Only the sample rows are transferred: filter, $top and $select run on the server
+        params = dict(parse_qsl(filters or "", keep_blank_values=True))
+        odata_filter = params.pop("$filter", None)
+
+        # Synced indicators are answered from the offline store
+        local_filters = parse_simple_filter(odata_filter) if not params else None
+        store = get_store()
+        if local_filters is not None and store.has_indicator(indicator_code):
+            records, total = store.query(indicator_code, local_filters, top=SAMPLE_SIZE)
+        else:
+            records, total = get_client().get_records(
+                indicator_code,
+                filter=odata_filter,
+                top=SAMPLE_SIZE,
+                extra_params=params
+            )
+
         # Process and return relevant data
-        if 'value' in data and len(data['value']) > 0:
-            # Extract key information from the first few records
-            records = data['value'][:5]  # Limit to first 5 records
-            
+        if len(records) > 0:
             processed_data = {
                 "indicator": indicator_code,
-                "records_found": len(data['value']),
+                "records_found": total,
                 "sample_data": []
             }
-            
-            for record in records:
+
+            for record in records[:SAMPLE_SIZE]:
                 processed_record = {
                     "country": record.get('SpatialDim', 'N/A'),
                     "year": record.get('TimeDim', 'N/A'),
@@ -51,7 +211,7 @@ def get_who_indicator_data(indicator_code: str, filters: Optional[str] = None) -
                     "gender": record.get('Dim1', 'N/A')
                 }
                 processed_data["sample_data"].append(processed_record)
-            
+
             return processed_data
         else:
             return {
@@ -59,7 +219,7 @@ def get_who_indicator_data(indicator_code: str, filters: Optional[str] = None) -
                 "message": "No data available for this indicator",
                 "records_found": 0
             }
-    
+
     except requests.exceptions.RequestException as e:
         return {
             "indicator": indicator_code,
@@ -77,11 +237,11 @@ def get_who_indicator_data(indicator_code: str, filters: Optional[str] = None) -
 def get_country_health_data(country_code: str, indicator_code: str) -> Dict[str, Any]:
     """
     Fetch WHO health data for a specific country and indicator.
-    
+
     Args:
         country_code (str): ISO3 country code (e.g., 'USA', 'GBR')
         indicator_code (str): The WHO indicator code
-    
+
     Returns:
         Dict[str, Any]: Country-specific health data
     """
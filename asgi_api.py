@@ -0,0 +1,167 @@
+"""
+ASGI version of backend_api.py.
+
+Same JSON shapes and admission limits (app/admission.py), but every agent
+call is awaited on the asyncio Azure clients, so a single worker can hold
+hundreds of requests that are waiting on the LLM instead of pinning one
+thread each. Streaming, /api/batch and /api/jobs are only served by the
+Flask app.
+
+Run with:  uvicorn asgi_api:app --host 0.0.0.0 --port 5050
+"""
+
+import functools
+
+from quart import Quart, request, jsonify
+from quart_cors import cors
+
+# Agent registry and orchestrator are shared with the Flask app
+from backend_api import agents, orchestrator, HOSPITALS_BY_COUNTRY, parse_timeout, valid_agent_list
+from app import admission, clients, deadlines
+from app.config import AGENT_TIMEOUT
+from app.utils.response_cache import get_search_cache
+from app.utils.singleflight import search_flights
+from app.jobs import get_job_store
+from app.scheduler import get_scheduler
+from app.readiness import start_warmup, readiness
+from app.telemetry import configure_logging, metrics_payload
+
+# Import web search utility for chatbot
+try:
+    from app.utils.web_search import search_web_async
+except ImportError:
+    search_web_async = None
+
+configure_logging()
+
+app = Quart(__name__)
+app = cors(app, allow_origin="*")
+
+
+def admitted(route):
+    """Run the view under app.admission: 503 / 429 with Retry-After when shedding load."""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            client = request.headers.get("X-Client-Id") or request.remote_addr
+            try:
+                slot = await admission.admit_async(route, client)
+            except admission.Rejected as e:
+                return jsonify({"error": str(e)}), e.status, {"Retry-After": str(e.retry_after)}
+            try:
+                return await view(*args, **kwargs)
+            finally:
+                slot.release()
+        return wrapper
+    return decorator
+
+
+@app.route("/api/agent/<agent_type>", methods=["POST"])
+@admitted("agent")
+async def agent_handler(agent_type):
+    data = await request.get_json(silent=True) or {}
+    if agent_type not in agents:
+        return jsonify({"error": f"Unknown agent: {agent_type}"}), 400
+    try:
+        # A client disconnect cancels this handler, and with it the agent's Azure runs
+        with deadlines.scope(AGENT_TIMEOUT):
+            result = await orchestrator.handle_request_async(agent_type, **data)
+        return jsonify({"result": result})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/assessment", methods=["POST"])
+@admitted("assessment")
+async def assessment_handler():
+    """Run the full-trip assessment with every agent in parallel."""
+    data = dict(await request.get_json(silent=True) or {})
+    agent_types = data.pop("agents", None)
+    batched = bool(data.pop("batched", False))
+    if not valid_agent_list(agent_types):
+        return jsonify({"error": "'agents' must be a list of agent types"}), 400
+    try:
+        timeout = parse_timeout(data.pop("timeout", None))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        assessment = await orchestrator.handle_all_async(agent_types, timeout=timeout, batched=batched, **data)
+        return jsonify(assessment)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/agent/health_hospitals", methods=["POST"])
+async def health_hospitals_handler():
+    data = await request.get_json(silent=True) or {}
+    country = data.get("country")
+    hospitals = HOSPITALS_BY_COUNTRY.get(country, [])
+    return jsonify({"hospitals": hospitals})
+
+
+@app.route("/api/ping", methods=["GET"])
+async def ping():
+    return jsonify({"status": "ok"})
+
+
+@app.route("/api/ready", methods=["GET"])
+async def ready():
+    """Readiness probe: warms credentials, agents and connections in the background."""
+    start_warmup()
+    state = readiness()
+    if state["status"] == "ready":
+        return jsonify(state)
+    return jsonify(state), 503, {"Retry-After": "1"}
+
+
+@app.route("/api/stats", methods=["GET"])
+async def stats_handler():
+    """Runtime counters for tuning (Azure thread lifecycle, search cache, coalescing, LLM scheduler, admission, jobs)."""
+    search_cache = get_search_cache()
+    return jsonify({
+        "threads": clients.get_thread_manager().stats(),
+        "search_cache": search_cache.stats() if search_cache else {},
+        "single_flight": search_flights.stats(),
+        "scheduler": get_scheduler().stats(),
+        "admission": admission.stats(),
+        "jobs": get_job_store().counts(),
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+async def metrics_handler():
+    """Prometheus metrics (agent latency, Azure run phases, cache and in-flight gauges)."""
+    payload = metrics_payload()
+    if payload is None:
+        return "prometheus_client is not installed\n", 501, {"Content-Type": "text/plain"}
+    body, content_type = payload
+    return body, 200, {"Content-Type": content_type}
+
+
+@app.route("/api/chat", methods=["POST"])
+@admitted("chat")
+async def chat_handler():
+    """Handle chatbot queries using web search agent"""
+    data = await request.get_json(silent=True) or {}
+    query = data.get("query", "")
+
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+
+    try:
+        if search_web_async:
+            with deadlines.scope(AGENT_TIMEOUT):
+                response = await search_web_async(query, "detailed")
+        else:
+            # Fallback response if search_web is not available
+            response = "I apologize, but the search service is currently unavailable. Please check official government websites or contact your travel agent for up-to-date information."
+
+        return jsonify({"response": response})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=5050)
@@ -1,6 +1,10 @@
-from flask import Flask, request, jsonify
+import functools
+import json
+import math
+
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context, url_for
 from flask_cors import CORS
-from app.orchestrator import Orchestrator
+from app.orchestrator import ASSESSMENT_AGENTS, Orchestrator
 from app.agents.compliance_agent import ComplianceAgent
 from app.agents.health_agent import HealthAgent
 from app.agents.travel_agent import TravelAgent
@@ -9,6 +13,15 @@ from app.agents.news_alert_agent import NewsAlertAgent
 from app.agents.language_guide_agent import LanguageGuideAgent
 from app.agents.emergency_contact_agent import EmergencyContactAgent
 from app.agents.currency_agent import currency_agent
+from app import admission, clients, deadlines
+from app.config import AGENT_TIMEOUT, BATCH_CONCURRENCY
+from app.utils.response_cache import get_search_cache
+from app.utils.singleflight import search_flights
+from app.scheduler import get_scheduler
+from app.readiness import start_warmup, readiness
+from app.telemetry import configure_logging, metrics_payload
+from app.batch import iter_batch, parse_profiles
+from app.jobs import QueueFull, get_job_store
 
 # Import web search utility for chatbot
 try:
@@ -16,6 +29,8 @@ try:
 except ImportError:
     search_web = None
 
+configure_logging()
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 
@@ -32,36 +47,269 @@ agents = {
 }
 orchestrator = Orchestrator(agents)
 
+# Dummy hospital data, replace with Azure/Foundry/WHO API as needed
+HOSPITALS_BY_COUNTRY = {
+    "USA": ["Mayo Clinic", "Cleveland Clinic", "Johns Hopkins Hospital"],
+    "India": ["Apollo Hospitals", "Fortis Healthcare", "AIIMS Delhi"],
+    "UK": ["St Thomas' Hospital", "Royal London Hospital", "Addenbrooke's Hospital"],
+    "Germany": ["Charité – Universitätsmedizin Berlin", "University Hospital Heidelberg", "LMU Klinikum Munich"],
+}
+
+def parse_timeout(value):
+    """
+    Seconds from a request's "timeout" field; None (the default) when it is
+    absent or 0. Raises ValueError for anything but a non-negative number.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError("'timeout' must be a number of seconds")
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise ValueError("'timeout' must be a number of seconds") from None
+    if not math.isfinite(seconds) or seconds < 0:
+        raise ValueError("'timeout' must be a non-negative number of seconds")
+    return seconds or None
+
+def valid_agent_list(agent_types):
+    """True for a missing "agents" field or a list of agent type names."""
+    return agent_types is None or (isinstance(agent_types, list) and all(isinstance(a, str) for a in agent_types))
+
+def admitted(route):
+    """Run the view under app.admission: 503 / 429 with Retry-After when shedding load."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            client = request.headers.get("X-Client-Id") or request.remote_addr
+            try:
+                slot = admission.admit(route, client)
+            except admission.Rejected as e:
+                return jsonify({"error": str(e)}), e.status, {"Retry-After": str(e.retry_after)}
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                slot.release()
+                raise
+            # Released once the body is sent, so streamed responses keep their slot
+            response.call_on_close(slot.release)
+            return response
+        return wrapper
+    return decorator
+
 @app.route("/api/agent/<agent_type>", methods=["POST"])
+@admitted("agent")
 def agent_handler(agent_type):
     data = request.json or {}
     if agent_type not in agents:
         return jsonify({"error": f"Unknown agent: {agent_type}"}), 400
     try:
-        result = orchestrator.handle_request(agent_type, **data)
+        with deadlines.scope(AGENT_TIMEOUT):
+            result = orchestrator.handle_request(agent_type, **data)
         return jsonify({"result": result})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/assessment", methods=["POST"])
+@admitted("assessment")
+def assessment_handler():
+    """Run the full-trip assessment with every agent in parallel."""
+    data = dict(request.json or {})
+    agent_types = data.pop("agents", None)
+    batched = bool(data.pop("batched", False))
+    if not valid_agent_list(agent_types):
+        return jsonify({"error": "'agents' must be a list of agent types"}), 400
+    try:
+        timeout = parse_timeout(data.pop("timeout", None))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        assessment = orchestrator.handle_all(agent_types, timeout=timeout, batched=batched, **data)
+        return jsonify(assessment)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/assessment/stream", methods=["GET", "POST"])
+@admitted("assessment_stream")
+def assessment_stream_handler():
+    """
+    Server-Sent Events version of /api/assessment.
+
+    Emits "token" events while each agent's answer is generated, a "result"
+    event per agent as soon as it finishes, "error" for failed or timed-out
+    agents and a final "done". GET takes the profile as query parameters
+    (agents=a,b for a subset) so it works with a plain EventSource.
+    """
+    if request.method == "POST":
+        data = dict(request.get_json(silent=True) or {})
+        agent_types = data.pop("agents", None)
+    else:
+        data = request.args.to_dict()
+        agent_types = data.pop("agents", None)
+        agent_types = agent_types.split(",") if agent_types else None
+        if str(data.get("planned_stay", "")).isdigit():
+            data["planned_stay"] = int(data["planned_stay"])
+    if not valid_agent_list(agent_types):
+        return jsonify({"error": "'agents' must be a list of agent types"}), 400
+    try:
+        timeout = parse_timeout(data.pop("timeout", None))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        for event, agent_type, payload in orchestrator.stream_all(agent_types, timeout=timeout, **data):
+            yield f"event: {event}\ndata: {json.dumps({'agent': agent_type, 'data': payload})}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route("/api/batch", methods=["POST"])
+@admitted("batch")
+def batch_handler():
+    """
+    Assess many travelers in one request.
+
+    Accepts {"travelers": [...], "agents": [...], "timeout": s, "concurrency": n}
+    as JSON, or a raw JSONL (application/x-ndjson) or CSV (text/csv) body.
+    concurrency is capped at BATCH_CONCURRENCY.
+    Responds with one JSON line per traveler as each finishes.
+    """
+    agent_types = timeout = concurrency = None
+    if request.mimetype in ("text/csv", "application/x-ndjson", "application/jsonl"):
+        fmt = "csv" if request.mimetype == "text/csv" else "jsonl"
+        profiles = parse_profiles(request.get_data(as_text=True), fmt)
+        agent_types = request.args.get("agents")
+        agent_types = agent_types.split(",") if agent_types else None
+        timeout = request.args.get("timeout")
+        concurrency = request.args.get("concurrency")
+    else:
+        data = request.get_json(silent=True) or {}
+        profiles = data.get("travelers")
+        if not isinstance(profiles, list) or not all(isinstance(p, dict) for p in profiles):
+            return jsonify({"error": "'travelers' must be a list of traveler profiles"}), 400
+        agent_types = data.get("agents")
+        timeout = data.get("timeout")
+        concurrency = data.get("concurrency")
+    if not valid_agent_list(agent_types):
+        return jsonify({"error": "'agents' must be a list of agent types"}), 400
+    try:
+        timeout = parse_timeout(timeout)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if concurrency is not None:
+        try:
+            concurrency = int(concurrency)
+        except (TypeError, ValueError):
+            concurrency = 0
+        if concurrency < 1:
+            return jsonify({"error": "'concurrency' must be a positive integer"}), 400
+        concurrency = min(concurrency, BATCH_CONCURRENCY)
+
+    def generate():
+        for _, record in iter_batch(orchestrator, profiles, agent_types, concurrency=concurrency, timeout=timeout):
+            yield json.dumps(record) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route("/api/jobs", methods=["POST"])
+@admitted("jobs")
+def job_submit_handler():
+    """
+    Queue a full-trip assessment and return its job ID at once (202).
+
+    Takes the same body as /api/assessment. worker.py processes run the job;
+    poll /api/jobs/<id> for per-agent progress and fetch /api/jobs/<id>/result.
+    """
+    data = dict(request.get_json(silent=True) or {})
+    agent_types = data.pop("agents", None)
+    batched = bool(data.pop("batched", False))
+    if not valid_agent_list(agent_types):
+        return jsonify({"error": "'agents' must be a list of agent types"}), 400
+    unknown = [a for a in agent_types or () if a not in ASSESSMENT_AGENTS]
+    if unknown:
+        return jsonify({"error": f"Unknown agents: {', '.join(unknown)}"}), 400
+    try:
+        timeout = parse_timeout(data.pop("timeout", None))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        job_id = get_job_store().submit(data, agent_types, timeout=timeout, batched=batched)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "30"}
+    status_url = url_for("job_status_handler", job_id=job_id)
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": status_url,
+        "result_url": url_for("job_result_handler", job_id=job_id),
+    }), 202, {"Location": status_url}
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status_handler(job_id):
+    """Job status (queued, running, done, failed) with per-agent progress."""
+    state = get_job_store().status(job_id)
+    if state is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(state)
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def job_result_handler(job_id):
+    """The assessment (as /api/assessment returns it) once the job is finished; 202 before."""
+    store = get_job_store()
+    state = store.status(job_id)
+    if state is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    if state["status"] in ("queued", "running"):
+        return jsonify(state), 202, {"Retry-After": "2"}
+    return jsonify(dict(store.result(job_id), status=state["status"], error=state.get("error")))
+
 @app.route("/api/agent/health_hospitals", methods=["POST"])
 def health_hospitals_handler():
     data = request.json or {}
     country = data.get("country")
-    # Dummy hospital data, replace with Azure/Foundry/WHO API as needed
-    hospitals_by_country = {
-        "USA": ["Mayo Clinic", "Cleveland Clinic", "Johns Hopkins Hospital"],
-        "India": ["Apollo Hospitals", "Fortis Healthcare", "AIIMS Delhi"],
-        "UK": ["St Thomas' Hospital", "Royal London Hospital", "Addenbrooke's Hospital"],
-        "Germany": ["Charité – Universitätsmedizin Berlin", "University Hospital Heidelberg", "LMU Klinikum Munich"],
-    }
-    hospitals = hospitals_by_country.get(country, [])
+    hospitals = HOSPITALS_BY_COUNTRY.get(country, [])
     return jsonify({"hospitals": hospitals})
 
 @app.route("/api/ping", methods=["GET"])
 def ping():
     return jsonify({"status": "ok"})
 
+@app.route("/api/ready", methods=["GET"])
+def ready():
+    """Readiness probe: warms credentials, agents and connections in the background."""
+    start_warmup()
+    state = readiness()
+    if state["status"] == "ready":
+        return jsonify(state)
+    return jsonify(state), 503, {"Retry-After": "1"}
+
+@app.route("/api/stats", methods=["GET"])
+def stats_handler():
+    """Runtime counters for tuning (Azure thread lifecycle, search cache, coalescing, LLM scheduler, admission, jobs)."""
+    search_cache = get_search_cache()
+    return jsonify({
+        "threads": clients.get_thread_manager().stats(),
+        "search_cache": search_cache.stats() if search_cache else {},
+        "single_flight": search_flights.stats(),
+        "scheduler": get_scheduler().stats(),
+        "admission": admission.stats(),
+        "jobs": get_job_store().counts(),
+    })
+
+@app.route("/metrics", methods=["GET"])
+def metrics_handler():
+    """Prometheus metrics (agent latency, Azure run phases, cache and in-flight gauges)."""
+    payload = metrics_payload()
+    if payload is None:
+        return "prometheus_client is not installed\n", 501, {"Content-Type": "text/plain"}
+    body, content_type = payload
+    return Response(body, content_type=content_type)
+
 @app.route("/api/chat", methods=["POST"])
+@admitted("chat")
 def chat_handler():
     """Handle chatbot queries using web search agent"""
     data = request.json or {}
@@ -73,7 +321,8 @@ def chat_handler():
     try:
         # Use web search to get response
         if search_web:
-            response = search_web(query, "detailed")
+            with deadlines.scope(AGENT_TIMEOUT):
+                response = search_web(query, "detailed")
         else:
             # Fallback response if search_web is not available
             response = "I apologize, but the search service is currently unavailable. Please check official government websites or contact your travel agent for up-to-date information."
@@ -83,4 +332,5 @@ def chat_handler():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
+    # Development server with the reloader; serve.py is the production entry point
     app.run(host="0.0.0.0", port=5050, debug=True)
@@ -0,0 +1,55 @@
+
+# Batch risk assessment for a file of traveler profiles
+#
+#   python batch.py travelers.jsonl -o reports.jsonl
+#   python batch.py travelers.csv -o reports.jsonl --agents compliance,health --concurrency 8
+#
+# Re-running the same command resumes from the checkpoint next to the output file.
+
+import argparse
+import json
+
+from app.orchestrator import Orchestrator
+from app.agents.compliance_agent import ComplianceAgent
+from app.agents.health_agent import HealthAgent
+from app.agents.travel_agent import TravelAgent
+from app.agents.accommodation_agent import AccommodationAgent
+from app.agents.news_alert_agent import NewsAlertAgent
+from app.agents.language_guide_agent import LanguageGuideAgent
+from app.agents.emergency_contact_agent import EmergencyContactAgent
+from app.batch import run_batch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assess a JSONL or CSV file of traveler profiles.")
+    parser.add_argument("input", help="Traveler profiles (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="Progress file (default: <output>.checkpoint.json)")
+    parser.add_argument("--agents", help="Comma-separated agent types (default: full assessment)")
+    parser.add_argument("--concurrency", type=int, help="Travelers assessed at the same time")
+    parser.add_argument("--timeout", type=float, help="Seconds each agent may run")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Input format (default: from extension)")
+    args = parser.parse_args()
+
+    # Register all agents in a dictionary
+    agents = {
+        "compliance": ComplianceAgent(),
+        "health": HealthAgent(),
+        "travel": TravelAgent(),
+        "accommodation": AccommodationAgent(),
+        "news_alert": NewsAlertAgent(),
+        "language_guide": LanguageGuideAgent(),
+        "emergency_contact": EmergencyContactAgent(),
+    }
+    orchestrator = Orchestrator(agents)
+
+    summary = run_batch(
+        orchestrator,
+        args.input,
+        args.output,
+        checkpoint_path=args.checkpoint,
+        agent_types=args.agents.split(",") if args.agents else None,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        fmt=args.format,
+    )
+    print(json.dumps(summary, indent=2))
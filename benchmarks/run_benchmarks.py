@@ -0,0 +1,266 @@
+
+# Latency and throughput benchmarks on the fake Azure backend
+#
+#   python benchmarks/run_benchmarks.py -o results.json
+#   python benchmarks/run_benchmarks.py --baseline results.json     # exit 1 on regression
+#   python benchmarks/run_benchmarks.py --run-latency lognormal:2,0.5 --clients 1,16,64
+#
+# Measures Orchestrator.handle_request per agent, the full assessment (fan-out
+# and batched) and backend_api.py throughput under N concurrent HTTP clients.
+# Results are JSON so runs of different versions can be diffed or compared
+# with --baseline.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+# Metrics compared against a baseline
+COMPARED = ("p50", "p95")
+
+
+def summarize(samples, errors=0):
+    """Latency summary in milliseconds."""
+    samples = sorted(samples)
+    if not samples:
+        return {"count": 0, "errors": errors}
+
+    def pct(p):
+        return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 2)
+
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "mean": round(sum(samples) / len(samples) * 1000, 2),
+        "p50": pct(50),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": round(samples[-1] * 1000, 2),
+    }
+
+
+def profile(i=0):
+    """Traveler profile; i varies the destination so prompts are not shared."""
+    cities = [("France", "Paris"), ("Japan", "Tokyo"), ("Germany", "Berlin"), ("India", "Mumbai"),
+              ("Brazil", "Sao Paulo"), ("Canada", "Toronto"), ("Kenya", "Nairobi"), ("Spain", "Madrid")]
+    country, city = cities[i % len(cities)]
+    return {
+        "country": country,
+        "city": city if i < len(cities) else f"{city} district {i // len(cities)}",
+        "nationality": "Indian",
+        "gender": "Female",
+        "health_conditions": "Diabetes",
+        "planned_stay": 10,
+        "budget_range": "Medium",
+        "purpose": "Business",
+    }
+
+
+def bench_agents(orchestrator, agent_types, iterations):
+    results = {}
+    for agent_type in agent_types:
+        samples, errors = [], 0
+        for i in range(iterations):
+            start = time.perf_counter()
+            result = orchestrator.handle_request(agent_type, **profile(i))
+            samples.append(time.perf_counter() - start)
+            if isinstance(result, str) and ("error" in result.lower()[:40] or result.startswith("Error")):
+                errors += 1
+        results[f"agent.{agent_type}"] = summarize(samples, errors)
+    return results
+
+
+def bench_assessment(orchestrator, iterations):
+    results = {}
+    for name, batched in (("assessment.fanout", False), ("assessment.batched", True)):
+        samples, errors = [], 0
+        for i in range(iterations):
+            start = time.perf_counter()
+            assessment = orchestrator.handle_all(batched=batched, **profile(i))
+            samples.append(time.perf_counter() - start)
+            errors += len(assessment["errors"])
+        results[name] = summarize(samples, errors)
+    return results
+
+
+def bench_throughput(app, clients, duration, agent_types):
+    import logging
+    import requests
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/assessment"
+    results = {}
+    try:
+        for n in clients:
+            samples, errors, shed = [], [0], [0]
+            lock = threading.Lock()
+            stop_at = time.monotonic() + duration
+
+            def client(worker):
+                session = requests.Session()
+                i = worker
+                while time.monotonic() < stop_at:
+                    body = dict(profile(i), agents=agent_types)
+                    start = time.perf_counter()
+                    try:
+                        response = session.post(url, json=body, timeout=300)
+                        ok = response.ok
+                    except requests.RequestException:
+                        response, ok = None, False
+                    # Shed by app.admission: back off as told, not counted as a served request
+                    if response is not None and response.status_code in (429, 503):
+                        with lock:
+                            shed[0] += 1
+                        time.sleep(float(response.headers.get("Retry-After", 1)))
+                        continue
+                    with lock:
+                        samples.append(time.perf_counter() - start)
+                        if not ok:
+                            errors[0] += 1
+                    i += n
+
+            started = time.monotonic()
+            threads = [threading.Thread(target=client, args=(w,)) for w in range(n)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.monotonic() - started
+            summary = summarize(samples, errors[0])
+            summary["requests_per_s"] = round(len(samples) / elapsed, 2)
+            summary["shed"] = shed[0]
+            results[f"throughput.clients_{n}"] = summary
+    finally:
+        server.shutdown()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root_dir, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print p50/p95 changes against a baseline; returns the regressed metrics."""
+    regressions = []
+    for name, current in sorted(results["benchmarks"].items()):
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous:
+            continue
+        for metric in COMPARED:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            flag = "REGRESSION" if change > tolerance else ""
+            print(f"{name:<32} {metric:<4} {old:>10.1f} -> {new:>10.1f} ms  {change:+7.1%} {flag}")
+            if flag:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks on the fake Azure backend.")
+    parser.add_argument("-o", "--output", help="Write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="Previous results to compare p50/p95 against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown vs baseline (0.10 = 10%%)")
+    parser.add_argument("--iterations", type=int, default=10, help="Runs per agent / assessment")
+    parser.add_argument("--clients", default="1,8,32", help="Concurrent HTTP clients for the throughput test")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per throughput level")
+    parser.add_argument("--run-latency", default="lognormal:0.5,0.4", help="Fake run latency distribution")
+    parser.add_argument("--api-latency", default="fixed:0.01", help="Fake per-call API latency")
+    parser.add_argument("--statuses", default="completed=1", help="Fake final run statuses with weights")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake API calls failing with 500")
+    parser.add_argument("--seed", default="1")
+    parser.add_argument("--cache", action="store_true", help="Keep the search cache on (off by default)")
+    parser.add_argument("--skip", default="", help="Comma-separated groups to skip: agents,assessment,throughput")
+    args = parser.parse_args()
+
+    # Configure the process before any app module reads app.config
+    os.environ["AZURE_BACKEND"] = "fake"
+    os.environ["SEARCH_CACHE_ENABLED"] = "1" if args.cache else "0"
+    os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="bench-cache-"))
+    os.environ["AGENT_ID_STORE"] = os.path.join(os.environ["CACHE_DIR"], "agent_ids.json")
+    os.environ["FAKE_RUN_LATENCY"] = args.run_latency
+    os.environ["FAKE_API_LATENCY"] = args.api_latency
+    os.environ["FAKE_RUN_STATUSES"] = args.statuses
+    os.environ["FAKE_ERROR_RATE"] = str(args.error_rate)
+    os.environ["FAKE_SEED"] = args.seed
+
+    import contextlib
+    import io
+
+    # The agents print their prompts; keep the benchmark output clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        import backend_api
+        from app import config, fake_backend
+        from app.orchestrator import ASSESSMENT_AGENTS
+
+    skip = set(filter(None, args.skip.split(",")))
+    benchmarks = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        if "agents" not in skip:
+            benchmarks.update(bench_agents(backend_api.orchestrator, ASSESSMENT_AGENTS, args.iterations))
+        if "assessment" not in skip:
+            benchmarks.update(bench_assessment(backend_api.orchestrator, args.iterations))
+        if "throughput" not in skip:
+            clients = [int(c) for c in args.clients.split(",") if c]
+            benchmarks.update(bench_throughput(backend_api.app, clients, args.duration, list(ASSESSMENT_AGENTS)))
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fake_backend": {
+                "run_latency": args.run_latency,
+                "api_latency": args.api_latency,
+                "statuses": args.statuses,
+                "error_rate": args.error_rate,
+                "seed": args.seed,
+            },
+            "settings": {
+                "run_wait_strategy": config.RUN_WAIT_STRATEGY,
+                "assessment_max_workers": config.ASSESSMENT_MAX_WORKERS,
+                "search_cache": config.SEARCH_CACHE_ENABLED,
+            },
+            "backend_counters": fake_backend.stats(),
+        },
+        "benchmarks": benchmarks,
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    elif not args.baseline:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
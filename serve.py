@@ -0,0 +1,173 @@
+# Production server for backend_api.py
+#
+#   python serve.py                                   # SERVE_* settings from app/config.py
+#   python serve.py --workers 16 --threads 32 --bind 0.0.0.0:8080
+#
+# Runs the Flask app on gunicorn (gthread workers). The app - agent modules,
+# agents and lookup tables - is imported once in the master and forked into
+# the workers. Azure clients, thread pools and SQLite connections are only
+# created on first use, so every worker opens its own after the fork, while
+# the search cache file (SQLite in WAL mode) is read and written by all of
+# them. LLM_RPM / LLM_TPM are split evenly between the workers. On SIGTERM a
+# worker reports "draining" on /api/ready, stops accepting connections and
+# gives in-flight requests SERVE_DRAIN_TIMEOUT seconds to finish.
+#
+# Without gunicorn (e.g. on Windows) it serves from one multi-threaded process.
+
+import argparse
+import logging
+import math
+import os
+import shutil
+import signal
+import threading
+
+from app.config import CACHE_DIR, SERVE_BIND, SERVE_WORKERS, SERVE_THREADS, SERVE_DRAIN_TIMEOUT
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+logger = logging.getLogger("travel_risk.serve")
+
+
+def prepare_metrics(workers):
+    """Workers write Prometheus samples to files that /metrics aggregates (must run before prometheus_client loads)."""
+    if workers < 2 or os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return
+    path = os.path.join(CACHE_DIR, "prometheus")
+    # Samples of a previous run would be added to this one's
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+
+def serve_gunicorn(app, bind, workers, threads, drain_timeout):
+    from app import scheduler, telemetry
+    from app.readiness import start_drain, start_warmup
+
+    def post_fork(server, worker):
+        if workers > 1:
+            scheduler.split_quota(workers)
+
+    def post_worker_init(worker):
+        handle_exit = worker.handle_exit
+
+        def drain(signum, frame):
+            start_drain()
+            handle_exit(signum, frame)
+
+        signal.signal(signal.SIGTERM, drain)
+        signal.siginterrupt(signal.SIGTERM, False)
+        # Each worker warms its own credential, agents and Azure threads
+        start_warmup()
+
+    def child_exit(server, worker):
+        telemetry.worker_exited(worker.pid)
+
+    options = {
+        "bind": bind,
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "graceful_timeout": math.ceil(drain_timeout),
+        "post_fork": post_fork,
+        "post_worker_init": post_worker_init,
+        "child_exit": child_exit,
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Server().run()
+
+
+class _InFlight:
+    """WSGI wrapper counting requests until their response (streams included) is fully sent."""
+
+    def __init__(self, app):
+        self.app = app
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        from werkzeug.wsgi import ClosingIterator
+
+        with self._cond:
+            self.active += 1
+        try:
+            return ClosingIterator(self.app(environ, start_response), self._done)
+        except BaseException:
+            self._done()
+            raise
+
+    def _done(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def wait(self, timeout):
+        """Block until no request is in flight; False if timeout passed first."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.active == 0, timeout)
+
+
+def serve_threaded(app, bind, drain_timeout):
+    from werkzeug.serving import make_server
+    from app.readiness import start_drain, start_warmup
+
+    host, port = bind.rsplit(":", 1)
+    tracked = _InFlight(app)
+    server = make_server(host, int(port), tracked, threaded=True)
+
+    def stop(signum, frame):
+        start_drain()
+        # shutdown() waits for serve_forever() to return, so not from its own thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, stop)
+    start_warmup()
+    print(f"Serving on http://{bind} (single process)")
+    server.serve_forever()
+    server.server_close()
+    if not tracked.wait(drain_timeout):
+        logger.warning("%d request(s) still running after %gs drain", tracked.active, drain_timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve backend_api.py with worker processes and graceful shutdown.")
+    parser.add_argument("--bind", default=SERVE_BIND, help="host:port (default: SERVE_BIND)")
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="Worker processes (default: SERVE_WORKERS)")
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS, help="Threads per worker (default: SERVE_THREADS)")
+    parser.add_argument("--drain-timeout", type=float, default=SERVE_DRAIN_TIMEOUT,
+                        help="Seconds in-flight requests get on shutdown (default: SERVE_DRAIN_TIMEOUT)")
+    args = parser.parse_args()
+
+    workers = 1 if BaseApplication is None else args.workers
+    prepare_metrics(workers)
+    # Only now: app.telemetry loads prometheus_client
+    from app.telemetry import configure_logging
+
+    configure_logging()
+    if workers < args.workers:
+        logger.warning("gunicorn is not installed; serving from a single process")
+
+    # Preload: imported once here, then shared copy-on-write by the forked workers
+    import backend_api
+
+    if BaseApplication is None:
+        serve_threaded(backend_api.app, args.bind, args.drain_timeout)
+    else:
+        serve_gunicorn(backend_api.app, args.bind, workers, args.threads, args.drain_timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Shared test setup
+#
+# Every test runs against the in-process fake Azure backend (app/fake_backend.py)
+# with its caches and stores in a throwaway directory. app.config reads the
+# environment at import, so this has to happen before anything under app/ loads.
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+os.environ["AZURE_BACKEND"] = "fake"
+os.environ["FAKE_RUN_LATENCY"] = "fixed:0.05"
+os.environ["FAKE_API_LATENCY"] = "fixed:0"
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="travel-risk-tests-")
+for name in ("LLM_RPM", "LLM_TPM", "LLM_HEDGE_ENABLED", "CLIENT_RPM", "CLIENT_MAX_CONCURRENT"):
+    os.environ.pop(name, None)
+
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+
+@pytest.fixture
+def fake_backend():
+    """The fake backend, put back to always-completing fast runs afterwards."""
+    from app import fake_backend
+
+    yield fake_backend
+    fake_backend.configure(run_latency="fixed:0.05", statuses="completed=1", error_rate=0, throttle_rate=0)
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from app import admission
+from app.admission import ClientQuotas, Rejected, RouteLimiter
+
+
+@pytest.fixture
+def client():
+    import backend_api
+
+    return backend_api.app.test_client()
+
+
+def _post(client, path, **kwargs):
+    response = client.post(path, **kwargs)
+    # Closing the response releases its admission slot
+    response.close()
+    return response
+
+
+def test_full_queue_is_rejected_with_503():
+    limiter = RouteLimiter("test", max_in_flight=1, max_queue=0)
+    started = limiter.acquire()
+
+    with pytest.raises(Rejected) as rejected:
+        limiter.acquire()
+    assert rejected.value.status == 503
+    assert rejected.value.reason == "queue_full"
+    assert rejected.value.retry_after >= 1
+
+    limiter.release(started)
+    limiter.release(limiter.acquire())
+
+
+def test_queued_request_times_out_with_503():
+    limiter = RouteLimiter("test", max_in_flight=1, max_queue=1, queue_timeout=0.1)
+    limiter.acquire()
+
+    with pytest.raises(Rejected) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == "queue_timeout"
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_queued_requests_get_slots_in_arrival_order():
+    limiter = RouteLimiter("test", max_in_flight=1, max_queue=10, queue_timeout=5)
+    held = limiter.acquire()
+    order = []
+
+    def request(i):
+        started = limiter.acquire()
+        order.append(i)
+        limiter.release(started)
+
+    threads = []
+    for i in range(6):
+        threads.append(threading.Thread(target=request, args=(i,)))
+        threads[-1].start()
+        time.sleep(0.02)
+    limiter.release(held)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == list(range(6))
+
+
+def test_client_quotas():
+    quotas = ClientQuotas(rpm=0, max_concurrent=1)
+    quotas.acquire("a")
+    quotas.acquire("b")
+    with pytest.raises(Rejected) as rejected:
+        quotas.acquire("a")
+    assert (rejected.value.status, rejected.value.reason) == (429, "concurrency")
+    quotas.release("a")
+    quotas.acquire("a")
+
+    quotas = ClientQuotas(rpm=60, max_concurrent=0)
+    for _ in range(10):
+        quotas.acquire("a")
+    with pytest.raises(Rejected) as rejected:
+        quotas.acquire("a")
+    assert (rejected.value.status, rejected.value.reason) == (429, "rate")
+    assert rejected.value.retry_after >= 1
+
+
+def test_route_limit_answers_503_with_retry_after(client, monkeypatch):
+    monkeypatch.setitem(admission._limiters, "chat", RouteLimiter("chat", 1, 0))
+    slot = admission.admit("chat", "someone else")
+    try:
+        response = _post(client, "/api/chat", json={"query": "visa rules"})
+    finally:
+        slot.release()
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_client_quota_answers_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(admission, "_quotas", ClientQuotas(rpm=0, max_concurrent=1))
+    slot = admission.admit("chat", "client-1")
+    try:
+        busy = _post(client, "/api/chat", json={"query": "visa rules"}, headers={"X-Client-Id": "client-1"})
+        other = _post(client, "/api/chat", json={"query": "visa rules"}, headers={"X-Client-Id": "client-2"})
+    finally:
+        slot.release()
+
+    assert busy.status_code == 429
+    assert busy.headers["Retry-After"] == "1"
+    assert other.status_code == 200
+    assert admission._quotas.stats()["concurrency"] == 1
+
+
+def test_slot_is_released_after_the_response(client, monkeypatch):
+    limiter = RouteLimiter("chat", 1, 0)
+    monkeypatch.setitem(admission._limiters, "chat", limiter)
+
+    for _ in range(3):
+        assert _post(client, "/api/chat", json={"query": "visa rules"}).status_code == 200
+    assert limiter.stats()["in_flight"] == 0
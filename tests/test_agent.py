@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from app import agent as agent_module
+from app import deadlines
+from app.agent import AzureAIAgent, _HedgeBudget
+
+
+@pytest.fixture
+def cancelled(fake_backend, monkeypatch):
+    """IDs of the runs cancelled server-side, in order."""
+    run_ids = []
+    cancel = fake_backend._FakeRuns.cancel
+
+    def recording_cancel(self, thread_id, run_id, **kwargs):
+        run_ids.append(run_id)
+        return cancel(self, thread_id, run_id, **kwargs)
+
+    monkeypatch.setattr(fake_backend._FakeRuns, "cancel", recording_cancel)
+    return run_ids
+
+
+def _run_status(fake_backend, run_id):
+    with fake_backend._lock:
+        run = fake_backend._runs.get(run_id)
+    return run and run["status"]
+
+
+def test_run_is_cancelled_server_side_when_the_deadline_passes(fake_backend, cancelled):
+    fake_backend.configure(run_latency="fixed:5")
+    agent = AzureAIAgent("DeadlineTestAgent")
+
+    started = time.monotonic()
+    with deadlines.scope(0.3), pytest.raises(deadlines.DeadlineExceeded):
+        agent.run("a slow question")
+    assert time.monotonic() - started < 1.5
+    assert len(cancelled) == 1
+    assert _run_status(fake_backend, cancelled[0]) in ("cancelled", None)
+
+
+def test_cancelling_the_callers_deadline_cancels_the_run(fake_backend, cancelled):
+    fake_backend.configure(run_latency="fixed:5")
+    agent = AzureAIAgent("DeadlineTestAgent")
+    deadline = deadlines.Deadline()
+    errors = []
+
+    def call():
+        with deadlines.use(deadline):
+            try:
+                agent.run("a question nobody waits for")
+            except deadlines.DeadlineExceeded as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    time.sleep(0.2)
+    # What a client disconnect does
+    deadline.cancel()
+    thread.join(2)
+    assert not thread.is_alive()
+    assert len(errors) == 1 and len(cancelled) == 1
+
+
+def test_hedge_budget_earns_a_fraction_of_primaries():
+    budget = _HedgeBudget(ratio=0.1, max_running=8)
+    for _ in range(9):
+        budget.primary()
+    assert not budget.try_start()
+    budget.primary()
+    assert budget.try_start()
+    assert not budget.try_start()
+
+
+def test_hedge_budget_caps_saved_and_running_hedges():
+    budget = _HedgeBudget(ratio=1, max_running=2)
+    for _ in range(100):
+        budget.primary()
+    assert budget.tokens == agent_module.HEDGE_BURST
+    assert budget.try_start() and budget.try_start()
+    assert not budget.try_start()
+    budget.finished()
+    assert budget.try_start()
+
+
+def test_hedges_stay_within_the_budget(fake_backend, cancelled, monkeypatch):
+    monkeypatch.setattr(agent_module, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(agent_module, "_hedges", _HedgeBudget(ratio=0.1, max_running=8))
+    agent = AzureAIAgent("HedgeTestAgent")
+    # Every run will be slower than the observed p95, so each one wants a hedge
+    for _ in range(agent_module.LLM_HEDGE_MIN_SAMPLES):
+        agent.latencies.add("HedgeTestAgent", 0.02)
+    fake_backend.configure(run_latency="fixed:0.4")
+    runs_before = fake_backend.stats()["runs"]
+
+    replies = []
+    threads = [threading.Thread(target=lambda: replies.append(agent.run("same slow question"))) for _ in range(30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(replies) == 30 and agent_module.RUN_FAILED not in replies
+    hedges = fake_backend.stats()["runs"] - runs_before - 30
+    # 30 primaries at 0.1 hedge each
+    assert 1 <= hedges <= 3
+    # The primaries answered first, so each hedge was cancelled server-side
+    deadline = time.monotonic() + 2
+    while len(cancelled) < hedges and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert len(cancelled) == hedges
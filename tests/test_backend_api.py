@@ -0,0 +1,59 @@
+import pytest
+
+from app.orchestrator import Orchestrator
+
+
+@pytest.fixture
+def client():
+    import backend_api
+
+    return backend_api.app.test_client()
+
+
+def _post(client, path, **kwargs):
+    response = client.post(path, **kwargs)
+    # Closing the response releases its admission slot
+    response.close()
+    return response
+
+
+@pytest.mark.parametrize("timeout", ["abc", [5], {"s": 5}, -1, "nan", True])
+@pytest.mark.parametrize("path", ["/api/assessment", "/api/assessment/stream"])
+def test_bad_timeout_is_a_400(client, path, timeout):
+    response = _post(client, path, json={"country": "France", "timeout": timeout})
+    assert response.status_code == 400
+    assert "timeout" in response.get_json()["error"]
+
+
+def test_bad_timeout_in_the_query_string_is_a_400(client):
+    response = client.get("/api/assessment/stream?country=France&timeout=soon")
+    response.close()
+    assert response.status_code == 400
+
+
+def test_bad_job_timeout_is_a_400(client):
+    assert _post(client, "/api/jobs", json={"country": "France", "timeout": "abc"}).status_code == 400
+
+
+def test_bad_batch_timeout_is_a_400(client):
+    assert _post(client, "/api/batch", json={"travelers": [{}], "timeout": "abc"}).status_code == 400
+    response = _post(client, "/api/batch?timeout=abc", data='{"country": "France"}\n', content_type="application/x-ndjson")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("agents", ["health", [["health"]], [{"type": "health"}]])
+def test_agents_must_be_a_list_of_names(client, agents):
+    assert _post(client, "/api/assessment", json={"agents": agents}).status_code == 400
+
+
+def test_handle_all_runs_a_repeated_agent_once():
+    calls = []
+
+    class Agent:
+        def process(self, **kwargs):
+            calls.append(kwargs)
+            return "ok"
+
+    assessment = Orchestrator({"health": Agent()}).handle_all(["health", "health"], country="France")
+    assert assessment["results"] == {"health": "ok"}
+    assert len(calls) == 1
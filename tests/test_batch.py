@@ -0,0 +1,115 @@
+import json
+import threading
+
+import pytest
+
+from app.batch import Checkpoint, iter_batch, run_batch
+
+
+class _Crash(BaseException):
+    """Stands in for the process dying mid-batch (not caught as a per-traveler error)."""
+
+
+class _Recorder:
+    """Orchestrator stand-in that records which travelers it assessed."""
+
+    def __init__(self, crash_at=None):
+        self.crash_at = crash_at
+        self.assessed = []
+        self._lock = threading.Lock()
+
+    def handle_all(self, agent_types=None, timeout=None, **profile):
+        if profile["name"] == self.crash_at:
+            raise _Crash()
+        with self._lock:
+            self.assessed.append(profile["name"])
+        return {"results": {"health": f"ok {profile['name']}"}, "errors": {}, "elapsed": 0.0}
+
+
+@pytest.fixture
+def travelers(tmp_path):
+    path = tmp_path / "travelers.jsonl"
+    path.write_text("".join(json.dumps({"name": f"t{i}", "traveler_id": i}) + "\n" for i in range(5)))
+    return str(path)
+
+
+def _indices(output):
+    with open(output) as f:
+        return sorted(json.loads(line)["index"] for line in f)
+
+
+def test_checkpoint_keeps_a_watermark_and_the_few_indices_above_it(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = Checkpoint(path)
+    for index in (0, 2, 3):
+        checkpoint.mark(index)
+    assert (checkpoint.watermark, checkpoint.done) == (1, {2, 3})
+
+    checkpoint.mark(1)
+    assert (checkpoint.watermark, checkpoint.done) == (4, set())
+    assert Checkpoint(path).is_done(3) and not Checkpoint(path).is_done(4)
+
+
+def test_rerun_after_completion_assesses_nothing(travelers, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    summary = run_batch(_Recorder(), travelers, output, concurrency=2)
+    assert (summary["assessed"], summary["completed_through"]) == (5, 5)
+
+    again = _Recorder()
+    assert run_batch(again, travelers, output, concurrency=2)["assessed"] == 0
+    assert again.assessed == []
+    assert _indices(output) == [0, 1, 2, 3, 4]
+
+
+def test_resume_after_a_crash(travelers, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    with pytest.raises(_Crash):
+        run_batch(_Recorder(crash_at="t3"), travelers, output, concurrency=1)
+    assert _indices(output) == [0, 1, 2]
+
+    resumed = _Recorder()
+    summary = run_batch(resumed, travelers, output, concurrency=1)
+    assert resumed.assessed == ["t3", "t4"]
+    assert summary["completed_through"] == 5
+    assert _indices(output) == [0, 1, 2, 3, 4]
+
+
+def test_resume_skips_indices_done_above_the_watermark(travelers, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    with open(f"{output}.checkpoint.json", "w") as f:
+        json.dump({"watermark": 2, "done": [3]}, f)
+
+    resumed = _Recorder()
+    run_batch(resumed, travelers, output, concurrency=2)
+    assert sorted(resumed.assessed) == ["t2", "t4"]
+
+
+def test_bad_lines_are_recorded_and_skipped(tmp_path):
+    path = tmp_path / "travelers.jsonl"
+    path.write_text('{"name": "t0"}\n{"name": \n[1, 2]\n{"name": "t3", "planned_stay": 5}\n')
+    output = str(tmp_path / "out.jsonl")
+
+    recorder = _Recorder()
+    summary = run_batch(recorder, str(path), output, concurrency=1)
+    assert recorder.assessed == ["t0", "t3"]
+    assert (summary["assessed"], summary["with_errors"], summary["completed_through"]) == (4, 2, 4)
+    with open(output) as f:
+        records = {r["index"]: r for r in map(json.loads, f)}
+    assert "error" in records[1] and "error" in records[2]
+    assert "error" not in records[3]
+
+    # The bad lines are checkpointed too, so a rerun has nothing left to do
+    assert run_batch(_Recorder(), str(path), output)["assessed"] == 0
+
+
+def test_profiles_cannot_set_handle_all_options():
+    seen = []
+
+    class Orchestrator:
+        def handle_all(self, agent_types=None, timeout=None, **profile):
+            seen.append((agent_types, timeout, profile))
+            return {"results": {}, "errors": {}, "elapsed": 0.0}
+
+    profile = {"name": "t0", "agent_types": ["x"], "max_workers": 10000, "timeout": 0, "batched": True}
+    list(iter_batch(Orchestrator(), [profile], agent_types=["health"], timeout=5))
+    assert seen == [(["health"], 5, {"name": "t0"})]
@@ -0,0 +1,55 @@
+import pytest
+
+from app.utils.countries import (
+    canonical_city,
+    canonical_country,
+    canonical_nationality,
+    currency_for,
+    is_domestic,
+    lookup,
+    shares_language,
+)
+
+
+@pytest.mark.parametrize("text", ["USA", "us", "United States", "the United States of America", "american", " AMERICA "])
+def test_lookup_resolves_codes_names_demonyms_and_aliases(text):
+    assert lookup(text).iso2 == "US"
+
+
+@pytest.mark.parametrize("text", [None, "", "Atlantis"])
+def test_lookup_of_unknown_input_is_none(text):
+    assert lookup(text) is None
+
+
+def test_canonical_names():
+    assert canonical_country("uk") == canonical_country("Great Britain") == "United Kingdom"
+    assert canonical_nationality("USA") == canonical_nationality("american") == "American"
+    # Unknown input is only tidied
+    assert canonical_country("  Middle   Earth ") == "Middle Earth"
+    assert canonical_nationality(None) is None
+    assert canonical_city("new york") == canonical_city("NEW  YORK") == "New York"
+    assert canonical_city("McAllen") == "McAllen"
+    assert currency_for("Indian") == "INR" and currency_for("Atlantis") is None
+
+
+def test_is_domestic():
+    assert is_domestic("American", "USA")
+    assert is_domestic("british", "England")
+    assert not is_domestic("Indian", "United States")
+    # Unknown on both sides falls back to comparing the text
+    assert is_domestic("Atlantean", "atlantean")
+    assert not is_domestic(None, "USA")
+
+
+@pytest.mark.parametrize("nationality, country, expected", [
+    ("Indian", "USA", True),
+    ("British", "Australia", True),
+    ("Irish", "Singapore", True),
+    ("Swiss", "Italy", False),
+    ("Belgian", "Germany", False),
+    ("Spanish", "Mexico", False),
+    ("Indian", "Japan", False),
+    ("Atlantean", "USA", False),
+])
+def test_shares_language_only_for_english_to_english(nationality, country, expected):
+    assert shares_language(nationality, country) is expected
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from app import jobs
+from app.jobs import JobStore, LeaseLost, QueueFull, process_job
+from app.orchestrator import Orchestrator
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_LEASE_SECONDS", 0.3)
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+PROFILE = {"destination": "Paris, France", "country": "France", "city": "Paris"}
+
+
+def test_submit_claim_record_finish(store):
+    job_id = store.submit(PROFILE, ["health", "travel"])
+    state = store.status(job_id)
+    assert state["status"] == "queued"
+    assert state["queue_position"] == 0
+    assert state["progress"] == {"finished": 0, "total": 2, "agents": {"health": "queued", "travel": "queued"}}
+
+    job = store.claim("w1")
+    assert (job["id"], job["attempt"], job["pending"]) == (job_id, 1, ["health", "travel"])
+    assert store.claim("w2") is None
+
+    store.record(job, "w1", "health", result="fine")
+    store.record(job, "w1", "travel", error="Timed out")
+    assert store.status(job_id)["progress"]["finished"] == 2
+    store.finish(job, "w1")
+
+    assert store.status(job_id)["status"] == "done"
+    result = store.result(job_id)
+    assert result["results"] == {"health": "fine"}
+    assert result["errors"] == {"travel": "Timed out"}
+
+
+def test_expired_lease_is_reclaimed_and_the_old_worker_fenced_off(store):
+    job_id = store.submit(PROFILE, ["health", "travel"])
+    first = store.claim("w1")
+    store.record(first, "w1", "health", result="from w1")
+
+    time.sleep(0.4)
+    second = store.claim("w2")
+    # Only the agent without an answer is run again
+    assert (second["attempt"], second["pending"]) == (2, ["travel"])
+
+    with pytest.raises(LeaseLost):
+        store.record(first, "w1", "travel", result="stale")
+    with pytest.raises(LeaseLost):
+        store.finish(first, "w1")
+
+    store.record(second, "w2", "travel", result="from w2")
+    store.finish(second, "w2")
+    assert store.result(job_id)["results"] == {"health": "from w1", "travel": "from w2"}
+
+
+def test_renewed_lease_is_not_reclaimed(store):
+    store.submit(PROFILE, ["health"])
+    job = store.claim("w1")
+    for _ in range(3):
+        time.sleep(0.15)
+        store.renew([job["id"]], "w1")
+    assert store.claim("w2") is None
+    store.finish(job, "w1")
+
+
+def test_job_fails_after_max_attempts(store, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 2)
+    job_id = store.submit(PROFILE, ["health"])
+    for _ in range(2):
+        assert store.claim("w") is not None
+        time.sleep(0.4)
+
+    assert store.claim("w") is None
+    state = store.status(job_id)
+    assert state["status"] == "failed"
+    assert "2 attempts" in state["error"]
+    # No agent is left reported as running on a failed job
+    assert state["progress"]["agents"] == {"health": "error"}
+    assert store.result(job_id)["errors"] == {"health": state["error"]}
+
+
+def test_failed_job_keeps_answers_and_fails_the_rest(store):
+    job_id = store.submit(PROFILE, ["health", "travel"])
+    job = store.claim("w1")
+    store.record(job, "w1", "health", result="fine")
+    store.finish(job, "w1", error="boom")
+
+    assert store.status(job_id)["progress"]["agents"] == {"health": "done", "travel": "error"}
+    assert store.result(job_id)["errors"] == {"travel": "boom"}
+
+
+def test_full_queue_is_refused(store, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_QUEUED", 1)
+    store.submit(PROFILE)
+    with pytest.raises(QueueFull):
+        store.submit(PROFILE)
+
+
+def test_process_job_on_the_fake_backend(store):
+    from app.agents.health_agent import HealthAgent
+    from app.agents.travel_agent import TravelAgent
+
+    orchestrator = Orchestrator({"health": HealthAgent(), "travel": TravelAgent()})
+    job_id = store.submit(dict(PROFILE, nationality="India", planned_stay=5), ["health", "travel"], timeout=10)
+
+    process_job(orchestrator, store, store.claim("w1"), "w1")
+
+    state = store.status(job_id)
+    assert state["status"] == "done"
+    assert state["progress"]["finished"] == 2
+    assert set(store.result(job_id)["results"]) == {"health", "travel"}
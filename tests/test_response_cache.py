@@ -0,0 +1,83 @@
+import types
+import uuid
+
+from app.agent import RUN_FAILED
+from app.utils import response_cache
+from app.utils.response_cache import ResponseCache, cache_key, get_search_cache
+from app.utils.web_search import search_web
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def _fake_time(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def test_entry_expires_after_its_ttl(monkeypatch):
+    clock = _fake_time(monkeypatch)
+    cache = ResponseCache()
+    cache.set("k", "answer", ttl=60)
+
+    clock.now += 59
+    assert cache.get("k") == "answer"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_expired_entry_is_not_read_back_from_disk(monkeypatch, tmp_path):
+    clock = _fake_time(monkeypatch)
+    path = str(tmp_path / "cache.sqlite3")
+    ResponseCache(path).set("fresh", "a", ttl=600)
+    ResponseCache(path).set("stale", "b", ttl=10)
+
+    clock.now += 60
+    # A new instance has an empty LRU, so both lookups go to SQLite
+    reopened = ResponseCache(path)
+    assert reopened.get("fresh") == "a"
+    assert reopened.get("stale") is None
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_lru_evicts_oldest_entries_beyond_max_bytes():
+    cache = ResponseCache(max_bytes=300)
+    for i in range(5):
+        cache.set(f"key{i}", "x" * 90, ttl=60)
+        # Touch key0 so it stays the most recently used
+        cache.get("key0")
+
+    assert cache.get("key0") is not None
+    assert cache.get("key1") is None
+    assert cache.stats()["evictions"] >= 2
+    assert cache.stats()["bytes"] <= 300
+
+
+def test_failed_run_is_not_cached(fake_backend):
+    query = f"visa rules {uuid.uuid4().hex}"
+    key = cache_key(query, "detailed")
+    fake_backend.configure(statuses="failed=1")
+
+    assert search_web(query, agent="TravelAgent") == RUN_FAILED
+    assert get_search_cache().get(key) is None
+
+    # The next call retries, and a completed answer is cached
+    fake_backend.configure(statuses="completed=1")
+    answer = search_web(query, agent="TravelAgent")
+    assert answer != RUN_FAILED
+    assert get_search_cache().get(key) == answer
+
+
+def test_rejected_answer_is_returned_but_not_cached():
+    query = f"batched sections {uuid.uuid4().hex}"
+
+    answer = search_web(query, agent="BatchedAssessment", validate=lambda reply: False)
+    assert answer and answer != RUN_FAILED
+    assert get_search_cache().get(cache_key(query, "detailed")) is None
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from app import deadlines, scheduler
+from app.scheduler import LLMScheduler, TokenBucket
+
+
+def _drained(rpm):
+    """A scheduler whose request bucket is empty, so every call has to queue."""
+    llm = LLMScheduler(rpm=rpm, tpm=0)
+    llm._requests.tokens = 0.0
+    llm._requests.updated = time.monotonic()
+    return llm
+
+
+def _wait_for_queue(llm, size):
+    end = time.monotonic() + 2
+    while len(llm._waiting) < size and time.monotonic() < end:
+        time.sleep(0.005)
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(per_minute=60, capacity=2)
+    now = bucket.updated
+    bucket.take(2)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1.0) == 0.0
+
+
+def test_waiting_calls_are_admitted_by_priority_class():
+    # 300 rpm: one admission every 0.2s, long after all three have queued
+    llm = _drained(rpm=300)
+    order = []
+    callers = ["LanguageGuideAgent", "TravelAgent", "EmergencyContactAgent"]
+
+    def call(caller):
+        llm.acquire(caller, "prompt")
+        order.append(caller)
+
+    threads = [threading.Thread(target=call, args=(caller,)) for caller in callers]
+    for thread in threads:
+        thread.start()
+    _wait_for_queue(llm, 3)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["EmergencyContactAgent", "TravelAgent", "LanguageGuideAgent"]
+    assert llm.stats()["admitted"]["critical"] == 1
+
+
+def test_aging_lifts_a_long_waiting_low_priority_call(monkeypatch):
+    monkeypatch.setattr(scheduler, "LLM_PRIORITY_AGING", 0.5)
+    llm = LLMScheduler(rpm=0, tpm=0)
+    low = llm._enqueue("LanguageGuideAgent", 100)
+    critical = llm._enqueue("EmergencyContactAgent", 100)
+    now = time.monotonic()
+
+    assert min(llm._waiting, key=lambda t: t.rank(now)) is critical
+    # Three aging steps later the low call ranks as critical and was there first
+    low.enqueued -= 1.6
+    assert min(llm._waiting, key=lambda t: t.rank(now)) is low
+
+
+def test_no_aging_when_disabled(monkeypatch):
+    monkeypatch.setattr(scheduler, "LLM_PRIORITY_AGING", 0)
+    llm = LLMScheduler(rpm=0, tpm=0)
+    low = llm._enqueue("LanguageGuideAgent", 100)
+    critical = llm._enqueue("EmergencyContactAgent", 100)
+    low.enqueued -= 3600
+
+    assert min(llm._waiting, key=lambda t: t.rank(time.monotonic())) is critical
+
+
+def test_throttle_pauses_every_admission():
+    llm = LLMScheduler(rpm=0, tpm=0)
+    llm.throttled(0.3)
+    assert llm.busy()
+
+    started = time.monotonic()
+    llm.acquire("TravelAgent", "prompt")
+    assert time.monotonic() - started >= 0.25
+    assert llm.stats()["throttled"] == 1
+
+
+def test_queued_call_gives_up_at_its_deadline():
+    llm = _drained(rpm=6)
+    deadline = deadlines.Deadline(0.2)
+
+    with pytest.raises(deadlines.DeadlineExceeded):
+        llm.acquire("TravelAgent", "prompt", deadline)
+    # The abandoned ticket does not hold up later calls
+    assert not llm._waiting
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import deadlines
+from app.utils.singleflight import SingleFlight
+
+
+def _in_threads(*targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+        # The first thread starts the flight, the others join it
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(5)
+
+
+def _slow(result="answer", seconds=0.3, error=None):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        deadline = deadlines.current()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            deadline.check()
+            time.sleep(0.01)
+        if error is not None:
+            raise error
+        return result
+
+    return fn, calls
+
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    fn, calls = _slow()
+    results = []
+    _in_threads(*[lambda: results.append(flights.do("k", fn, timeout=5))] * 4)
+
+    assert results == ["answer"] * 4
+    assert len(calls) == 1
+    assert flights.stats()["shared"] == 3
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_error_is_raised_in_every_waiter():
+    flights = SingleFlight()
+    fn, calls = _slow(error=ValueError("boom"))
+    errors = []
+
+    def call():
+        try:
+            flights.do("k", fn, timeout=5)
+        except ValueError as e:
+            errors.append(str(e))
+
+    _in_threads(call, call, call)
+    assert errors == ["boom"] * 3
+    assert len(calls) == 1
+
+
+def test_waiter_timeout_leaves_the_run_to_the_others():
+    flights = SingleFlight()
+    fn, _ = _slow(seconds=0.3)
+    outcome = {}
+
+    def patient():
+        outcome["patient"] = flights.do("k", fn, timeout=5)
+
+    def impatient():
+        with pytest.raises(TimeoutError):
+            flights.do("k", fn, timeout=0.05)
+        outcome["impatient"] = "timed out"
+
+    _in_threads(patient, impatient)
+    assert outcome == {"patient": "answer", "impatient": "timed out"}
+    assert flights.stats()["wait_timeouts"] == 1
+    assert flights.stats()["abandoned"] == 0
+
+
+def test_cancelled_first_caller_does_not_fail_followers():
+    flights = SingleFlight()
+    fn, _ = _slow(seconds=0.3)
+    outcome = {}
+
+    def first():
+        with deadlines.scope(5) as deadline:
+            threading.Timer(0.1, deadline.cancel).start()
+            with pytest.raises(deadlines.DeadlineExceeded):
+                flights.do("k", fn, timeout=5)
+        outcome["first"] = "cancelled"
+
+    def follower():
+        outcome["follower"] = flights.do("k", fn, timeout=5)
+
+    _in_threads(first, follower)
+    assert outcome == {"first": "cancelled", "follower": "answer"}
+
+
+def test_run_is_cancelled_when_the_last_waiter_leaves():
+    flights = SingleFlight()
+    cancelled = threading.Event()
+
+    def fn():
+        try:
+            while True:
+                deadlines.current().check()
+                time.sleep(0.01)
+        except deadlines.DeadlineExceeded:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        flights.do("k", fn, timeout=0.1)
+    assert cancelled.wait(1)
+    assert flights.stats()["abandoned"] == 1
+    # A new caller starts a fresh run instead of joining the cancelled one
+    assert flights.do("k", lambda: "again", timeout=1) == "again"
+
+
+def test_run_has_its_own_deadline():
+    flights = SingleFlight()
+    fn, _ = _slow(seconds=5)
+
+    with pytest.raises(deadlines.DeadlineExceeded):
+        flights.do("k", fn, timeout=5, run_timeout=0.1)
+
+
+def test_async_callers_share_one_run_and_errors():
+    flights = SingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flights.do_async("k", fn, timeout=5) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(e) for e in results] == ["boom"] * 3
+    assert len(calls) == 1
+
+
+def test_async_last_cancelled_caller_cancels_the_run():
+    flights = SingleFlight()
+
+    async def main():
+        stopped = asyncio.Event()
+
+        async def fn():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                stopped.set()
+                raise
+
+        async def quick():
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        # One of two callers cancelled: the run goes on for the other
+        first = asyncio.ensure_future(flights.do_async("shared", quick, timeout=5))
+        second = asyncio.ensure_future(flights.do_async("shared", quick, timeout=5))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "answer"
+
+        # The only caller cancelled: the run is cancelled
+        only = asyncio.ensure_future(flights.do_async("alone", fn, timeout=5))
+        await asyncio.sleep(0.05)
+        only.cancel()
+        await asyncio.wait_for(stopped.wait(), 1)
+
+    asyncio.run(main())
+    assert flights.stats()["abandoned"] == 1
@@ -0,0 +1,43 @@
+from app.data.who_store import WHOStore
+
+
+class _Client:
+    """Stands in for WHOClient.get_records with a fixed set of GHO rows."""
+
+    def __init__(self, records):
+        self.records = records
+
+    def get_records(self, indicator, filter=None, select=None):
+        return self.records, len(self.records)
+
+
+def _row(id, country, year, value, dim1=None, date="2024-01-01"):
+    return {"Id": id, "SpatialDim": country, "TimeDim": year, "NumericValue": value, "Dim1": dim1, "Date": date}
+
+
+def test_latest_by_country_picks_the_latest_year_and_a_stable_series(tmp_path):
+    store = WHOStore(str(tmp_path / "who.sqlite3"))
+    store.sync("LIFE", client=_Client([
+        _row(1, "FRA", 2019, 82.0, "MLE"),
+        _row(2, "FRA", 2021, 79.5, "MLE"),
+        _row(3, "FRA", 2021, 85.1, "FMLE"),
+        _row(4, "FRA", 2021, 82.3, "BTSX"),
+        _row(5, "JPN", 2020, 84.0, "FMLE"),
+    ]))
+
+    latest = store.latest_by_country("LIFE")
+    assert latest["FRA"] == {"year": 2021, "value": 82.3, "dim1": "BTSX"}
+    assert latest["JPN"] == {"year": 2020, "value": 84.0, "dim1": "FMLE"}
+    assert store.latest_by_country("LIFE", countries=["FRA"], dim1="MLE") == {
+        "FRA": {"year": 2021, "value": 79.5, "dim1": "MLE"}
+    }
+
+
+def test_has_indicator_sees_a_sync_from_another_process(tmp_path):
+    path = str(tmp_path / "who.sqlite3")
+    api_store = WHOStore(path)
+    assert not api_store.has_indicator("LIFE")
+
+    # A CLI sync writes through its own connection
+    WHOStore(path).sync("LIFE", client=_Client([_row(1, "FRA", 2021, 82.3)]))
+    assert api_store.has_indicator("LIFE")
@@ -0,0 +1,95 @@
+# Background job workers for /api/jobs
+#
+#   python worker.py                                  # JOB_WORKER_* settings from app/config.py
+#   python worker.py --processes 4 --concurrency 8
+#
+# Each process claims queued assessments from the job store (SQLite in WAL
+# mode, shared with the API processes), runs up to --concurrency of them at a
+# time and records every agent's result as it finishes, so /api/jobs/<id>
+# shows progress. A job whose worker dies is picked up by another one once its
+# lease (JOB_LEASE_SECONDS) runs out. A process that exits is restarted; on
+# SIGTERM / Ctrl+C the processes stop claiming and finish the jobs in hand.
+
+import argparse
+import logging
+import multiprocessing
+import signal
+import time
+
+from app.config import JOB_WORKER_PROCESSES, JOB_WORKER_CONCURRENCY, JOB_LEASE_SECONDS
+from app.telemetry import configure_logging
+
+logger = logging.getLogger("travel_risk.worker")
+
+# Seconds between checks that every worker process is still alive
+_SUPERVISE_INTERVAL = 1.0
+
+
+def work(concurrency, stop):
+    """One worker process: its own agents, Azure clients and job store connection."""
+    # The parent handles Ctrl+C and tells the processes to stop through the event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    configure_logging()
+
+    from app.orchestrator import Orchestrator
+    from app.agents.compliance_agent import ComplianceAgent
+    from app.agents.health_agent import HealthAgent
+    from app.agents.travel_agent import TravelAgent
+    from app.agents.accommodation_agent import AccommodationAgent
+    from app.agents.news_alert_agent import NewsAlertAgent
+    from app.agents.language_guide_agent import LanguageGuideAgent
+    from app.agents.emergency_contact_agent import EmergencyContactAgent
+    from app.jobs import run_worker
+
+    agents = {
+        "compliance": ComplianceAgent(),
+        "health": HealthAgent(),
+        "travel": TravelAgent(),
+        "accommodation": AccommodationAgent(),
+        "news_alert": NewsAlertAgent(),
+        "language_guide": LanguageGuideAgent(),
+        "emergency_contact": EmergencyContactAgent(),
+    }
+    run_worker(Orchestrator(agents), concurrency, stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued /api/jobs assessments in worker processes.")
+    parser.add_argument("--processes", type=int, default=JOB_WORKER_PROCESSES,
+                        help="Worker processes (default: JOB_WORKER_PROCESSES)")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY,
+                        help="Jobs each process runs at once (default: JOB_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    configure_logging()
+
+    stop = multiprocessing.Event()
+    # Set from the signal handler; stop itself is set from the loop, as its lock is not reentrant
+    stopping = []
+
+    def shutdown(signum, frame):
+        stopping.append(signum)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, shutdown)
+
+    def start():
+        process = multiprocessing.Process(target=work, args=(args.concurrency, stop), daemon=False)
+        process.start()
+        return process
+
+    processes = [start() for _ in range(max(1, args.processes))]
+    print(f"{len(processes)} job worker(s), {args.concurrency} job(s) each, lease {JOB_LEASE_SECONDS:g}s")
+    while not stopping:
+        time.sleep(_SUPERVISE_INTERVAL)
+        for i, process in enumerate(processes):
+            if not process.is_alive():
+                logger.warning("process %s exited with %s; restarting", process.pid, process.exitcode)
+                processes[i] = start()
+    stop.set()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()